@@ -0,0 +1,10 @@
+"""Performance benchmarks for the parse → scrape → analyze pipeline.
+
+Like ``scoutsense``, make the ``src/`` top-level packages importable.
+"""
+import os
+import sys
+
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir, 'src'))
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
@@ -0,0 +1,153 @@
+"""Synthetic benchmark corpus: resumes as PDF/DOCX of varying length plus job posting pages."""
+import json
+import random
+from pathlib import Path
+from typing import List
+
+CORPUS_DIR = Path(__file__).parent / 'corpus'
+
+FIRST_NAMES = ['Alex', 'Sam', 'Jordan', 'Taylor', 'Morgan', 'Casey', 'Riley', 'Jamie', 'Avery', 'Quinn']
+LAST_NAMES = ['Rivera', 'Chen', 'Okafor', 'Novak', 'Haddad', 'Silva', 'Kowalski', 'Tanaka', 'Moreau', 'Singh']
+SKILLS = ['Python', 'Django', 'FastAPI', 'PostgreSQL', 'AWS', 'Docker', 'Kubernetes', 'React', 'TypeScript',
+          'Terraform', 'Spark', 'Kafka', 'Airflow', 'Go', 'Rust', 'GraphQL', 'Redis', 'CI/CD', 'PyTorch', 'SQL']
+VERBS = ['Built', 'Designed', 'Led', 'Migrated', 'Optimized', 'Automated', 'Scaled', 'Maintained', 'Shipped']
+OBJECTS = ['a payments API', 'the data warehouse', 'an ML feature store', 'the CI pipeline', 'a search service',
+           'customer onboarding flows', 'an event streaming platform', 'internal developer tooling']
+LINES_PER_PAGE = 45
+
+
+def resume_lines(rng: random.Random, pages: int) -> List[str]:
+    """Generate plausible resume text filling roughly the given number of pages."""
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    lines = [name, f"{name.lower().replace(' ', '.')}@example.com | +1 555 0100", "",
+             "Summary", f"Software engineer with {rng.randint(2, 15)} years of experience.", "",
+             "Skills", ', '.join(rng.sample(SKILLS, 8)), "", "Experience"]
+    while len(lines) < pages * LINES_PER_PAGE:
+        lines.append(f"Company {rng.randint(1, 99)} - Engineer ({rng.randint(2008, 2020)}-{rng.randint(2021, 2024)})")
+        for _ in range(rng.randint(3, 6)):
+            lines.append(f"- {rng.choice(VERBS)} {rng.choice(OBJECTS)} using {rng.choice(SKILLS)} and {rng.choice(SKILLS)}, "
+                         f"improving throughput by {rng.randint(5, 80)}%")
+        lines.append("")
+    return lines[:pages * LINES_PER_PAGE]
+
+
+def _pdf_escape(text: str) -> str:
+    return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def write_pdf(path: Path, lines: List[str]):
+    """Write a minimal multi-page text PDF without any third-party dependency."""
+    pages = [lines[i:i + LINES_PER_PAGE] for i in range(0, len(lines), LINES_PER_PAGE)] or [[]]
+    objects = []  # object bodies, 1-indexed in the file
+    page_ids = []
+    font_id, pages_id = 1, 2
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    objects.append(None)  # Pages, filled in once kids are known
+    for page_lines in pages:
+        ops = ["BT /F1 10 Tf 14 TL 50 770 Td"]
+        ops += [f"({_pdf_escape(line)}) Tj T*" for line in page_lines]
+        ops.append("ET")
+        stream = '\n'.join(ops).encode('latin-1', 'replace')
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 612 792] /Contents %d 0 R "
+            b"/Resources << /Font << /F1 %d 0 R >> >> >>" % (pages_id, content_id, font_id)
+        )
+        page_ids.append(len(objects))
+    kids = b' '.join(b"%d 0 R" % i for i in page_ids)
+    objects[pages_id - 1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_ids))
+    objects.append(b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id)
+    catalog_id = len(objects)
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b''.join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, catalog_id, xref)
+    path.write_bytes(bytes(out))
+
+
+def write_docx(path: Path, lines: List[str]):
+    import docx
+
+    document = docx.Document()
+    for line in lines:
+        document.add_paragraph(line)
+    document.save(path)
+
+
+def job_posting_html(rng: random.Random, index: int) -> str:
+    """A job page wrapped in the nav, cookie banner, inline scripts and footer of a typical career site."""
+    skills = rng.sample(SKILLS, 6)
+    nav = ''.join(f'<li><a href="/section/{i}">Section {i}</a></li>' for i in range(40))
+    script = '<script>window.__STATE__ = %s;</script>' % ('{"k": "%s"}' % ('x' * 2000))
+    requirements = ''.join(f'<li>{rng.randint(2, 8)}+ years with {skill}, ideally in production</li>' for skill in skills)
+    duties = ''.join(
+        f'<p>{rng.choice(VERBS)} {rng.choice(OBJECTS)} alongside product, design, and data teams.</p>' for _ in range(8)
+    )
+    return f"""<!DOCTYPE html><html><head><title>Job {index}</title>{script * 20}<style>body{{margin:0}}</style></head>
+<body><nav><ul>{nav}</ul></nav>
+<div class="cookie-consent"><p>We use cookies to personalise content, analyse traffic, and serve ads. Accept?</p></div>
+<main><h1>Senior {skills[0]} Engineer #{index}</h1>
+<div class="job-description">{duties}<h2>Requirements</h2><ul>{requirements}</ul><p>Apply now</p></div></main>
+<footer><ul>{nav}</ul><p>Copyright Example Corp. All rights reserved, privacy policy, terms of use.</p></footer>
+</body></html>"""
+
+
+def career_page_html(rng: random.Random, index: int, inline_kb: int, json_ld: bool) -> str:
+    """A heavy career-site page: a job posting carrying inline_kb of inline app state, optionally with JSON-LD."""
+    page = job_posting_html(rng, index)
+    listing = {'id': 0, 'title': 'Engineer', 'team': 'Platform', 'blurb': 'Join us to build things. ' * 8}
+    per_listing = len(json.dumps(listing)) + 2
+    state = json.dumps({'jobs': [{**listing, 'id': i} for i in range(inline_kb * 1024 // per_listing)]})
+    head = ''
+    if json_ld:
+        skills = rng.sample(SKILLS, 6)
+        posting = {
+            '@context': 'https://schema.org', '@type': 'JobPosting',
+            'title': f'Senior {skills[0]} Engineer #{index}',
+            'hiringOrganization': {'@type': 'Organization', 'name': 'Example Corp'},
+            'jobLocation': {'@type': 'Place', 'address': {'addressLocality': 'Berlin', 'addressCountry': 'DE'}},
+            'employmentType': 'FULL_TIME',
+            'description': ''.join(
+                f'<p>{rng.choice(VERBS)} {rng.choice(OBJECTS)} with {skill}, alongside product, design, and data teams.</p>'
+                for skill in skills
+            ),
+        }
+        head = f'<script type="application/ld+json">{json.dumps(posting)}</script>'
+    return page.replace('</head>', f'{head}</head>', 1).replace(
+        '</body>', f'<script id="__NEXT_DATA__" type="application/json">{state}</script></body>', 1
+    )
+
+
+def build_pages(directory: Path = CORPUS_DIR / 'pages', count: int = 6, seed: int = 7) -> Path:
+    """Generate 1-3 MB career pages, every other one with a JSON-LD JobPosting, and return their directory."""
+    rng = random.Random(seed)
+    directory.mkdir(parents=True, exist_ok=True)
+    for i in range(count):
+        html = career_page_html(rng, i, inline_kb=1024 * (1 + i % 3), json_ld=bool(i % 2))
+        (directory / f'page_{i:02d}.html').write_text(html, encoding='utf-8')
+    return directory
+
+
+def build(directory: Path = CORPUS_DIR, resumes: int = 12, jobs: int = 5, seed: int = 7) -> Path:
+    """Generate the corpus (idempotent for a given seed) and return its directory."""
+    rng = random.Random(seed)
+    (directory / 'resumes').mkdir(parents=True, exist_ok=True)
+    (directory / 'jobs').mkdir(parents=True, exist_ok=True)
+    page_counts = [1, 2, 5, 10]
+    for i in range(resumes):
+        pages = page_counts[i % len(page_counts)]
+        lines = resume_lines(rng, pages)
+        if i % 2:
+            write_docx(directory / 'resumes' / f'resume_{i:02d}_{pages}p.docx', lines)
+        else:
+            write_pdf(directory / 'resumes' / f'resume_{i:02d}_{pages}p.pdf', lines)
+    for i in range(jobs):
+        (directory / 'jobs' / f'job_{i:02d}.html').write_text(job_posting_html(rng, i), encoding='utf-8')
+    return directory
@@ -0,0 +1,104 @@
+"""Compare HTML extraction engines on saved job pages.
+
+    python -m benchmarks.html_engines
+    python -m benchmarks.html_engines --pages-dir ~/saved-pages --iterations 10
+    python -m benchmarks.html_engines --no-json-ld   # always extract from the page body
+
+Without --pages-dir a corpus of 1-3 MB synthetic career pages is generated,
+half of them carrying a JSON-LD JobPosting. Each engine runs in a fresh
+process, reporting latency plus two memory numbers: the Python heap peak
+(tracemalloc) and the growth in peak RSS, which also counts the native
+parsers' allocations. Engines that are not installed are skipped.
+"""
+import argparse
+import json
+import resource
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List
+
+from benchmarks import corpus
+from benchmarks.run import summarize
+from services import html_engines
+from utils.config import config
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _profile(engine_name: str, paths: List[str], iterations: int, json_ld: bool) -> Dict[str, Any]:
+    """Extract every page with one engine. Runs in a fresh worker process."""
+    config._config['scraping']['prefer_json_ld'] = json_ld
+    engine = html_engines.get_engine(engine_name)
+    pages = [html_engines.decode_html(Path(path).read_bytes()) for path in paths]
+    # Warm up once so imports aren't measured
+    html_engines.extract_text(pages[0], engine)
+
+    rss_before = _peak_rss_mb()
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for page in pages:
+            page_start = time.perf_counter()
+            html_engines.extract_text(page, engine)
+            latencies.append(time.perf_counter() - page_start)
+    wall_time = time.perf_counter() - start
+    rss_growth = _peak_rss_mb() - rss_before
+
+    # A separate pass, since tracing slows extraction down
+    tracemalloc.start()
+    for page in pages:
+        html_engines.extract_text(page, engine)
+    _, heap_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        **summarize(latencies, wall_time),
+        'heap_peak_mb': round(heap_peak / 2 ** 20, 2),
+        'rss_growth_mb': round(rss_growth, 2),
+    }
+
+
+def run(args) -> Dict[str, Dict[str, Any]]:
+    directory = Path(args.pages_dir).expanduser() if args.pages_dir else corpus.build_pages(count=args.count)
+    paths = sorted(str(path) for path in directory.glob('*.htm*'))
+    if not paths:
+        raise SystemExit(f"no .html pages found in {directory}")
+    size_mb = sum(Path(path).stat().st_size for path in paths) / 2 ** 20
+    print(f"{len(paths)} pages, {size_mb:.1f} MB")
+    results = {}
+    for name, engine_class in html_engines.ENGINES.items():
+        if not engine_class.available():
+            print(f"skipping {name}: not installed")
+            continue
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            results[name] = pool.submit(_profile, name, paths, args.iterations, not args.no_json_ld).result()
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pages-dir', help='Folder of saved .html pages (default: generate a synthetic corpus)')
+    parser.add_argument('--count', type=int, default=6, help='Synthetic pages to generate')
+    parser.add_argument('--iterations', type=int, default=3, help='Passes over the pages per engine')
+    parser.add_argument('--no-json-ld', action='store_true', help='Ignore JSON-LD JobPosting blocks')
+    parser.add_argument('--json', help='Write results to this file')
+    args = parser.parse_args(argv)
+
+    results = run(args)
+    print(f"{'engine':<12}{'p50 ms':>10}{'p95 ms':>10}{'heap MB':>10}{'RSS +MB':>10}")
+    for name, summary in results.items():
+        print(f"{name:<12}{summary['p50_ms']:>10}{summary['p95_ms']:>10}"
+              f"{summary['heap_peak_mb']:>10}{summary['rss_growth_mb']:>10}")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
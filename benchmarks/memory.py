@@ -0,0 +1,181 @@
+"""Profile memory per analysis stage with tracemalloc.
+
+    python -m benchmarks.memory
+    python -m benchmarks.memory --rounds 5 --top 5
+    python -m benchmarks.memory --source bytes   # read each resume into bytes first, the old upload path
+
+Runs parse → scrape → analyze for every synthetic resume, once per
+round, against a local job server and the fake LLM with caches and
+dedup disabled. Analyses run one at a time and PDF pages are extracted
+in this process, so every allocation is traced and attributed to its
+stage. For each stage it reports the Python heap peak above where the
+stage started and what the stage left allocated; the heap and RSS after
+each round show whether a long-running server keeps growing. --top
+lists the allocation sites each stage left behind on its last run.
+"""
+import argparse
+import gc
+import json
+import os
+import resource
+import sys
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, List
+
+from benchmarks import corpus
+from benchmarks.run import BENCH_MODEL, configure, percentile
+from benchmarks.servers import fake_llm_server, static_server
+from utils.config import config
+
+
+def _rss_mb() -> float:
+    """Current resident set size; peak RSS where /proc isn't available."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except OSError:
+        # ru_maxrss is in kilobytes on Linux, bytes on macOS
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class StageMemory:
+    """Records each stage's heap peak and retained allocations relative to where it started."""
+
+    def __init__(self, top: int = 0):
+        self.top = top
+        self.stages: Dict[str, Dict[str, Any]] = {}
+        self.analysis_peaks: List[int] = []
+        self._analysis_start = None
+        self._analysis_peak = 0
+
+    @contextmanager
+    def analysis(self):
+        """Track the peak across the stages of one analysis."""
+        gc.collect()
+        self._analysis_start, _ = tracemalloc.get_traced_memory()
+        self._analysis_peak = 0
+        yield
+        self.analysis_peaks.append(self._analysis_peak)
+
+    @contextmanager
+    def stage(self, name: str):
+        gc.collect()
+        before = tracemalloc.take_snapshot() if self.top else None
+        start, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        yield
+        _, peak = tracemalloc.get_traced_memory()
+        # Only count what outlives the stage, not garbage waiting for the cycle collector
+        gc.collect()
+        end, _ = tracemalloc.get_traced_memory()
+        entry = self.stages.setdefault(name, {'peaks': [], 'retained': []})
+        entry['peaks'].append(peak - start)
+        entry['retained'].append(end - start)
+        if self._analysis_start is not None:
+            self._analysis_peak = max(self._analysis_peak, peak - self._analysis_start)
+        if before is not None:
+            diff = tracemalloc.take_snapshot().compare_to(before, 'lineno')
+            entry['top'] = [str(stat) for stat in diff[:self.top]]
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        def kb(values):
+            return {
+                'p50_kb': round(percentile(values, 50) / 1024, 1),
+                'max_kb': round(max(values) / 1024, 1),
+            }
+
+        results = {}
+        for name, entry in self.stages.items():
+            results[name] = {
+                'count': len(entry['peaks']),
+                'peak': kb(entry['peaks']),
+                'retained': kb(entry['retained']),
+                'top': entry.get('top', []),
+            }
+        if self.analysis_peaks:
+            results['analysis'] = {'count': len(self.analysis_peaks), 'peak': kb(self.analysis_peaks)}
+        return results
+
+
+def run(args) -> Dict[str, Any]:
+    directory = corpus.build(resumes=args.resumes, jobs=args.jobs)
+    resumes = sorted((directory / 'resumes').iterdir())
+    jobs = sorted((directory / 'jobs').iterdir())
+
+    with static_server(directory / 'jobs') as job_server, fake_llm_server(0.0, 10000.0) as llm_server:
+        configure(llm_server.url, 1)
+        config._config.setdefault('dedup', {})['enabled'] = False
+        config._config['file_types'].setdefault('pdf', {})['parallel_workers'] = 1
+
+        from services.ai_analyzer import AIAnalyzer
+        from services.document_parser import DocumentParser
+        from services.job_scraper import JobScraper
+
+        analyzer = AIAnalyzer()
+        urls = [f"{job_server.url}/{path.name}" for path in jobs]
+
+        def source(path: Path):
+            return path.read_bytes() if args.source == 'bytes' else path
+
+        # Warm up once so imports, clients and pools aren't counted as growth
+        JobScraper.scrape_job_description(urls[0])
+        text = DocumentParser.parse_resume(resumes[0], config.get_mime_type(resumes[0].suffix.lstrip('.')))
+        analyzer.analyze_resume(text, 'warm up', BENCH_MODEL, '', use_cache=False)
+
+        tracemalloc.start(args.frames)
+        profile = StageMemory(args.top)
+        rounds = []
+        try:
+            for _ in range(args.rounds):
+                for i, path in enumerate(resumes):
+                    with profile.analysis():
+                        with profile.stage('parse'):
+                            resume_text = DocumentParser.parse_resume(
+                                source(path), config.get_mime_type(path.suffix.lstrip('.'))
+                            )
+                        with profile.stage('scrape'):
+                            job_text = JobScraper.scrape_job_description(urls[i % len(urls)])
+                        with profile.stage('analyze'):
+                            analyzer.analyze_resume(resume_text, job_text, BENCH_MODEL, '', use_cache=False)
+                    del resume_text, job_text
+                gc.collect()
+                heap, _ = tracemalloc.get_traced_memory()
+                rounds.append({'heap_mb': round(heap / 2 ** 20, 2), 'rss_mb': round(_rss_mb(), 1)})
+        finally:
+            tracemalloc.stop()
+    return {'stages': profile.summary(), 'rounds': rounds}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--resumes', type=int, default=12, help='Synthetic resumes to generate')
+    parser.add_argument('--jobs', type=int, default=5, help='Synthetic job pages to generate')
+    parser.add_argument('--rounds', type=int, default=3, help='Passes over the resumes')
+    parser.add_argument('--source', choices=['path', 'bytes'], default='path',
+                        help='Hand the parser a path (read in place) or the file read into bytes')
+    parser.add_argument('--top', type=int, default=0, help='Allocation sites to list per stage')
+    parser.add_argument('--frames', type=int, default=1, help='Traceback frames kept per allocation')
+    parser.add_argument('--json', help='Write results to this file')
+    args = parser.parse_args(argv)
+
+    results = run(args)
+    print(f"{'stage':<10}{'runs':>6}{'peak p50 KB':>14}{'peak max KB':>14}{'kept p50 KB':>14}")
+    for name, summary in results['stages'].items():
+        retained = summary.get('retained', {}).get('p50_kb', '')
+        print(f"{name:<10}{summary['count']:>6}{summary['peak']['p50_kb']:>14}{summary['peak']['max_kb']:>14}"
+              f"{retained:>14}")
+    for number, memory in enumerate(results['rounds'], 1):
+        print(f"after round {number}: heap {memory['heap_mb']} MB, RSS {memory['rss_mb']} MB")
+    for name, summary in results['stages'].items():
+        for line in summary.get('top', []):
+            print(f"  {name}: {line}")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
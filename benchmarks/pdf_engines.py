@@ -0,0 +1,83 @@
+"""Compare PDF extraction engines, serial and page-parallel, on synthetic resumes.
+
+    python -m benchmarks.pdf_engines
+    python -m benchmarks.pdf_engines --pages 1 10 40 --iterations 5
+
+Engines that are not installed are skipped, as is parallel mode on a
+single-CPU machine (extraction always runs serially there).
+"""
+import argparse
+import json
+import random
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+from benchmarks import corpus
+from benchmarks.run import measure
+from services import pdf_engines
+from utils.config import config
+
+
+def build_pdfs(page_counts: List[int], seed: int = 7) -> Dict[int, Path]:
+    """Write one synthetic resume PDF per page count and return their paths."""
+    rng = random.Random(seed)
+    directory = corpus.CORPUS_DIR / 'pdf_engines'
+    directory.mkdir(parents=True, exist_ok=True)
+    documents = {}
+    for pages in page_counts:
+        path = directory / f'resume_{pages}p.pdf'
+        corpus.write_pdf(path, corpus.resume_lines(rng, pages))
+        documents[pages] = path
+    return documents
+
+
+def extract(path: Path, engine: pdf_engines.PdfEngine) -> List[str]:
+    with open(path, 'rb') as document:
+        return list(pdf_engines.iter_pdf_pages(document, engine))
+
+
+def run(args) -> Dict[str, Dict[str, float]]:
+    documents = build_pdfs(args.pages)
+    pdf_config = config._config['file_types'].setdefault('pdf', {})
+    config.settings.file_types.limits.max_pages = None
+    modes = [('serial', sys.maxsize)]
+    if pdf_engines.parallel_workers() >= 2:
+        modes.append(('parallel', 1))
+    else:
+        print("skipping parallel mode: only one worker available")
+    results = {}
+    for name, engine_class in pdf_engines.ENGINES.items():
+        if not engine_class.available():
+            print(f"skipping {name}: not installed")
+            continue
+        engine = engine_class()
+        for mode, min_pages in modes:
+            pdf_config['parallel_min_pages'] = min_pages
+            for pages, path in documents.items():
+                # Warm up once so pool start-up and imports aren't measured
+                extract(path, engine)
+                calls = [lambda path=path: extract(path, engine)] * args.iterations
+                results[f"{name}/{mode}/{pages}p"] = measure(calls)
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pages', type=int, nargs='+', default=[1, 5, 10, 40], help='Document sizes in pages')
+    parser.add_argument('--iterations', type=int, default=3, help='Extractions per engine and size')
+    parser.add_argument('--json', help='Write results to this file')
+    args = parser.parse_args(argv)
+
+    results = run(args)
+    print(f"{'case':<28}{'p50 ms':>10}{'p95 ms':>10}")
+    for case, summary in results.items():
+        print(f"{case:<28}{summary['p50_ms']:>10}{summary['p95_ms']:>10}")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,123 @@
+"""Measure time to first token when screening a batch of resumes against one posting.
+
+    python -m benchmarks.prompt_cache
+    python -m benchmarks.prompt_cache --prefill-rate 500 --pages 1 2 5
+    python -m benchmarks.prompt_cache --job-file posting.html   # a real posting; the synthetic one is short
+
+The fake LLM server keeps a prefix cache the way llama.cpp and vLLM do:
+only the part of a prompt not shared with a recent one is prefilled, at
+--prefill-rate tokens per second. Every resume is analyzed against the same
+job description twice, starting from an empty cache each time: once with the
+current prompt layout (instructions, job, resume) and once with the old
+resume-first layout, for comparison. Reports time to first token for the
+first resume (nothing cached yet) and the rest, plus the share of prompt
+tokens the server reported as cached. The saving grows with the length of
+the posting relative to the resumes.
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+from benchmarks import corpus
+from benchmarks.run import BENCH_MODEL, configure, summarize
+from benchmarks.servers import fake_llm_server
+from services.html_engines import decode_html
+from utils.config import config
+
+
+def resume_first_context(resume_text: str, job_description: str) -> str:
+    """The stage context as laid out before prompts were ordered for prefix caching."""
+    return f"""Analyze the following resume against the job description.
+
+Resume:
+{resume_text}
+
+Job Description:
+{job_description}"""
+
+
+def screen(analyzer, resumes: List[str], job_text: str) -> Dict[str, Any]:
+    # Warm up once so client setup isn't counted against the first resume
+    analyzer.analyze_resume('warm up', 'warm up', BENCH_MODEL, '', use_cache=False)
+    ttft, ratios = [], []
+    for resume_text in resumes:
+        stats = {}
+        start = time.perf_counter()
+        stream = analyzer.stream_resume_analysis(resume_text, job_text, BENCH_MODEL, '', use_cache=False, stats=stats)
+        next(stream)
+        ttft.append(time.perf_counter() - start)
+        for _ in stream:
+            pass
+        prompt_cache = (stats.get('result') or {}).get('prompt_cache')
+        if prompt_cache:
+            ratios.append(prompt_cache['ratio'])
+    return {
+        'first_ms': round(ttft[0] * 1000, 2),
+        'rest': summarize(ttft[1:], sum(ttft[1:])),
+        'cached_ratio': round(sum(ratios[1:]) / len(ratios[1:]), 3) if len(ratios) > 1 else None,
+    }
+
+
+def run(args) -> Dict[str, Dict[str, Any]]:
+    directory = corpus.build(resumes=args.resumes, jobs=1)
+    paths = [
+        path for path in sorted((directory / 'resumes').iterdir())
+        if int(path.stem.rsplit('_', 1)[1].rstrip('p')) in args.pages
+    ]
+    job_path = Path(args.job_file).expanduser() if args.job_file else next((directory / 'jobs').iterdir())
+
+    from services.ai_analyzer import AIAnalyzer
+    from services.document_parser import DocumentParser
+    from services.job_scraper import JobScraper
+
+    resumes = [DocumentParser.parse_resume(path, config.get_mime_type(path.suffix.lstrip('.'))) for path in paths]
+    job_text = job_path.read_text()
+    if job_path.suffix.startswith('.htm'):
+        job_text = JobScraper.extract_text(decode_html(job_path.read_bytes()))
+    if len(resumes) < 2:
+        raise SystemExit("need at least two resumes; raise --resumes or add --pages")
+
+    results = {}
+    with fake_llm_server(args.latency, args.token_rate, args.prefill_rate) as llm_server:
+        configure(llm_server.url, 1)
+        config._config.setdefault('dedup', {})['enabled'] = False
+        for layout in ('job-first', 'resume-first'):
+            # Start each layout with nothing cached on the server
+            llm_server.httpd.RequestHandlerClass.prompts.clear()
+            analyzer = AIAnalyzer()
+            if layout == 'resume-first':
+                analyzer._analysis_context = resume_first_context
+            results[layout] = screen(analyzer, resumes, job_text)
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--resumes', type=int, default=12, help='Synthetic resumes to generate, of which --pages picks')
+    parser.add_argument('--pages', type=int, nargs='+', default=[1, 2], choices=[1, 2, 5, 10],
+                        help='Resume lengths to include')
+    parser.add_argument('--job-file', help='Job posting to screen against, as text or saved HTML')
+    parser.add_argument('--latency', type=float, default=0.02, help='Fake LLM fixed delay before the first token (s)')
+    parser.add_argument('--token-rate', type=float, default=2000.0, help='Fake LLM output tokens per second')
+    parser.add_argument('--prefill-rate', type=float, default=2000.0,
+                        help='Fake LLM prompt tokens prefilled per second (0 = instant)')
+    parser.add_argument('--json', help='Write results to this file')
+    args = parser.parse_args(argv)
+
+    results = run(args)
+    print(f"{'layout':<14}{'first ms':>10}{'rest p50 ms':>13}{'rest p95 ms':>13}{'cached':>8}")
+    for layout, summary in results.items():
+        ratio = f"{summary['cached_ratio']:.0%}" if summary['cached_ratio'] is not None else '-'
+        print(f"{layout:<14}{summary['first_ms']:>10}{summary['rest']['p50_ms']:>13}"
+              f"{summary['rest']['p95_ms']:>13}{ratio:>8}")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,178 @@
+"""Benchmark DocumentParser, JobScraper and AIAnalyzer against local fixtures.
+
+    python -m benchmarks.run                          # print a report
+    python -m benchmarks.run --save-baseline b.json   # store results
+    python -m benchmarks.run --baseline b.json        # exit 1 on regression
+
+Caches are disabled so every iteration does the real work. The LLM stage
+talks to a fake OpenAI-compatible server whose latency and token rate are
+configurable, which isolates client-side overhead from model speed.
+"""
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List
+
+from benchmarks import corpus
+from benchmarks.servers import fake_llm_server, static_server
+from utils.config import config
+
+BENCH_MODEL = 'benchmark'
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Linear-interpolated percentile, q in [0, 100]."""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def summarize(latencies: List[float], wall_time: float) -> Dict[str, float]:
+    return {
+        'count': len(latencies),
+        'throughput_per_s': round(len(latencies) / wall_time, 2) if wall_time else 0.0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+def measure(calls: List[Callable[[], object]], concurrency: int = 1) -> Dict[str, float]:
+    """Time each call, optionally running them on a thread pool."""
+    def timed(call):
+        start = time.perf_counter()
+        call()
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    if concurrency > 1:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            latencies = list(pool.map(timed, calls))
+    else:
+        latencies = [timed(call) for call in calls]
+    return summarize(latencies, time.perf_counter() - start)
+
+
+def configure(llm_url: str, concurrency: int):
+    """Disable caches and register the fake LLM as an OpenAI-compatible provider."""
+    settings = config._config
+    for section in ('resumes', 'jobs', 'responses'):
+        settings.setdefault('cache', {}).setdefault(section, {})['enabled'] = False
+    settings.setdefault('providers', {})['benchmark'] = {
+        'type': 'openai_compatible',
+        'base_url': f"{llm_url}/v1",
+        'requires_api_key': False,
+        'max_in_flight': concurrency,
+        'timeout': 60,
+    }
+    settings['models'][BENCH_MODEL] = {
+        'display_name': 'Benchmark',
+        'provider': 'benchmark',
+        'model_id': 'benchmark',
+        'temperature': 0.0,
+        'max_tokens': 512,
+        'system_role': 'You are an expert HR professional and technical interviewer.',
+    }
+
+
+def run(args) -> Dict[str, Dict[str, float]]:
+    directory = corpus.build(resumes=args.resumes, jobs=args.jobs)
+    resumes = sorted((directory / 'resumes').iterdir())
+    jobs = sorted((directory / 'jobs').iterdir())
+
+    with static_server(directory / 'jobs') as job_server, \
+            fake_llm_server(args.latency, args.token_rate) as llm_server:
+        configure(llm_server.url, args.concurrency)
+
+        from services.ai_analyzer import AIAnalyzer
+        from services.document_parser import DocumentParser
+        from services.job_scraper import JobScraper
+
+        mime_types = config.file_types['mime_types']
+        files = [(path.read_bytes(), mime_types[path.suffix.lstrip('.')]) for path in resumes]
+        urls = [f"{job_server.url}/{path.name}" for path in jobs]
+        analyzer = AIAnalyzer()
+        resume_text = DocumentParser.parse_resume(*files[0])
+        job_text = JobScraper.scrape_job_description(urls[0])
+
+        results = {}
+        results['parse'] = measure(
+            [lambda f=f: DocumentParser.parse_resume(*f) for f in files] * args.iterations
+        )
+        results['scrape'] = measure(
+            [lambda u=u: JobScraper.scrape_job_description(u) for u in urls] * args.iterations
+        )
+        analyze_calls = [
+            lambda: analyzer.analyze_resume(resume_text, job_text, BENCH_MODEL, '', use_cache=False)
+        ] * (args.iterations * args.concurrency)
+        results['analyze'] = measure(analyze_calls, args.concurrency)
+
+        # Time to first streamed token, the latency recruiters actually feel
+        ttft = []
+        for _ in range(args.iterations):
+            start = time.perf_counter()
+            stream = analyzer.stream_resume_analysis(resume_text, job_text, BENCH_MODEL, '', use_cache=False)
+            next(stream)
+            ttft.append(time.perf_counter() - start)
+            for _ in stream:
+                pass
+        results['analyze_ttft'] = summarize(ttft, sum(ttft))
+    return results
+
+
+def compare(results: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """List every stage/percentile that got slower than baseline by more than tolerance."""
+    regressions = []
+    for stage, stats in results.items():
+        for metric in ('p50_ms', 'p95_ms'):
+            before = baseline.get(stage, {}).get(metric)
+            if before and stats[metric] > before * (1 + tolerance):
+                regressions.append(f"{stage} {metric}: {before:.2f} → {stats[metric]:.2f} (+{stats[metric] / before - 1:.0%})")
+    return regressions
+
+
+def print_report(results: Dict):
+    print(f"{'stage':<14}{'count':>7}{'ops/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for stage, stats in results.items():
+        print(f"{stage:<14}{stats['count']:>7}{stats['throughput_per_s']:>10}"
+              f"{stats['p50_ms']:>10}{stats['p95_ms']:>10}{stats['p99_ms']:>10}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=3, help='Passes over the corpus per stage')
+    parser.add_argument('--resumes', type=int, default=12, help='Synthetic resumes to generate')
+    parser.add_argument('--jobs', type=int, default=5, help='Synthetic job pages to generate')
+    parser.add_argument('--latency', type=float, default=0.05, help='Fake LLM time to first token (s)')
+    parser.add_argument('--token-rate', type=float, default=400.0, help='Fake LLM tokens per second')
+    parser.add_argument('--concurrency', type=int, default=4, help='Concurrent LLM calls in the analyze stage')
+    parser.add_argument('--json', help='Write results to this file')
+    parser.add_argument('--save-baseline', help='Write results as the new baseline')
+    parser.add_argument('--baseline', help='Compare against this baseline and fail on regression')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed slowdown vs baseline (0.25 = 25%%)')
+    args = parser.parse_args(argv)
+
+    results = run(args)
+    print_report(results)
+    for path in (args.json, args.save_baseline):
+        if path:
+            with open(path, 'w') as f:
+                json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,143 @@
+"""Local HTTP servers used by the benchmarks: static job pages and a fake OpenAI-compatible LLM."""
+import functools
+import http.server
+import json
+import os
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
+FAKE_ANALYSIS = """# Resume Analysis
+
+## Score: 8/10
+
+## Detailed Feedback
+- Strong overlap with the required skills and seniority.
+- Limited evidence of the requested domain experience.
+
+## Interview Questions
+
+### Easy Questions
+1. Walk us through a recent project.
+"""
+
+FAKE_ANALYSIS_JSON = json.dumps({
+    'score': 8,
+    'feedback': [
+        'Strong overlap with the required skills and seniority.',
+        'Limited evidence of the requested domain experience.',
+    ],
+    'questions': {
+        level: [f"{level.replace('_', ' ').capitalize()} question {i}?" for i in range(1, 6)]
+        for level in ('easy', 'intermediate', 'difficult', 'extremely_difficult')
+    },
+})
+
+
+class _QuietHandler(http.server.SimpleHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+
+class _FakeLLMHandler(http.server.BaseHTTPRequestHandler):
+    """Replies with a canned analysis after a delay, like a model server would.
+
+    Like llama.cpp or vLLM with prefix caching, it remembers recent prompts:
+    the longest prefix shared with one of them counts as cached, only the
+    rest is prefilled at prefill_tokens_per_second (0 = instantly), and the
+    cached part is reported in usage.prompt_tokens_details.
+    """
+    protocol_version = 'HTTP/1.1'
+    latency = 0.05        # seconds before the first token
+    tokens_per_second = 200.0
+    prefill_tokens_per_second = 0.0
+    prompts = deque(maxlen=32)
+    prompts_lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def _prefill(self, body) -> int:
+        """Wait for the uncached part of the prompt to be prefilled; returns the cached tokens."""
+        prompt = ''.join(f"{m.get('role')}\n{m.get('content', '')}\n" for m in body.get('messages', []))
+        with self.prompts_lock:
+            cached = max((len(os.path.commonprefix([prompt, seen])) for seen in self.prompts), default=0)
+            self.prompts.append(prompt)
+        if self.prefill_tokens_per_second:
+            time.sleep((len(prompt) - cached) / 4 / self.prefill_tokens_per_second)
+        return cached // 4
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        json_mode = body.get('response_format', {}).get('type') == 'json_object' or any(
+            'single JSON object' in m.get('content', '') for m in body.get('messages', [])
+        )
+        analysis = FAKE_ANALYSIS_JSON if json_mode else FAKE_ANALYSIS
+        words = analysis.split(' ')
+        prompt_tokens = sum(len(m.get('content', '')) for m in body.get('messages', [])) // 4
+        time.sleep(self.latency)
+        cached_tokens = min(self._prefill(body), prompt_tokens)
+
+        if body.get('stream'):
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Connection', 'close')
+            self.end_headers()
+            for word in words:
+                time.sleep(1 / self.tokens_per_second)
+                chunk = {'id': 'bench', 'object': 'chat.completion.chunk', 'created': 0, 'model': body.get('model'),
+                         'choices': [{'index': 0, 'delta': {'content': word + ' '}, 'finish_reason': None}]}
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.close_connection = True
+            return
+
+        time.sleep(len(words) / self.tokens_per_second)
+        payload = json.dumps({
+            'id': 'bench', 'object': 'chat.completion', 'created': 0, 'model': body.get('model'),
+            'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': analysis}, 'finish_reason': 'stop'}],
+            'usage': {'prompt_tokens': prompt_tokens, 'completion_tokens': len(words),
+                      'total_tokens': prompt_tokens + len(words),
+                      'prompt_tokens_details': {'cached_tokens': cached_tokens}},
+        }).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+class BackgroundServer:
+    """Run an HTTP server on an ephemeral localhost port in a daemon thread."""
+
+    def __init__(self, handler):
+        self.httpd = http.server.ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def static_server(directory: Path) -> BackgroundServer:
+    return BackgroundServer(functools.partial(_QuietHandler, directory=str(directory)))
+
+
+def fake_llm_server(latency: float, tokens_per_second: float, prefill_tokens_per_second: float = 0.0) -> BackgroundServer:
+    handler = type('FakeLLMHandler', (_FakeLLMHandler,), {
+        'latency': latency, 'tokens_per_second': tokens_per_second,
+        'prefill_tokens_per_second': prefill_tokens_per_second, 'prompts': deque(maxlen=32),
+    })
+    return BackgroundServer(handler)
@@ -0,0 +1,12 @@
+"""Headless entry point for Scout Sense.
+
+The application modules live under ``src/`` as top-level packages
+(``services``, ``utils``, ``models``), so make them importable here the
+same way ``src/main.py`` does under Streamlit.
+"""
+import os
+import sys
+
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir, 'src'))
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
@@ -0,0 +1,313 @@
+import time
+
+_import_start = time.perf_counter()
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from services.batch_analyzer import BatchAnalyzer
+from services.pipeline import AnalysisPipeline, PipelineError
+from services.job_scraper import JobScraper
+from services.job_store import JobStore
+from services.prescreen import PreScreener
+from utils import aio
+from utils.config import config
+from utils.metrics import metrics
+
+IMPORT_SECONDS = time.perf_counter() - _import_start
+
+logger = logging.getLogger('scoutsense')
+
+
+async def _load_job(pipeline: AnalysisPipeline, job: str) -> str:
+    """Fetch a job URL, or read a local text/HTML file."""
+    if job.startswith(('http://', 'https://')):
+        return await pipeline.fetch_job_description(job)
+    content = Path(job).expanduser().read_text(encoding='utf-8', errors='replace')
+    if job.lower().endswith(('.html', '.htm')):
+        return await asyncio.to_thread(JobScraper.extract_text, content)
+    return content
+
+
+def _api_key(args) -> Optional[str]:
+    """Resolve the API key for the chosen model, or None (after logging) if one is required but missing."""
+    provider_config = config.get_provider_config(config.get_provider(args.model))
+    key_env = provider_config.get('api_key_env', '')
+    api_key = args.api_key or os.environ.get(key_env, '')
+    if provider_config.get('requires_api_key', True) and not api_key:
+        logger.error("No API key: pass --api-key or set %s", key_env)
+        return None
+    return api_key
+
+
+def _cached(result: Dict[str, Any]) -> bool:
+    """Whether a rating was served without calling the model.
+
+    Staged results are cached when every stage that ran came from the
+    response cache; a resume deduplicated against an earlier one is cached
+    when that rating was reused as is rather than re-rated from a diff.
+    """
+    ran = [status for status in result.get('stages', {}).values() if status != 'skipped']
+    if ran:
+        return all(status == 'cached' for status in ran)
+    if result.get('duplicate_of'):
+        return result.get('reanalysis', 'reused') == 'reused'
+    return bool(result.get('cache', {}).get('hit'))
+
+
+async def score(args) -> int:
+    """Score every resume in a directory against every job and write JSONL."""
+    api_key = _api_key(args)
+    if api_key is None:
+        return 2
+
+    pipeline = AnalysisPipeline()
+    resumes = BatchAnalyzer.load_directory(args.resumes)
+    if not resumes:
+        logger.error("No PDF or DOCX files found in %s", args.resumes)
+        return 2
+
+    # Parse every resume and fetch every job once, all at the same time
+    parsed = await asyncio.gather(
+        *(pipeline.stage('parse', pipeline.parse_resume(path, file_type)) for _, path, file_type in resumes),
+        return_exceptions=True
+    )
+    jobs = await asyncio.gather(
+        *(pipeline.stage('scrape', _load_job(pipeline, job)) for job in args.jobs),
+        return_exceptions=True
+    )
+
+    out = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    semaphore = asyncio.Semaphore(args.concurrency)
+    failures = 0
+
+    def write(record):
+        out.write(json.dumps(record, ensure_ascii=False) + '\n')
+        out.flush()
+
+    async def analyze(name, resume_text, job, job_text, similarity=None):
+        record = {'resume': name, 'job': job, 'model': args.model}
+        if similarity is not None:
+            record['similarity'] = similarity
+        async with semaphore:
+            try:
+                result = await pipeline.analyze(
+                    resume_text, job_text, args.model, api_key, not args.no_cache, args.consensus
+                )
+            except PipelineError as e:
+                record['error'] = str(e)
+                return record
+        record.update({
+            'score': result['score'],
+            'cached': _cached(result),
+            'markdown_response': result['markdown_response'],
+        })
+        if result.get('duplicate_of'):
+            record.update(duplicate_of=result['duplicate_of'], reanalysis=result.get('reanalysis', 'reused'))
+        if result.get('consensus'):
+            record['consensus'] = {
+                key: result['consensus'][key] for key in ('scores', 'agreed', 'mean', 'variance', 'models')
+            }
+        return record
+
+    prescreener = None if args.no_prescreen else PreScreener.from_config()
+    if prescreener and args.top_k is not None:
+        prescreener.top_k = args.top_k
+
+    tasks = []
+    for job, job_text in zip(args.jobs, jobs):
+        candidates = []
+        for (name, _, _), resume_text in zip(resumes, parsed):
+            for failed in (resume_text, job_text):
+                if isinstance(failed, Exception):
+                    write({'resume': name, 'job': job, 'model': args.model, 'error': str(failed)})
+                    failures += 1
+                    break
+            else:
+                candidates.append((name, resume_text))
+        if not prescreener:
+            tasks.extend(analyze(name, resume_text, job, job_text) for name, resume_text in candidates)
+            continue
+        selected, rejected = await asyncio.to_thread(prescreener.screen, candidates, job_text)
+        for name, _, similarity in rejected:
+            write({'resume': name, 'job': job, 'model': args.model, 'screened_out': True, 'similarity': similarity})
+        tasks.extend(analyze(name, resume_text, job, job_text, similarity) for name, resume_text, similarity in selected)
+
+    try:
+        for future in asyncio.as_completed(tasks):
+            record = await future
+            failures += 'error' in record
+            write(record)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        metrics.export()
+    return 1 if failures else 0
+
+
+async def jobs(args) -> int:
+    """Manage the saved job posting store."""
+    store = JobStore.get_store()
+    if args.action == 'list':
+        for posting in store.postings():
+            print(f"{posting['url']}\t{posting['chars']}\t{posting['title']}")
+        return 0
+    if args.action == 'remove':
+        missing = [job for job in args.jobs if not store.remove(job)]
+        for job in missing:
+            logger.error("Not in the store: %s", job)
+        return 1 if missing else 0
+
+    pipeline = AnalysisPipeline()
+    texts = await asyncio.gather(
+        *(pipeline.stage('scrape', _load_job(pipeline, job)) for job in args.jobs),
+        return_exceptions=True
+    )
+    failures = 0
+    for job, text in zip(args.jobs, texts):
+        if isinstance(text, Exception):
+            logger.error("Could not add %s: %s", job, text)
+            failures += 1
+        else:
+            posting = store.add_text(job, text, args.title)
+            logger.info("Saved %s (%d characters)", posting['url'], posting['chars'])
+    return 1 if failures else 0
+
+
+async def match(args) -> int:
+    """Rank every saved job posting against one resume, deep-analyzing the best matches, and write JSONL."""
+    api_key = _api_key(args) if args.deep else ''
+    if api_key is None:
+        return 2
+
+    path = Path(args.resume).expanduser()
+    file_ext = path.suffix.lstrip('.').lower()
+    if not config.is_allowed_file_type(file_ext):
+        logger.error("Unsupported file type: %s", path.name)
+        return 2
+    pipeline = AnalysisPipeline()
+    try:
+        resume_text = await pipeline.stage(
+            'parse', pipeline.parse_resume(path, config.get_mime_type(file_ext))
+        )
+    except PipelineError as e:
+        logger.error("%s", e)
+        return 1
+
+    matches = await asyncio.to_thread(JobStore.get_store().match, resume_text, args.top)
+    analyses = await pipeline.analyze_many(
+        resume_text, {m['url']: m['text'] for m in matches[:args.deep]}, args.model, api_key,
+        not args.no_cache, args.concurrency
+    ) if args.deep else {}
+
+    out = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    failures = 0
+    try:
+        for m in matches:
+            record = {'resume': path.name, 'job': m['url'], 'title': m['title'], 'similarity': m['similarity']}
+            result = analyses.get(m['url'])
+            if isinstance(result, PipelineError):
+                record.update({'model': args.model, 'error': str(result)})
+                failures += 1
+            elif result:
+                record.update({
+                    'model': args.model,
+                    'score': result['score'],
+                    'cached': _cached(result),
+                    'markdown_response': result['markdown_response'],
+                })
+            out.write(json.dumps(record, ensure_ascii=False) + '\n')
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        metrics.export()
+    return 1 if failures else 0
+
+
+def worker(args) -> int:
+    """Work the background job queue until interrupted."""
+    from services.job_queue import JobQueue
+    from services.worker import run_workers
+
+    run_workers(args.processes, args.concurrency, args.until_idle)
+    stats = JobQueue.get_queue().stats()
+    logger.info("Queue: %s", ', '.join(f"{count} {status}" for status, count in stats.items()))
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='scoutsense', description='Scout Sense resume rater (headless)')
+    parser.add_argument('-v', '--verbose', action='store_true', help='Log progress and import timing to stderr')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    score_parser = subparsers.add_parser('score', help='Score a directory of resumes against one or more jobs')
+    score_parser.add_argument('resumes', help='Directory containing PDF/DOCX resumes')
+    score_parser.add_argument('-j', '--job', dest='jobs', action='append', required=True,
+                              help='Job posting URL or local .html/.txt file (repeatable)')
+    score_parser.add_argument('-m', '--model', default=next(iter(config.models)),
+                              choices=list(config.models), help='Model key from config.yaml')
+    score_parser.add_argument('-k', '--api-key', help="API key (defaults to the provider's api_key_env variable)")
+    score_parser.add_argument('-o', '--output', help='JSONL output file (defaults to stdout)')
+    score_parser.add_argument('-c', '--concurrency', type=int, default=config.batch.get('analysis_workers', 4),
+                              help='Maximum concurrent LLM calls')
+    score_parser.add_argument('--no-cache', action='store_true', help='Bypass the LLM response cache')
+    score_parser.add_argument('--no-prescreen', action='store_true',
+                              help='Send every resume to the LLM instead of only the embedding pre-screen picks')
+    score_parser.add_argument('--top-k', type=int,
+                              help='Resumes per job to send to the LLM after pre-screening (overrides config.yaml)')
+    score_parser.add_argument('--consensus', nargs='*', metavar='MODEL', choices=list(config.models),
+                              help='Score with several models at once (default: consensus.models in config.yaml); '
+                                   '--model writes the feedback and questions')
+
+    jobs_parser = subparsers.add_parser('jobs', help='Manage saved job postings for `match`')
+    jobs_parser.add_argument('action', choices=['add', 'list', 'remove'])
+    jobs_parser.add_argument('jobs', nargs='*', help='Job posting URLs or local .html/.txt files')
+    jobs_parser.add_argument('--title', help='Display title for added postings (defaults to the URL)')
+
+    match_parser = subparsers.add_parser('match', help='Rank saved job postings against one resume')
+    match_parser.add_argument('resume', help='PDF/DOCX resume')
+    match_parser.add_argument('-n', '--top', type=int, help='Only output the N most similar postings')
+    match_parser.add_argument('-d', '--deep', type=int, default=0,
+                              help='Run the full LLM analysis on the N most similar postings')
+    match_parser.add_argument('-m', '--model', default=next(iter(config.models)),
+                              choices=list(config.models), help='Model key from config.yaml')
+    match_parser.add_argument('-k', '--api-key', help="API key (defaults to the provider's api_key_env variable)")
+    match_parser.add_argument('-o', '--output', help='JSONL output file (defaults to stdout)')
+    match_parser.add_argument('-c', '--concurrency', type=int,
+                              default=config.job_store.get('deep_analysis_concurrency', 4),
+                              help='Maximum concurrent LLM calls')
+    match_parser.add_argument('--no-cache', action='store_true', help='Bypass the LLM response cache')
+
+    worker_parser = subparsers.add_parser('worker', help='Run analyses queued from the web UI')
+    worker_parser.add_argument('-p', '--processes', type=int, default=config.job_queue.get('worker_processes'),
+                               help='Worker processes (defaults to the CPU count)')
+    worker_parser.add_argument('-c', '--concurrency', type=int, default=config.job_queue.get('worker_concurrency', 4),
+                               help='Jobs in flight per worker process')
+    worker_parser.add_argument('--until-idle', action='store_true', help='Exit once the queue is empty')
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.WARNING,
+        format='%(asctime)s %(levelname)s %(message)s',
+        stream=sys.stderr
+    )
+    logger.info("Imports took %.0f ms (streamlit loaded: %s)", IMPORT_SECONDS * 1000, 'streamlit' in sys.modules)
+
+    if args.command == 'score':
+        return aio.run(score(args))
+    if args.command == 'jobs':
+        return aio.run(jobs(args))
+    if args.command == 'match':
+        return aio.run(match(args))
+    if args.command == 'worker':
+        return worker(args)
+    return 2
@@ -1,28 +1,64 @@
 import os, sys
+import logging
+import time
+import uuid
 from os.path import dirname as up
+from pathlib import Path
 
 sys.path.append(os.path.abspath(os.path.join(up(__file__), os.pardir)))
 
 import streamlit as st
-import yaml
-from pathlib import Path
 from services.document_parser import DocumentParser
 from services.job_scraper import JobScraper
 from services.ai_analyzer import AIAnalyzer
+from services.batch_analyzer import BatchAnalyzer
+from services.job_store import JobStore
+from services.job_queue import JobQueue, QUEUED, RUNNING, DONE, FAILED, CANCELLED
+from services.worker import start_background_worker
+from services.ai_analyzer import SCORE_PATTERN
+from services.pipeline import AnalysisPipeline, PipelineError
+from utils import aio
 from utils.config import config
+from utils.metrics import metrics
+from utils.reporting import StreamlitReporter, set_reporter
+from utils.uploads import DocumentTooLargeError, check_size
+
+logger = logging.getLogger('scoutsense.app')
 
 # Set page config first
 st.set_page_config(**config.ui['page_config'])
+# Service messages from this script thread become alerts; other threads keep logging them
+set_reporter(StreamlitReporter())
+metrics.start_exporter()
+
+@st.cache_resource
+def load_services():
+    """Build the services once per server process; every session and rerun shares them.
+
+    They hold no per-user state: API clients are pooled per key by the
+    provider registry, and the caches and stores are process-wide.
+    """
+    ai_analyzer = AIAnalyzer()
+    if config.job_queue.get('embedded_worker', True):
+        start_background_worker()
+    return DocumentParser(), JobScraper(), ai_analyzer, AnalysisPipeline(ai_analyzer), JobQueue.get_queue()
 
-# Initialize services
-document_parser = DocumentParser()
-job_scraper = JobScraper()
-ai_analyzer = AIAnalyzer()
+document_parser, job_scraper, ai_analyzer, pipeline, job_queue = load_services()
+
+# Background jobs belong to the session ID in the URL, so they survive reloads
+session_id = st.query_params.get('session')
+if not session_id:
+    session_id = st.query_params['session'] = uuid.uuid4().hex[:12]
 
 # Main UI
 st.title(config.ui['title'])
 st.write(config.ui['description'])
 
+# Model settings changed in the sidebar apply to this session only
+if 'model_overrides' not in st.session_state:
+    st.session_state.model_overrides = {}
+config.set_overrides(st.session_state.model_overrides)
+
 # Sidebar for configuration
 with st.sidebar:
     st.header(config.ui['sidebar']['config_header'])
@@ -31,24 +67,15 @@ with st.sidebar:
     st.subheader(config.ui['sidebar']['model_section'])
     selected_model = st.selectbox(
         "Select AI Model",
-        options=[model['display_name'] for model in config.models.values()],
+        options=config.display_names(),
         index=0
     )
-    
-    # Get model key from display_name
-    model_key = next(
-        (key for key, model in config.models.items() if model['display_name'] == selected_model),
-        None
-    )
+    model_key = config.model_key_for(selected_model)
     
     # API Keys
     st.subheader(config.ui['sidebar']['api_section'])
-    if 'gpt' in model_key:
-        openai_key = st.text_input("OpenAI API Key", value="", type="password")
-        google_key = ""
-    else:
-        google_key = st.text_input("Google API Key", value="", type="password")
-        openai_key = ""
+    provider = ai_analyzer.providers.for_model(model_key)
+    api_key = st.text_input(provider.config.get('key_label', "API Key"), value="", type="password")
     
     # Model-specific settings
     if model_key:
@@ -62,98 +89,541 @@ with st.sidebar:
             help="Higher values make the output more creative"
         )
         
-        if 'gpt' in model_key:
-            max_tokens = st.number_input(
-                "📝 Max Output Tokens",
-                min_value=1,
-                max_value=4096,
-                value=int(model_config['max_tokens']),
-                help="Maximum length of the response"
-            )
-        else:
-            max_tokens = st.number_input(
-                "📝 Max Output Tokens",
-                min_value=1,
-                max_value=4096,
-                value=int(model_config['max_output_tokens']),
-                help="Maximum length of the response"
-            )
+        # OpenAI-style APIs call it max_tokens, Gemini max_output_tokens
+        max_tokens_key = 'max_tokens' if provider.is_openai_style else 'max_output_tokens'
+        max_tokens = st.number_input(
+            "📝 Max Output Tokens",
+            min_value=1,
+            max_value=4096,
+            value=int(model_config[max_tokens_key]),
+            help="Maximum length of the response"
+        )
         
-        # Update config
+        # Kept in the session rather than written to config.yaml, which every user shares
         if st.button(config.ui['sidebar']['update_button']):
-            config_path = Path(__file__).parent.parent / 'config.yaml'
-            with open(config_path, 'r') as f:
-                yaml_config = yaml.safe_load(f)
-            
-            if 'gpt' in model_key:
-                yaml_config['models'][model_key]['temperature'] = temperature
-                yaml_config['models'][model_key]['max_tokens'] = max_tokens
-            else:
-                yaml_config['models'][model_key]['temperature'] = temperature
-                yaml_config['models'][model_key]['max_output_tokens'] = max_tokens
-            
-            with open(config_path, 'w') as f:
-                yaml.dump(yaml_config, f, default_flow_style=False)
-            
-            st.success("✅ Settings updated successfully!")
+            st.session_state.model_overrides[model_key] = {'temperature': temperature, max_tokens_key: max_tokens}
+            st.success("✅ Settings updated for this session!")
+        if model_key in st.session_state.model_overrides and st.button("↩️ Reset to defaults"):
+            del st.session_state.model_overrides[model_key]
+            st.rerun()
+
+    bypass_cache = st.checkbox(
+        "⏭️ Bypass response cache",
+        value=False,
+        help="Always call the model, even if an identical analysis is cached"
+    )
+
+    # Consensus scoring: several models score at once, the selected one writes feedback and questions
+    consensus_models = None
+    consensus_keys = {}
+    if st.checkbox(
+        "🗳️ Consensus scoring",
+        value=False,
+        help=f"Score with several models at once and stop as soon as {config.consensus.get('quorum', 2)} agree "
+             f"within {config.consensus.get('tolerance', 1.0):g} points"
+    ):
+        consensus_names = st.multiselect(
+            "Scoring models",
+            options=config.display_names(),
+            default=[
+                config.get_model_config(m)['display_name'] for m in config.consensus.get('models', [])
+                if config.get_model_config(m)
+            ]
+        )
+        consensus_models = [config.model_key_for(name) for name in consensus_names]
+        # Keys for the other providers on the panel; left blank, their api_key_env variable is used
+        other_providers = {config.get_provider(m) for m in consensus_models} - {config.get_provider(model_key)}
+        for provider_name in sorted(other_providers):
+            provider_config = config.get_provider_config(provider_name)
+            consensus_keys[provider_name] = st.text_input(
+                provider_config.get('key_label', f"{provider_name} API Key"),
+                value="",
+                type="password",
+                key=f"consensus_key_{provider_name}",
+                help=f"Defaults to ${provider_config.get('api_key_env')}"
+            )
+
+    # Cache statistics
+    caches = {
+        "Parsed resumes": document_parser.get_cache(),
+        "Job descriptions": job_scraper.get_cache(),
+        "LLM responses": ai_analyzer.get_response_cache(),
+    }
+    with st.expander(config.ui['sidebar']['cache_section']):
+        for label, cache in caches.items():
+            if not cache:
+                continue
+            stats = cache.stats()
+            st.caption(
+                f"{label}: {stats['hits']} hits • {stats['misses']} misses • "
+                f"{stats['entries']} entries ({stats['size_bytes'] / 1024:.0f} KB)"
+            )
+            if 'saved_tokens' in stats:
+                st.caption(f"↳ saved {stats['saved_tokens']:,} tokens and {stats['saved_seconds']:.1f}s")
+        if st.button("🧹 Clear caches"):
+            for cache in caches.values():
+                if cache:
+                    cache.clear()
 
 # Main content area
-st.header(config.ui['main']['url_section'])
-job_url = st.text_input("Enter URL", placeholder="https://example.com/job-posting")
+def format_analysis(markdown_response, score=None):
+    """Color the score line and swap question section headers for their emoji labels."""
+    colored_response = markdown_response
+    if score is not None:
+        score_color = config.get_score_color(score)
+        colored_response = SCORE_PATTERN.sub(
+            lambda m: f"Score: <span style='color:{score_color}'>{m.group(1)}/10</span>",
+            colored_response,
+            count=1
+        )
+    
+    # Replace question section headers with emojis
+    return colored_response.replace(
+        "### Easy Questions",
+        f"### {config.ui['main']['results']['levels']['easy']}"
+    ).replace(
+        "### Intermediate Questions",
+        f"### {config.ui['main']['results']['levels']['intermediate']}"
+    ).replace(
+        "### Difficult Questions",
+        f"### {config.ui['main']['results']['levels']['difficult']}"
+    ).replace(
+        "### Extremely Difficult Questions",
+        f"### {config.ui['main']['results']['levels']['extremely_difficult']}"
+    )
+
+def render_analysis(result):
+    """Render a scored markdown analysis."""
+    st.markdown(format_analysis(result["markdown_response"], result["score"]), unsafe_allow_html=True)
 
-st.header(config.ui['main']['upload_section'])
-uploaded_file = st.file_uploader("Choose file", type=["pdf", "docx"])
+def render_consensus(consensus):
+    """Show each panel model's score and how the consensus was reached."""
+    agreed = consensus['agreed']
+    st.caption(
+        f"🗳️ {'Agreed by ' + ', '.join(agreed) if agreed else 'No quorum agreed; median score'} • "
+        f"mean {consensus['mean']:g} • variance {consensus['variance']:g}"
+    )
+    st.dataframe(
+        [
+            {"Model": model, "Score": consensus['scores'].get(model), "Status": status}
+            for model, status in consensus['models'].items()
+        ],
+        hide_index=True,
+        use_container_width=True
+    )
 
-if st.button(config.ui['main']['analyze_button']) and uploaded_file and job_url:
-    # Check if API keys are provided
-    if ('gpt' in model_key and not openai_key) or ('gemini' in model_key and not google_key):
+def render_performance(trace_id):
+    """Show per-stage timings for one analysis and refresh the metrics exports."""
+    metrics.export()
+    events = metrics.events(trace_id)
+    if not events:
+        return
+    with st.expander(config.ui['main']['results']['performance']):
+        st.dataframe(
+            [
+                {
+                    "Stage": e['stage'],
+                    "Time (ms)": e.get('wall_ms'),
+                    "Bytes in": e.get('bytes_in'),
+                    "Prompt tokens": e.get('prompt_tokens'),
+                    "Cached tokens": e.get('cached_tokens'),
+                    "Completion tokens": e.get('completion_tokens'),
+                    "Cache": e.get('cache'),
+                    "Retries": e.get('retries'),
+                    "Wait (ms)": e.get('wait_ms'),
+                    "Work (ms)": e.get('work_ms'),
+                    "OK": "✅" if e.get('ok') else "❌",
+                }
+                for e in events
+            ],
+            hide_index=True,
+            use_container_width=True
+        )
+        for e in events:
+            if e.get('failover'):
+                st.caption(f"⚠️ {e.get('model')} was unavailable; answered by {e['failover']}")
+
+def upload_too_large(uploaded):
+    """The reason an upload is over the file size limit, or None. Checked before anything reads it."""
+    try:
+        check_size(uploaded.size)
+    except DocumentTooLargeError as e:
+        return f"{uploaded.name}: {str(e)}"
+    return None
+
+def check_api_key():
+    """Stop the script if the selected model is missing its API key."""
+    if provider.requires_api_key and not api_key:
         st.error("🔐 Please provide the required API key in the sidebar.")
         st.stop()
-        
-    with st.spinner("🔄 Analyzing resume..."):
-        # Extract resume text
-        resume_text = document_parser.parse_resume(uploaded_file.read(), uploaded_file.type)
-        if not resume_text:
-            st.error("❌ Failed to extract text from the resume. Please ensure the file is not corrupted and contains text content.")
-            st.stop()
 
-        # Scrape job description
-        job_desc_text = job_scraper.scrape_job_description(job_url)
-        if not job_desc_text:
-            st.error("❌ Failed to scrape job description")
+st.header(config.ui['main']['url_section'])
+job_url = st.text_input("Enter URL", placeholder="https://example.com/job-posting")
+
+single_tab, batch_tab, match_tab, jobs_tab = st.tabs([
+    config.ui['main']['single_tab'], config.ui['main']['batch_tab'], config.ui['main']['match_tab'],
+    config.ui['main']['jobs_tab']
+])
+
+with single_tab:
+    st.header(config.ui['main']['upload_section'])
+    uploaded_file = st.file_uploader("Choose file", type=["pdf", "docx"])
+
+    background = st.checkbox(
+        "📥 Run in background",
+        value=False,
+        key="single_background",
+        help="Queue the analysis for a worker; the result appears under Background Jobs, even after a reload"
+    )
+
+    if st.button(config.ui['main']['analyze_button']) and uploaded_file and job_url:
+        check_api_key()
+        too_large = upload_too_large(uploaded_file)
+        if too_large:
+            st.error(f"❌ {too_large}")
             st.stop()
 
-        # Pass the appropriate API key based on the model
-        api_key = openai_key if 'gpt' in model_key else google_key
-        
-        # Analyze resume
-        print(f"🤖 Analyzing resume with model: {model_key}")
-        result = ai_analyzer.analyze_resume(resume_text, job_desc_text, model_key, api_key)  # Modified line
-
-        if result and "markdown_response" in result:
-            st.header(config.ui['main']['results']['score'])
-            score_color = config.get_score_color(result["score"])
-            colored_response = result["markdown_response"].replace(
-                f"Score: {result['score']}/10",
-                f"Score: <span style='color:{score_color}'>{result['score']}/10</span>"
+        if background:
+            job_id = job_queue.submit(
+                'analyze',
+                {'file_type': uploaded_file.type, 'job_url': job_url, 'model_key': model_key,
+                 'use_cache': not bypass_cache, 'overrides': config.get_overrides(), 'consensus': consensus_models},
+                uploaded_file.getvalue(), api_key, owner=session_id, label=uploaded_file.name
             )
-            
-            # Replace question section headers with emojis
-            colored_response = colored_response.replace(
-                "### Easy Questions",
-                f"### {config.ui['main']['results']['levels']['easy']}"
-            ).replace(
-                "### Intermediate Questions",
-                f"### {config.ui['main']['results']['levels']['intermediate']}"
-            ).replace(
-                "### Difficult Questions",
-                f"### {config.ui['main']['results']['levels']['difficult']}"
-            ).replace(
-                "### Extremely Difficult Questions",
-                f"### {config.ui['main']['results']['levels']['extremely_difficult']}"
+            st.success(f"📥 Queued as job {job_id}. Follow it under Background Jobs.")
+        else:
+            with metrics.trace() as trace_id:
+                with st.spinner("🔄 Reading resume and job description..."):
+                    # Extract resume text and scrape the job description concurrently; the
+                    # upload is parsed in place rather than copied into new bytes
+                    try:
+                        resume_text, job_desc_text = aio.run(
+                            pipeline.prepare(uploaded_file, uploaded_file.type, job_url)
+                        )
+                    except PipelineError as e:
+                        if isinstance(e.__cause__, DocumentTooLargeError):
+                            st.error(f"❌ {uploaded_file.name}: {str(e.__cause__)}")
+                        elif e.stage == 'parse':
+                            st.error("❌ Failed to extract text from the resume. Please ensure the file is not corrupted and contains text content.")
+                        else:
+                            st.error("❌ Failed to scrape job description")
+                        st.caption(str(e))
+                        st.stop()
+
+                if consensus_models is not None:
+                    logger.info("Scoring resume by consensus of: %s", ', '.join(consensus_models))
+                    with st.spinner("🗳️ Scoring with several models..."):
+                        result = ai_analyzer.analyze_consensus(
+                            resume_text, job_desc_text, model_key, api_key, consensus_models, consensus_keys,
+                            use_cache=not bypass_cache
+                        )
+                    if result:
+                        st.header(config.ui['main']['results']['score'])
+                        render_consensus(result['consensus'])
+                        render_analysis(result)
+                else:
+                    # Analyze resume, rendering the markdown as it streams in
+                    logger.info("Analyzing resume with model: %s", model_key)
+                    st.header(config.ui['main']['results']['score'])
+                    score_placeholder = st.empty()
+                    body_placeholder = st.empty()
+                    score_placeholder.caption("⏳ Waiting for the model...")
+
+                    def show_score(score):
+                        score_color = config.get_score_color(score)
+                        score_placeholder.markdown(
+                            f"## <span style='color:{score_color}'>{score:g}/10</span>",
+                            unsafe_allow_html=True
+                        )
+
+                    response_text = ""
+                    score = None
+                    compaction = {}
+                    for chunk in ai_analyzer.stream_resume_analysis(resume_text, job_desc_text, model_key, api_key, use_cache=not bypass_cache, stats=compaction):
+                        response_text += chunk
+                        partial_score, markdown = ai_analyzer.preview(response_text)
+                        if score is None and partial_score is not None:
+                            score = partial_score
+                            show_score(score)
+                        body_placeholder.markdown(format_analysis(markdown, score), unsafe_allow_html=True)
+
+                    # The validated result may differ from the preview (repaired JSON, re-asked fields)
+                    result = compaction.pop('result', None)
+                    if result:
+                        if result['score'] != score:
+                            score = result['score']
+                            show_score(score)
+                        body_placeholder.markdown(format_analysis(result['markdown_response'], score), unsafe_allow_html=True)
+                        reused = [stage for stage, status in result.get('stages', {}).items() if status == 'cached']
+                        if result.get('duplicate_of'):
+                            how = "updated from its changes" if result.get('reanalysis') == 'diff' else "reused its rating"
+                            st.caption(
+                                f"♻️ Near-duplicate ({result['similarity']:.0%} similar) of a resume already analyzed "
+                                f"for this job; {how}"
+                            )
+                        elif reused:
+                            st.caption(f"♻️ Reused cached {', '.join(reused)}")
+                        if result.get('prompt_cache'):
+                            st.caption(
+                                f"⚡ {result['prompt_cache']['ratio']:.0%} of the prompt was served from the "
+                                f"provider's prefix cache"
+                            )
+                        # Kept so the questions can be regenerated without re-reading or re-scoring
+                        st.session_state.last_analysis = {'resume_text': resume_text, 'job_description': job_desc_text}
+
+                    if not response_text:
+                        score_placeholder.empty()
+                    elif score is None:
+                        score_placeholder.warning("⚠️ The response did not include a score")
+                    if compaction.get('tokens_saved'):
+                        st.caption(
+                            f"✂️ Prompt compaction saved ~{compaction['tokens_saved']:,} input tokens "
+                            f"({compaction['tokens_before']:,} → {compaction['tokens_after']:,})"
+                        )
+            render_performance(trace_id)
+
+    last_analysis = st.session_state.get('last_analysis')
+    if ai_analyzer.staged and last_analysis and st.button(
+        "🔄 Regenerate Interview Questions",
+        help="Ask for a new set of questions, reusing the cached score and feedback"
+    ):
+        check_api_key()
+        with metrics.trace() as trace_id:
+            with st.spinner("🔄 Regenerating interview questions..."):
+                result = ai_analyzer.analyze_resume(
+                    last_analysis['resume_text'], last_analysis['job_description'], model_key, api_key,
+                    refresh=('questions',)
+                )
+        if result:
+            if result['stages']['questions'] == 'skipped':
+                st.info(f"ℹ️ Questions are only generated for scores of {config.settings.scoring.thresholds.high:g} or higher")
+            render_analysis(result)
+        render_performance(trace_id)
+
+with batch_tab:
+    st.header(config.ui['main']['batch_section'])
+    uploaded_files = st.file_uploader("Choose files", type=["pdf", "docx"], accept_multiple_files=True)
+    resume_dir = st.text_input("...or a folder of resumes on the server", placeholder="/path/to/resumes")
+    prescreen = st.checkbox(
+        "Pre-screen with embeddings",
+        value=config.prescreen.get('enabled', False),
+        help=f"Only the {config.prescreen.get('top_k') or 'all'} resumes most similar to the job are sent to the model"
+    )
+    batch_background = st.checkbox(
+        "📥 Run in background",
+        value=False,
+        key="batch_background",
+        help="Queue one job per resume for the workers (without pre-screening); follow them under Background Jobs"
+    )
+
+    if st.button(config.ui['main']['batch_button']) and job_url and (uploaded_files or resume_dir):
+        check_api_key()
+
+        files = []
+        for f in uploaded_files:
+            too_large = upload_too_large(f)
+            if too_large:
+                st.warning(f"⚠️ Skipped {too_large}")
+            else:
+                files.append((f.name, f.getvalue(), f.type))
+        if resume_dir:
+            try:
+                files.extend(BatchAnalyzer.load_directory(resume_dir))
+            except OSError as e:
+                st.error(f"❌ Could not read folder: {str(e)}")
+                st.stop()
+        if not files:
+            st.error("❌ No PDF or DOCX files found")
+            st.stop()
+
+        if batch_background:
+            batch_id = uuid.uuid4().hex[:8]
+            for filename, content, file_type in files:
+                if isinstance(content, Path):
+                    content = content.read_bytes()
+                job_queue.submit(
+                    'analyze',
+                    {'file_type': file_type, 'job_url': job_url, 'model_key': model_key,
+                     'use_cache': not bypass_cache, 'overrides': config.get_overrides()},
+                    content, api_key, owner=session_id, label=filename, batch=batch_id
+                )
+            st.success(f"📥 Queued {len(files)} resumes as batch {batch_id}. Follow them under Background Jobs.")
+        else:
+            with metrics.trace() as trace_id:
+                with st.spinner("🔄 Scraping job description..."):
+                    job_desc_text = job_scraper.scrape_job_description(job_url)
+                if not job_desc_text:
+                    st.error("❌ Failed to scrape job description")
+                    st.stop()
+
+                logger.info("Batch analyzing %d resumes with model: %s", len(files), model_key)
+                progress = st.progress(0.0, text=f"0/{len(files)} resumes processed")
+                table = st.empty()
+                results = []
+                for result in BatchAnalyzer(ai_analyzer).analyze(files, job_desc_text, model_key, api_key,
+                                                                 use_cache=not bypass_cache, prescreen=prescreen):
+                    results.append(result)
+                    progress.progress(len(results) / len(files), text=f"{len(results)}/{len(files)} resumes processed")
+                    table.dataframe(
+                        [
+                            {
+                                "Rank": rank,
+                                "Resume": r.filename,
+                                "Score": r.score,
+                                "Similarity": r.similarity,
+                                "Status": r.error or ("⏭️ Screened out" if r.screened_out else "♻️ Duplicate" if r.duplicate_of else "✅")
+                            }
+                            for rank, r in enumerate(BatchAnalyzer.rank(results), start=1)
+                        ],
+                        hide_index=True,
+                        use_container_width=True
+                    )
+
+                st.header(config.ui['main']['results']['ranking'])
+                for r in BatchAnalyzer.rank(results):
+                    if r.markdown_response:
+                        with st.expander(f"{r.filename} — {r.score}/10"):
+                            render_analysis(r.model_dump())
+            render_performance(trace_id)
+
+with match_tab:
+    job_store = JobStore.get_store()
+    st.header(config.ui['main']['match_section'])
+    new_urls = st.text_area("Job posting URLs to save (one per line)", placeholder="https://example.com/job-posting")
+    if st.button("➕ Save Postings") and new_urls.strip():
+        with st.spinner("🔄 Scraping job postings..."):
+            for url in (line.strip() for line in new_urls.splitlines()):
+                if url and not job_store.add(url):
+                    st.warning(f"⚠️ Could not save {url}")
+
+    saved = job_store.postings()
+    if saved:
+        st.dataframe(
+            [{"Posting": p['title'], "Characters": p['chars']} for p in saved],
+            hide_index=True,
+            use_container_width=True
+        )
+        to_remove = st.multiselect("Remove postings", [p['url'] for p in saved])
+        if to_remove and st.button("🗑️ Remove Selected"):
+            for url in to_remove:
+                job_store.remove(url)
+            st.rerun()
+    else:
+        st.info("No saved job postings yet")
+
+    st.header(config.ui['main']['upload_section'])
+    match_file = st.file_uploader("Choose file", type=["pdf", "docx"], key="match_resume")
+    deep_top_n = st.number_input(
+        "Deep-analyze the top N matches with the model (0 = similarity only)",
+        min_value=0,
+        max_value=max(len(saved), 1),
+        value=min(config.job_store.get('deep_analysis_top_n', 5), len(saved))
+    )
+
+    if st.button(config.ui['main']['match_button']) and match_file and saved:
+        if deep_top_n:
+            check_api_key()
+        too_large = upload_too_large(match_file)
+        if too_large:
+            st.error(f"❌ {too_large}")
+            st.stop()
+
+        with metrics.trace() as trace_id:
+            with st.spinner("🔄 Reading resume..."):
+                try:
+                    resume_text = document_parser.parse_resume(match_file, match_file.type)
+                except DocumentTooLargeError as e:
+                    st.error(f"❌ {match_file.name}: {str(e)}")
+                    st.stop()
+            if not resume_text:
+                st.error("❌ Failed to extract text from the resume. Please ensure the file is not corrupted and contains text content.")
+                st.stop()
+
+            matches = job_store.match(resume_text)
+            analyses = {}
+            if deep_top_n:
+                with st.spinner(f"🤖 Analyzing the top {deep_top_n} matches with {selected_model}..."):
+                    analyses = aio.run(pipeline.analyze_many(
+                        resume_text,
+                        {m['url']: m['text'] for m in matches[:deep_top_n]},
+                        model_key,
+                        api_key,
+                        use_cache=not bypass_cache,
+                        concurrency=config.job_store.get('deep_analysis_concurrency', 4)
+                    ))
+
+            scores = {url: result['score'] for url, result in analyses.items() if isinstance(result, dict)}
+            st.header(config.ui['main']['results']['ranking'])
+            st.dataframe(
+                [
+                    {"Rank": rank, "Posting": m['title'], "Similarity": m['similarity'], "Score": scores.get(m['url'])}
+                    for rank, m in enumerate(matches, start=1)
+                ],
+                hide_index=True,
+                use_container_width=True
             )
-            
-            st.markdown(colored_response, unsafe_allow_html=True)
+            for m in matches:
+                result = analyses.get(m['url'])
+                if isinstance(result, PipelineError):
+                    st.error(f"❌ {m['title']}: {str(result)}")
+                elif result:
+                    with st.expander(f"{m['title']} — {result['score']}/10"):
+                        render_analysis(result)
+        render_performance(trace_id)
+
+JOB_STATUS_LABELS = {
+    QUEUED: "⏳ Queued", RUNNING: "🔄 Running", DONE: "✅ Done", FAILED: "❌ Failed", CANCELLED: "🛑 Cancelled"
+}
+
+def render_jobs():
+    session_jobs = job_queue.jobs(owner=session_id)
+    queue_stats = job_queue.stats()
+    st.caption(f"Queue: {queue_stats[QUEUED]} queued • {queue_stats[RUNNING]} running across all users")
+    if not session_jobs:
+        st.info("No background jobs in this session yet")
+    else:
+        st.dataframe(
+            [
+                {
+                    "Job": job['id'],
+                    "Batch": job['batch'],
+                    "Resume": job['label'],
+                    "Model": job['payload'].get('model_key'),
+                    "Status": JOB_STATUS_LABELS.get(job['status'], job['status']),
+                    "Score": (job['result'] or {}).get('score'),
+                    "Submitted": time.strftime('%H:%M:%S', time.localtime(job['created'])),
+                }
+                for job in session_jobs
+            ],
+            hide_index=True,
+            use_container_width=True
+        )
+        for job in session_jobs:
+            if job['status'] == DONE:
+                with st.expander(f"{job['label']} — {job['result']['score']}/10"):
+                    render_analysis(job['result'])
+                    timings = job['result'].get('timings') or []
+                    if timings:
+                        st.caption(" • ".join(f"{e['stage']} {e.get('wall_ms', 0):,.0f} ms" for e in timings))
+            elif job['status'] == FAILED:
+                st.error(f"❌ {job['label']}: {job['error']}")
+        queued = [job['id'] for job in session_jobs if job['status'] == QUEUED]
+        to_cancel = st.multiselect("Cancel queued jobs", queued)
+        if to_cancel and st.button("🛑 Cancel Selected"):
+            for job_id in to_cancel:
+                job_queue.cancel(job_id)
+            st.rerun()
+    # Polling has caught up with this session's last job: one full rerun stops the timer
+    if not any(job['status'] in (QUEUED, RUNNING) for job in session_jobs) and st.session_state.get('jobs_polling'):
+        st.session_state['jobs_polling'] = False
+        st.rerun()
+
+with jobs_tab:
+    st.header(config.ui['main']['jobs_tab'])
+    # Re-render only this tab while work is pending, without blocking the script thread
+    st.session_state['jobs_polling'] = any(job['status'] in (QUEUED, RUNNING) for job in job_queue.jobs(owner=session_id))
+    refresh = config.job_queue.get('ui_refresh', 2) if st.session_state['jobs_polling'] else None
+    st.fragment(render_jobs, run_every=refresh)()
 
 # Footer
 st.markdown("---")
@@ -1,3 +1,9 @@
-from .schemas import JobDescription, Rating
+from .schemas import (
+    JobDescription, InterviewQuestions, Rating, BatchResult, ModelSettings, ProviderSettings, ScoringSettings,
+    FileTypeSettings, AppSettings
+)
 
-__all__ = ['JobDescription', 'Rating']
+__all__ = [
+    'JobDescription', 'InterviewQuestions', 'Rating', 'BatchResult', 'ModelSettings', 'ProviderSettings',
+    'ScoringSettings', 'FileTypeSettings', 'AppSettings'
+]
@@ -1,9 +1,98 @@
-from pydantic import BaseModel
-from typing import Optional, List
+from pydantic import BaseModel, ConfigDict, Field, model_validator
+from typing import Dict, Literal, Optional, List
 
 class JobDescription(BaseModel):
     url: str
 
+class InterviewQuestions(BaseModel):
+    easy: List[str] = []
+    intermediate: List[str] = []
+    difficult: List[str] = []
+    extremely_difficult: List[str] = []
+
 class Rating(BaseModel):
-    score: float
+    score: float = Field(ge=0, le=10)
     markdown_response: str
+    feedback: List[str] = []
+    questions: InterviewQuestions = InterviewQuestions()
+
+class BatchResult(BaseModel):
+    filename: str
+    score: Optional[float] = None
+    markdown_response: Optional[str] = None
+    error: Optional[str] = None
+    similarity: Optional[float] = None
+    screened_out: bool = False
+    duplicate_of: Optional[str] = None
+
+# Settings validated from config.yaml. Only the sections the app looks up by key are typed; unknown
+# keys are kept, so new settings don't need a schema change to be read.
+
+class ModelSettings(BaseModel):
+    model_config = ConfigDict(extra='allow', protected_namespaces=())
+
+    display_name: str
+    provider: Optional[str] = None
+    model_id: str
+    temperature: float = Field(0.7, ge=0, le=2)
+    max_tokens: Optional[int] = Field(None, gt=0)
+    max_output_tokens: Optional[int] = Field(None, gt=0)
+    system_role: Optional[str] = None
+
+class ProviderSettings(BaseModel):
+    model_config = ConfigDict(extra='allow')
+
+    type: Optional[str] = None
+    api_key_env: str = ''
+    requires_api_key: bool = True
+    base_url: Optional[str] = None
+    max_in_flight: int = Field(4, gt=0)
+    requests_per_minute: float = Field(0, ge=0)
+    tokens_per_minute: float = Field(0, ge=0)
+    cache_hint: Optional[Literal['prompt_cache_key', 'cache_prompt']] = None
+
+class ScoreThresholds(BaseModel):
+    high: float = 7
+    medium: float = 5
+
+class ScoreColors(BaseModel):
+    high: str = 'green'
+    medium: str = 'orange'
+    low: str = 'red'
+
+class ScoringSettings(BaseModel):
+    thresholds: ScoreThresholds = ScoreThresholds()
+    colors: ScoreColors = ScoreColors()
+
+class UploadLimits(BaseModel):
+    max_file_mb: Optional[float] = Field(None, gt=0)
+    max_pages: Optional[int] = Field(None, gt=0)
+    spool_memory_kb: int = Field(1024, ge=0)
+
+class FileTypeSettings(BaseModel):
+    model_config = ConfigDict(extra='allow')
+
+    allowed: List[str] = []
+    mime_types: Dict[str, str] = {}
+    limits: UploadLimits = UploadLimits()
+
+class AppSettings(BaseModel):
+    model_config = ConfigDict(extra='allow')
+
+    models: Dict[str, ModelSettings] = {}
+    providers: Dict[str, ProviderSettings] = {}
+    scoring: ScoringSettings = ScoringSettings()
+    file_types: FileTypeSettings = FileTypeSettings()
+
+    @model_validator(mode='after')
+    def check_references(self) -> 'AppSettings':
+        for key, model in self.models.items():
+            if model.provider and self.providers and model.provider not in self.providers:
+                raise ValueError(f"model {key} uses unknown provider {model.provider}")
+        names = [model.display_name for model in self.models.values()]
+        if len(names) != len(set(names)):
+            raise ValueError("model display names must be unique")
+        missing = [ext for ext in self.file_types.allowed if ext not in self.file_types.mime_types]
+        if missing:
+            raise ValueError(f"no mime type for allowed file types: {', '.join(missing)}")
+        return self
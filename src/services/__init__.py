@@ -1,5 +1,7 @@
 from .document_parser import DocumentParser
 from .job_scraper import JobScraper
 from .ai_analyzer import AIAnalyzer
+from .batch_analyzer import BatchAnalyzer
+from .pipeline import AnalysisPipeline, PipelineError
 
-__all__ = ['DocumentParser', 'JobScraper', 'AIAnalyzer']
+__all__ = ['DocumentParser', 'JobScraper', 'AIAnalyzer', 'BatchAnalyzer', 'AnalysisPipeline', 'PipelineError']
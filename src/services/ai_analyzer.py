@@ -1,52 +1,678 @@
-from openai import OpenAI
-import google.generativeai as genai
-import streamlit as st
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Generator, Iterable, Iterator, List, Tuple
+from models.schemas import InterviewQuestions, Rating
+from utils import aio, reporting
 from utils.config import config
-import httpx
+from utils.metrics import metrics
+from services.response_cache import ResponseCache
+from services.providers import Provider, get_registry
+from services.prompt_compactor import PromptCompactor, estimate_tokens
+from services.prompt_templates import analysis_context, analysis_prompt, prefix_cache_key
+from services.resilience import Resilience
+from services.dedup import DedupIndex
+from services.consensus import aggregate, agreement
+from services.structured_output import (
+    JSON_FORMAT_INSTRUCTIONS, JSON_SCORE_PATTERN, QUESTION_LEVELS, QUESTIONS_PER_LEVEL, STAGES, coerce_analysis,
+    diff_prompt, merge_analysis, reask_prompt, render_markdown, repair_json, repair_json_sequence, stage_fields,
+    stage_prompt
+)
+import asyncio
+import functools
 import http.client
+import inspect
+import json
+import os
+import re
+import time
+
+SCORE_PATTERN = re.compile(r'Score:\s*\**\s*(\d+(?:\.\d+)?)\s*/\s*10')
+RATING_FIELDS = ('score', 'markdown_response', 'feedback', 'questions')
+
+# A model call as _call's arguments, and the steps of an analysis that yield them (see AIAnalyzer._run)
+CallRequest = Tuple[str, str, str, Optional[int], Optional[Dict[str, Any]]]
+Steps = Generator[CallRequest, Tuple[str, Any, str, str], Any]
 
 class AIAnalyzer:
+    _response_cache = None
+
     def __init__(self):
-        """Initialize the analyzer without any API keys."""
-        self.openai_client = None
+        """Initialize the analyzer. Clients come from the shared provider registry."""
+        self.providers = get_registry()
+        self.resilience = Resilience()
         http.client.HTTPConnection.debuglevel = 0
 
-    def _initialize_openai_client(self, api_key: str):
-        """Initialize OpenAI client with API key."""
+    @property
+    def compactor(self) -> PromptCompactor:
+        """Prompt compactor for the current compaction settings."""
+        return PromptCompactor.from_config()
+
+    @property
+    def structured(self) -> bool:
+        """Whether models are asked for validated JSON rather than free-text markdown."""
+        return config.analysis.get('output_format', 'structured') == 'structured'
+
+    @property
+    def staged(self) -> bool:
+        """Whether analyses run as separate score, feedback and questions calls (structured output only)."""
+        return self.structured and config.analysis.get('staged', True)
+
+    @classmethod
+    def get_response_cache(cls) -> Optional[ResponseCache]:
+        """Get the shared LLM response cache, or None if disabled."""
+        if cls._response_cache is None:
+            cls._response_cache = ResponseCache.from_config()
+        return cls._response_cache
+
+    def _cache_lookup(self, model_config: Dict[str, Any], prompt: str, use_cache: bool):
+        """Return (cache key, cached result) for a prompt, skipping lookup when bypassed."""
+        cache = self.get_response_cache()
+        if not cache:
+            metrics.annotate(cache='disabled')
+            return None, None
+        key = ResponseCache.make_key(model_config, prompt)
+        if not use_cache:
+            metrics.annotate(cache='bypass')
+            return key, None
+        cached = cache.get(key)
+        metrics.annotate(cache='hit' if cached else 'miss')
+        return key, cached
+
+    @staticmethod
+    def _usage(response) -> Dict[str, Optional[int]]:
+        """Read prompt/completion token counts from an OpenAI or Gemini response."""
+        usage = getattr(response, 'usage', None)
+        if usage is not None:
+            return {'prompt_tokens': usage.prompt_tokens, 'completion_tokens': usage.completion_tokens}
+        usage = getattr(response, 'usage_metadata', None)
+        if usage is not None:
+            return {
+                'prompt_tokens': getattr(usage, 'prompt_token_count', None),
+                'completion_tokens': getattr(usage, 'candidates_token_count', None),
+            }
+        return {'prompt_tokens': None, 'completion_tokens': None}
+
+    @staticmethod
+    def _cached_tokens(response) -> Optional[int]:
+        """Prompt tokens served from the provider's prefix cache, or None if the response doesn't say.
+
+        Read from OpenAI's prompt_tokens_details (also sent by recent
+        llama.cpp and vLLM servers), older llama.cpp servers' timings, or
+        Gemini's cached_content_token_count.
+        """
+        usage = getattr(response, 'usage', None)
+        if usage is not None:
+            details = getattr(usage, 'prompt_tokens_details', None)
+            cached = details.get('cached_tokens') if isinstance(details, dict) else getattr(details, 'cached_tokens', None)
+            timings = getattr(response, 'timings', None)
+            if cached is None and isinstance(timings, dict):
+                cached = timings.get('cache_n')
+            return cached
+        return getattr(getattr(response, 'usage_metadata', None), 'cached_content_token_count', None)
+
+    @staticmethod
+    def _record_prompt_cache(response, prompt_tokens: int):
+        """Add a call's prefix cache hits to the current event, if its provider reports them."""
+        cached = AIAnalyzer._cached_tokens(response)
+        if cached is not None:
+            metrics.add(cached_tokens=cached, cache_reported_tokens=prompt_tokens)
+
+    @staticmethod
+    def _prompt_cache() -> Dict[str, Any]:
+        """{'prompt_cache': ...} with the share of this analysis' prompt tokens served from provider caches.
+
+        Only calls whose provider reported cache use count, so streamed
+        stages (which carry no usage) don't dilute the ratio.
+        """
+        event = metrics.current() or {}
+        cached, reported = event.get('cached_tokens'), event.get('cache_reported_tokens')
+        if cached is None or not reported:
+            return {}
+        return {'prompt_cache': {
+            'prompt_tokens': reported, 'cached_tokens': cached, 'ratio': round(cached / reported, 3)
+        }}
+
+    def _cache_store(self, key: Optional[str], result: Dict[str, Any], tokens: int, elapsed: float):
+        # A failover answer came from another model, so it doesn't belong under this model's cache key
+        cache = self.get_response_cache()
+        if cache and key and not result.get('failover'):
+            cache.set(key, result, tokens, elapsed)
+
+    @staticmethod
+    def _extract_score(response_text: str) -> float:
+        """Pull the numeric score out of the '## Score: X/10' line."""
+        score_line = [line for line in response_text.split('\n') if 'Score:' in line][0]
+        return float(score_line.split('/')[0].split(':')[1].strip())
+
+    @staticmethod
+    def find_score(partial_text: str) -> Optional[float]:
+        """Return the score once a complete 'Score: X/10' (or JSON "score") has arrived, else None."""
+        match = SCORE_PATTERN.search(partial_text) or JSON_SCORE_PATTERN.search(partial_text)
+        return float(match.group(1)) if match else None
+
+    def preview(self, partial_text: str) -> Tuple[Optional[float], str]:
+        """Return (score if complete, markdown) for a partially streamed response."""
+        if not self.structured:
+            return self.find_score(partial_text), partial_text
+        fields, _ = coerce_analysis(repair_json_sequence(partial_text), config.settings.scoring.thresholds.high)
+        return self.find_score(partial_text), render_markdown(fields)
+
+    @staticmethod
+    def _rating(fields: Dict[str, Any]) -> Dict[str, Any]:
+        """Validate recovered fields into a Rating, rendering the markdown view from them."""
+        if 'score' not in fields:
+            raise ValueError("response did not include a score")
+        return Rating(
+            score=fields['score'],
+            markdown_response=render_markdown(fields),
+            feedback=fields.get('feedback', []),
+            questions=InterviewQuestions(**fields.get('questions', {}))
+        ).model_dump()
+
+    def _reask_needed(self, response_text: str) -> Tuple[Dict[str, Any], List[str]]:
+        """Recover what we can from a JSON reply; return (fields, names of missing fields worth re-asking)."""
+        fields, missing = coerce_analysis(repair_json(response_text), config.settings.scoring.thresholds.high)
+        if missing:
+            metrics.annotate(missing_fields=','.join(missing))
+        if not config.analysis.get('repair_reask', True):
+            return fields, []
+        return fields, missing
+
+    def _run(self, steps: Steps) -> Any:
+        """Run analysis steps with blocking model calls and return their result.
+
+        Steps are generators that yield each model call they need and are
+        sent _call's reply, or have its error raised at the yield. _run and
+        _run_async drive the same steps, so the sync and async analyses share
+        one body and differ only in how the calls are made.
+        """
+        reply, error = None, None
+        while True:
+            try:
+                request = steps.throw(error) if error else steps.send(reply)
+            except StopIteration as stop:
+                return stop.value
+            try:
+                reply, error = self._call(*request), None
+            except Exception as e:
+                reply, error = None, e
+
+    async def _run_async(self, steps: Steps) -> Any:
+        """Async counterpart of _run."""
+        reply, error = None, None
+        while True:
+            try:
+                request = steps.throw(error) if error else steps.send(reply)
+            except StopIteration as stop:
+                return stop.value
+            try:
+                reply, error = await self._call_async(*request), None
+            except Exception as e:
+                reply, error = None, e
+
+    @staticmethod
+    def _reask_request(prompt: str, fields: Dict[str, Any], missing: List[str], model_key: str,
+                       api_key: str) -> CallRequest:
+        return reask_prompt(prompt, fields, missing), model_key, api_key, config.analysis.get('reask_max_tokens', 1024), None
+
+    def _finish_steps(self, response_text: str, prompt: str, model_key: str, api_key: str) -> Steps:
+        """Turn a completion into a result, re-asking only for the fields it is missing.
+
+        Raises if no score can be recovered, matching the markdown parser.
+        """
+        if not self.structured:
+            return {"score": self._extract_score(response_text), "markdown_response": response_text}
+        fields, missing = self._reask_needed(response_text)
+        if missing:
+            try:
+                extra, *_ = yield self._reask_request(prompt, fields, missing, model_key, api_key)
+                fields = merge_analysis(fields, repair_json(extra) or {})
+                metrics.annotate(reasked=True)
+            except Exception as e:
+                reporting.warning(f"Follow-up request for missing fields failed: {str(e)}")
+        return self._rating(fields)
+
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def _gemini_supports_json_mode() -> bool:
+        """Older google-generativeai releases have no response_mime_type; the prompt alone asks for JSON there."""
+        from google.generativeai.types import GenerationConfig
+
+        return 'response_mime_type' in inspect.signature(GenerationConfig).parameters
+
+    def _build_gemini_model(self, model_config: Dict[str, Any], provider: Provider, api_key: str,
+                            max_output_tokens: Optional[int] = None, asynchronous: bool = False):
+        """Build a Gemini model from config, bound to the provider's pooled client for the API key."""
+        # Imported lazily: the SDK pulls in grpc and protobuf, which dominates cold start
+        import google.generativeai as genai
+
+        # Extract valid generation config parameters
+        generation_config = {
+            'temperature': model_config['temperature'],
+            'top_p': model_config.get('top_p', 1),
+            'top_k': model_config.get('top_k', 1),
+            'max_output_tokens': max_output_tokens or model_config.get('max_output_tokens', 2048),
+        }
+        if self.structured and self._gemini_supports_json_mode():
+            generation_config['response_mime_type'] = 'application/json'
+
+        model = genai.GenerativeModel(
+            model_name=model_config['model_id'],
+            generation_config=generation_config,
+            safety_settings=model_config.get('safety_settings', [])
+        )
+        # The SDK otherwise falls back to the process-wide client from genai.configure()
+        if asynchronous:
+            model._async_client = provider.gemini_async_client(api_key)
+        else:
+            model._client = provider.gemini_client(api_key)
+        return model
+
+    def _get_openai_client(self, provider: Provider, api_key: str):
+        """Get the pooled OpenAI-style client for a provider and key."""
         try:
-            # Create transport with proxy settings if they exist
-            proxy_settings = config.get_proxy_settings() if hasattr(config, 'get_proxy_settings') else None
-            client_params = {'timeout': 60.0}
-            
-            if proxy_settings:
-                transport = httpx.HTTPTransport(proxy=proxy_settings)
-                client_params['transport'] = transport
-            
-            http_client = httpx.Client(**client_params)
-            self.openai_client = OpenAI(api_key=api_key, http_client=http_client)
-            return True
-            
+            return provider.client(api_key)
         except Exception as e:
-            st.error(f"Error initializing OpenAI client: {str(e)}")
-            return False
+            reporting.error(f"Error initializing {provider.name} client: {str(e)}")
+            return None
 
+    @staticmethod
+    def _gpt_messages(model_config: Dict[str, Any], prompt: str):
+        return [
+            {"role": "system", "content": model_config['system_role']},
+            {"role": "user", "content": prompt}
+        ]
 
-    def _get_analysis_prompt(self, resume_text: str, job_description: str) -> str:
-        """Generate the analysis prompt for AI models."""
-        return f"""
-        Analyze the following resume and job description to:
-        1. Rate the candidate's fit for the role on a scale of 0-10
-        2. Provide detailed feedback
-        3. If the rating is 7 or higher, generate 20 interview questions (5 easy, 5 intermediate, 5 difficult, 5 extremely difficult)
+    def _gpt_request(self, model_config: Dict[str, Any], provider: Provider, prompt: str,
+                     max_tokens: Optional[int] = None) -> Dict[str, Any]:
+        """Chat completion arguments, requesting JSON mode from providers that support it."""
+        request = {
+            'model': model_config['model_id'],
+            'messages': self._gpt_messages(model_config, prompt),
+            'temperature': model_config['temperature'],
+            'max_tokens': max_tokens or model_config['max_tokens'],
+        }
+        if self.structured and provider.config.get('json_mode', False):
+            request['response_format'] = {'type': 'json_object'}
+        # Passed as extra_body so SDK releases that predate the parameter still send it
+        cache_hint = provider.config.get('cache_hint')
+        if cache_hint == 'prompt_cache_key':
+            request['extra_body'] = {'prompt_cache_key': prefix_cache_key(prompt)}
+        elif cache_hint == 'cache_prompt':
+            request['extra_body'] = {'cache_prompt': True}
+        return request
+
+    def _complete(self, prompt: str, model_config: Dict[str, Any], provider: Provider, api_key: str,
+                  max_tokens: Optional[int] = None) -> Tuple[str, Any]:
+        """Run one non-streaming completion and return (text, raw response)."""
+        if provider.is_openai_style:
+            client = provider.client(api_key)
+            with provider.slot():
+                response = client.chat.completions.create(**self._gpt_request(model_config, provider, prompt, max_tokens))
+            return response.choices[0].message.content or '', response
+        model = self._build_gemini_model(model_config, provider, api_key, max_tokens)
+        with provider.slot():
+            response = model.generate_content(prompt)
+        return (response.text if hasattr(response, 'text') else response.parts[0].text), response
+
+    def _token_estimate(self, prompt: str, model_key: str, max_tokens: Optional[int] = None) -> int:
+        """Tokens a request counts against a tokens-per-minute limit: the prompt plus its completion allowance."""
+        model_config = config.get_model_config(model_key) or {}
+        allowance = max_tokens or model_config.get('max_tokens') or model_config.get('max_output_tokens', 2048)
+        return estimate_tokens(prompt) + allowance
+
+    def _call(self, prompt: str, model_key: str, api_key: str, max_tokens: Optional[int] = None,
+              params: Optional[Dict[str, Any]] = None) -> Tuple[str, Any, str, str]:
+        """Run a completion with rate limiting, retries and failover.
+
+        params (e.g. temperature) override the model config of whichever
+        model answers. Returns (text, raw response, model that answered,
+        its API key).
+        """
+        def attempt(model, key):
+            model_config = {**config.get_model_config(model), **(params or {})}
+            return self._complete(prompt, model_config, self.providers.for_model(model), key, max_tokens)
+
+        (text, response), used_model, used_key = self.resilience.call(
+            model_key, api_key, attempt, self._token_estimate(prompt, model_key, max_tokens)
+        )
+        return text, response, used_model, used_key
+
+    async def _call_async(self, prompt: str, model_key: str, api_key: str, max_tokens: Optional[int] = None,
+                          params: Optional[Dict[str, Any]] = None) -> Tuple[str, Any, str, str]:
+        """Async counterpart of _call."""
+        async def attempt(model, key):
+            model_config = {**config.get_model_config(model), **(params or {})}
+            return await self._complete_async(
+                prompt, model_config, self.providers.for_model(model), key, max_tokens
+            )
+
+        (text, response), used_model, used_key = await self.resilience.call_async(
+            model_key, api_key, attempt, self._token_estimate(prompt, model_key, max_tokens)
+        )
+        return text, response, used_model, used_key
+
+    async def _complete_async(self, prompt: str, model_config: Dict[str, Any], provider: Provider, api_key: str,
+                              max_tokens: Optional[int] = None) -> Tuple[str, Any]:
+        """Async counterpart of _complete."""
+        if provider.is_openai_style:
+            client = provider.async_client(api_key)
+            async with provider.async_slot():
+                response = await client.chat.completions.create(
+                    **self._gpt_request(model_config, provider, prompt, max_tokens)
+                )
+            return response.choices[0].message.content or '', response
+        model = self._build_gemini_model(model_config, provider, api_key, max_tokens, asynchronous=True)
+        async with provider.async_slot():
+            response = await model.generate_content_async(prompt)
+        return (response.text if hasattr(response, 'text') else response.parts[0].text), response
+
+    def _compact(self, resume_text: str, job_description: str) -> Tuple[str, str, Dict[str, Any]]:
+        """Compact the inputs, recording the token savings on the current metrics event."""
+        resume_text, job_description, compaction = self.compactor.compact(resume_text, job_description)
+        metrics.annotate(tokens_saved=compaction['tokens_saved'])
+        return resume_text, job_description, compaction
+
+    def _build_prompt(self, resume_text: str, job_description: str) -> Tuple[str, Dict[str, Any]]:
+        """Compact the inputs and build the prompt, returning it with token savings."""
+        resume_text, job_description, compaction = self._compact(resume_text, job_description)
+        return self._get_analysis_prompt(resume_text, job_description), compaction
+
+    @staticmethod
+    def _analysis_context(resume_text: str, job_description: str) -> str:
+        """The instructions, job description and resume shared by every stage prompt."""
+        return analysis_context(resume_text, job_description)
+
+    def _stage_request(self, stage: str, context: str, model_key: str,
+                       score: Optional[float] = None) -> Tuple[str, Dict[str, Any], Optional[int], str]:
+        """Return (prompt, model params, max tokens, cache key) for one stage.
+
+        Stage settings from analysis.stages override the model config, so a
+        pinned score temperature keeps the score cached across temperature changes.
+        """
+        params = dict(config.analysis.get('stages', {}).get(stage) or {})
+        max_tokens = params.pop('max_tokens', None)
+        prompt = stage_prompt(context, stage, score)
+        key_config = {**config.get_model_config(model_key), **params, 'stage': stage, 'stage_max_tokens': max_tokens}
+        return prompt, params, max_tokens, ResponseCache.make_key(key_config, prompt)
+
+    def _stage_cached(self, key: str, use_cache: bool) -> Optional[Dict[str, Any]]:
+        cache = self.get_response_cache()
+        if not (cache and use_cache):
+            return None
+        cached = cache.get(key)
+        if cached:
+            cached.pop('cache', None)
+        return cached
+
+    def _stage_store(self, key: str, fields: Dict[str, Any], tokens: int, elapsed: float):
+        cache = self.get_response_cache()
+        if cache:
+            cache.set(key, fields, tokens, elapsed)
+
+    @staticmethod
+    def _record_usage(response, prompt: str, text: str) -> int:
+        """Add a call's token usage to the current event and return its total, estimated if not reported."""
+        usage = AIAnalyzer._usage(response) if response is not None else {}
+        prompt_tokens = usage.get('prompt_tokens') or len(prompt) // 4
+        completion_tokens = usage.get('completion_tokens') or len(text) // 4
+        metrics.add(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+        if response is not None:
+            AIAnalyzer._record_prompt_cache(response, prompt_tokens)
+        return prompt_tokens + completion_tokens
+
+    def _stage_parse(self, stage: str, text: str, score: Optional[float]) -> Tuple[Dict[str, Any], List[str]]:
+        fields, missing = stage_fields(stage, repair_json(text), score, config.settings.scoring.thresholds.high)
+        if missing:
+            metrics.annotate(missing_fields=','.join(missing))
+        return fields, missing
+
+    def _stage_merge(self, stage: str, fields: Dict[str, Any], extra: str, score: Optional[float]) -> Tuple[Dict[str, Any], List[str]]:
+        """Merge a re-ask reply into a stage's fields; returns them and what is still missing."""
+        merged = merge_analysis(fields, self._stage_parse(stage, extra, score)[0])
+        metrics.annotate(reasked=True)
+        return stage_fields(stage, {key: value for key, value in merged.items() if key == stage} or None,
+                            score, config.settings.scoring.thresholds.high)
+
+    def _stage_result_steps(self, stage: str, text: str, prompt: str, score: Optional[float],
+                            model_key: str, api_key: str) -> Steps:
+        """Parse a stage reply, re-asking once for whatever it is missing. Returns (fields, complete)."""
+        fields, missing = self._stage_parse(stage, text, score)
+        if missing and config.analysis.get('repair_reask', True):
+            try:
+                extra, *_ = yield self._reask_request(prompt, fields, missing, model_key, api_key)
+                fields, missing = self._stage_merge(stage, fields, extra, score)
+            except Exception as e:
+                reporting.warning(f"Follow-up request for missing fields failed: {str(e)}")
+        return fields, not missing
+
+    def _stage_steps(self, stage: str, context: str, model_key: str, api_key: str, score: Optional[float] = None,
+                     use_cache: bool = True) -> Steps:
+        """Run one stage, or reuse its cached result. Returns (fields, model that answered, whether cached)."""
+        prompt, params, max_tokens, key = self._stage_request(stage, context, model_key, score)
+        cached = self._stage_cached(key, use_cache)
+        if cached is not None:
+            return cached, model_key, True
+        start = time.perf_counter()
+        text, response, used_model, used_key = yield prompt, model_key, api_key, max_tokens, params
+        tokens = self._record_usage(response, prompt, text)
+        fields, complete = yield from self._stage_result_steps(stage, text, prompt, score, used_model, used_key)
+        # Incomplete or failover answers aren't cached, so the next run asks again
+        if complete and used_model == model_key:
+            self._stage_store(key, fields, tokens, time.perf_counter() - start)
+        return fields, used_model, False
+
+    @staticmethod
+    def _later_stages(score: float) -> List[str]:
+        """Stages to run after the score; questions only for candidates at or above the high threshold."""
+        return ['feedback'] + (['questions'] if score >= config.settings.scoring.thresholds.high else [])
+
+    def _staged_result(self, runs: Dict[str, Tuple[Dict[str, Any], str, bool]], model_key: str,
+                       use_cache: bool) -> Dict[str, Any]:
+        """Combine stage runs into a result, noting which stages were reused and any failover."""
+        fields = {}
+        for stage_result, _, _ in runs.values():
+            fields.update(stage_result)
+        result = self._rating(fields)
+        result['stages'] = {
+            stage: ('cached' if runs[stage][2] else 'fresh') if stage in runs else 'skipped' for stage in STAGES
+        }
+        failover = next((used for _, used, _ in runs.values() if used != model_key), None)
+        if failover:
+            result['failover'] = failover
+        result.update(self._prompt_cache())
+        cached = sum(1 for *_, hit in runs.values() if hit)
+        if not self.get_response_cache():
+            cache = 'disabled'
+        elif not use_cache:
+            cache = 'bypass'
+        else:
+            cache = 'hit' if cached == len(runs) else 'partial' if cached else 'miss'
+        metrics.annotate(cache=cache, stages=','.join(runs))
+        return result
+
+    def _analyze_staged(self, context: str, model_key: str, api_key: str, use_cache: bool = True,
+                        refresh: Iterable[str] = ()) -> Dict[str, Any]:
+        """Score first, then feedback, then questions only for high scores. Raises if no score comes back."""
+        refresh = set(refresh)
+        runs = {'score': self._run(
+            self._stage_steps('score', context, model_key, api_key, None, use_cache and 'score' not in refresh)
+        )}
+        score = runs['score'][0].get('score')
+        if score is None:
+            raise ValueError("response did not include a score")
+        for stage in self._later_stages(score):
+            runs[stage] = self._run(
+                self._stage_steps(stage, context, model_key, api_key, score, use_cache and stage not in refresh)
+            )
+        return self._staged_result(runs, model_key, use_cache)
+
+    async def _analyze_staged_async(self, context: str, model_key: str, api_key: str, use_cache: bool = True,
+                                    refresh: Iterable[str] = ()) -> Dict[str, Any]:
+        """Async counterpart of _analyze_staged; feedback and questions run concurrently once the score is in."""
+        refresh = set(refresh)
+        runs = {'score': await self._run_async(
+            self._stage_steps('score', context, model_key, api_key, None, use_cache and 'score' not in refresh)
+        )}
+        score = runs['score'][0].get('score')
+        if score is None:
+            raise ValueError("response did not include a score")
+        stages = self._later_stages(score)
+        results = await asyncio.gather(*(
+            self._run_async(
+                self._stage_steps(stage, context, model_key, api_key, score, use_cache and stage not in refresh)
+            )
+            for stage in stages
+        ))
+        runs.update(zip(stages, results))
+        return self._staged_result(runs, model_key, use_cache)
 
-        Resume:
-        {resume_text}
+    @metrics.timed('analyze')
+    def analyze_staged(self, resume_text: str, job_description: str, model_key: str, api_key: str,
+                       use_cache: bool = True, refresh: Iterable[str] = ()) -> Optional[Dict[str, Any]]:
+        """Analyze as separate score, feedback and questions calls, each cached on its own.
 
-        Job Description:
-        {job_description}
+        refresh names stages to re-run even if cached. Returns None on
+        failure, like analyze_resume.
+        """
+        try:
+            metrics.annotate(model=model_key, retries=0, staged=True)
+            resume_text, job_description, compaction = self._compact(resume_text, job_description)
+            result = self._analyze_staged(
+                self._analysis_context(resume_text, job_description), model_key, api_key, use_cache, refresh
+            )
+            return {**result, 'compaction': compaction}
+        except Exception as e:
+            reporting.error(f"Error analyzing with {config.get_provider(model_key)}: {str(e)}")
+            return None
+
+    @staticmethod
+    def _provider_key(model_key: str, api_keys: Dict[str, str]) -> str:
+        """The key given for the model's provider, or else the one in its api_key_env variable."""
+        provider_name = config.get_provider(model_key)
+        key_env = config.get_provider_config(provider_name).get('api_key_env', '')
+        return api_keys.get(provider_name) or os.environ.get(key_env, '')
+
+    async def _vote(self, context: str, model_key: str, api_key: str, use_cache: bool) -> Tuple[float, str, bool]:
+        """One model's score stage. Returns (score, model that answered, whether cached)."""
+        fields, used_model, cached = await self._run_async(
+            self._stage_steps('score', context, model_key, api_key, None, use_cache)
+        )
+        if fields.get('score') is None:
+            raise ValueError("response did not include a score")
+        return fields['score'], used_model, cached
+
+    async def _collect_votes(self, context: str, models: List[str], api_keys: Dict[str, str], use_cache: bool,
+                             quorum: int, tolerance: float,
+                             timeout: Optional[float]) -> Tuple[Dict[str, float], Optional[List[str]], Dict[str, str]]:
+        """Run the score stage on every model at once until a quorum agrees, then cancel the rest.
+
+        Returns (score per answering model, the agreeing models or None,
+        status per requested model).
+        """
+        tasks = {
+            asyncio.create_task(self._vote(context, model, self._provider_key(model, api_keys), use_cache)): model
+            for model in models
+        }
+        scores, status, agreed = {}, {}, None
+        pending = set(tasks)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout if timeout else None
+        try:
+            while pending and agreed is None:
+                remaining = None if deadline is None else max(0.0, deadline - loop.time())
+                done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    break
+                for task in done:
+                    model = tasks[task]
+                    try:
+                        score, used_model, cached = task.result()
+                    except Exception as e:
+                        reporting.warning(f"{model} did not score the resume: {str(e)}")
+                        status[model] = 'failed'
+                        continue
+                    # A model that failed over to one already in the panel doesn't get a second vote
+                    if used_model in scores:
+                        status[model] = f"duplicate of {used_model}"
+                        continue
+                    scores[used_model] = score
+                    status[model] = 'cached' if cached else 'scored' if used_model == model else f"answered by {used_model}"
+                agreed = agreement(scores, quorum, tolerance)
+        finally:
+            for task in pending:
+                task.cancel()
+                status[tasks[task]] = 'cancelled' if agreed else 'timed out'
+            await asyncio.gather(*pending, return_exceptions=True)
+        return scores, agreed, status
 
-        Provide the response in Markdown format as follows:
+    @metrics.timed('analyze')
+    async def analyze_consensus_async(self, resume_text: str, job_description: str, model_key: str, api_key: str,
+                                      models: Optional[List[str]] = None, api_keys: Optional[Dict[str, str]] = None,
+                                      use_cache: bool = True) -> Dict[str, Any]:
+        """Score with several models at once and combine their scores (see consensus.aggregate).
+
+        The score stage goes to every model in `models` (default
+        consensus.models) concurrently. Once `quorum` of the scores in so far
+        lie within `tolerance` of each other, the calls still running are
+        cancelled. model_key then writes the feedback and questions for the
+        consensus score. api_keys maps provider names to keys; providers
+        without one use their api_key_env variable. Raises on failure.
+        """
+        consensus_config = config.consensus
+        models = [model for model in (models or consensus_config.get('models', [])) if config.get_model_config(model)]
+        if not models:
+            raise ValueError("no configured models to score with")
+        quorum = min(consensus_config.get('quorum', 2), len(models))
+        api_keys = {**(api_keys or {}), config.get_provider(model_key): api_key}
+        metrics.annotate(model=model_key, retries=0, staged=True, consensus=','.join(models))
+
+        resume_text, job_description, compaction = self._compact(resume_text, job_description)
+        context = self._analysis_context(resume_text, job_description)
+        scores, agreed, status = await self._collect_votes(
+            context, models, api_keys, use_cache, quorum,
+            consensus_config.get('tolerance', 1.0), consensus_config.get('timeout')
+        )
+        if not scores:
+            raise ValueError("no model returned a score")
+        consensus = {**aggregate(scores, agreed), 'models': status}
+        metrics.annotate(
+            agreed=bool(agreed), score_variance=consensus['variance'],
+            cancelled=sum(1 for state in status.values() if state in ('cancelled', 'timed out'))
+        )
+
+        score = consensus['score']
+        all_cached = all(state == 'cached' for model, state in status.items() if model in scores)
+        runs = {'score': ({'score': score}, model_key, all_cached)}
+        stages = self._later_stages(score)
+        results = await asyncio.gather(*(
+            self._run_async(self._stage_steps(stage, context, model_key, api_key, score, use_cache))
+            for stage in stages
+        ))
+        runs.update(zip(stages, results))
+        return {**self._staged_result(runs, model_key, use_cache), 'consensus': consensus, 'compaction': compaction}
+
+    def analyze_consensus(self, resume_text: str, job_description: str, model_key: str, api_key: str,
+                          models: Optional[List[str]] = None, api_keys: Optional[Dict[str, str]] = None,
+                          use_cache: bool = True) -> Optional[Dict[str, Any]]:
+        """Blocking wrapper around analyze_consensus_async. Returns None on failure, like analyze_resume."""
+        try:
+            return aio.run(self.analyze_consensus_async(
+                resume_text, job_description, model_key, api_key, models, api_keys, use_cache
+            ))
+        except Exception as e:
+            reporting.error(f"Error scoring by consensus: {str(e)}")
+            return None
+
+    def _get_analysis_prompt(self, resume_text: str, job_description: str) -> str:
+        """Generate the analysis prompt for AI models."""
+        return analysis_prompt(
+            resume_text, job_description,
+            JSON_FORMAT_INSTRUCTIONS if self.structured else self._markdown_format_instructions(),
+            config.settings.scoring.thresholds.high
+        )
+
+    @staticmethod
+    def _markdown_format_instructions() -> str:
+        return """Provide the response in Markdown format as follows:
 
         # Resume Analysis
 
@@ -56,7 +682,7 @@ class AIAnalyzer:
         [Your detailed feedback here with proper markdown formatting, using bullet points where appropriate]
 
         ## Interview Questions
-        (Only if score is 7 or higher)
+        (Only if score is {high} or higher)
 
         ### Easy Questions
         1. [Question 1]
@@ -86,103 +712,390 @@ class AIAnalyzer:
         4. [Question 4]
         5. [Question 5]
 
-        Use proper markdown formatting with headers, bullet points, and numbered lists.
-        """
+        Use proper markdown formatting with headers, bullet points, and numbered lists."""
 
-    def analyze_with_gemini(self, resume_text: str, job_description: str, model_key: str, api_key: str) -> Optional[Dict[str, Any]]:
-        """Analyze resume using Gemini models."""
-        try:
-            genai.configure(api_key=api_key)  # Use the provided API key
-                
-            # Get model configuration
-            model_config = config.get_model_config(model_key)
-            if not model_config:
-                st.error(f"Configuration not found for model: {model_key}")
-                return None
-            
-            # Extract valid generation config parameters
-            generation_config = {
-                'temperature': model_config['temperature'],
-                'top_p': model_config.get('top_p', 1),
-                'top_k': model_config.get('top_k', 1),
-                'max_output_tokens': model_config.get('max_output_tokens', 2048),
-            }
-            
-            model = genai.GenerativeModel(
-                model_name=model_config['model_id'],
-                generation_config=generation_config,
-                safety_settings=model_config.get('safety_settings', [])
-            )
+    def _single_steps(self, resume_text: str, job_description: str, model_key: str, api_key: str,
+                      use_cache: bool) -> Steps:
+        """Analyze in one call, or reuse the cached result. Raises if no score comes back."""
+        prompt, compaction = self._build_prompt(resume_text, job_description)
+        cache_key, cached = self._cache_lookup(config.get_model_config(model_key), prompt, use_cache)
+        if cached:
+            return {**cached, 'compaction': compaction}
 
-            prompt = self._get_analysis_prompt(resume_text, job_description)
-            response = model.generate_content(prompt)
-            
-            response_text = response.text if hasattr(response, 'text') else response.parts[0].text
-            
-            # Extract score for color coding
-            try:
-                score_line = [line for line in response_text.split('\n') if 'Score:' in line][0]
-                score = float(score_line.split('/')[0].split(':')[1].strip())
-                return {"score": score, "markdown_response": response_text}
-            except Exception as e:
-                st.error(f"Error extracting score: {str(e)}")
-                return None
+        start = time.perf_counter()
+        response_text, response, used_model, used_key = yield prompt, model_key, api_key, None, None
+        elapsed = time.perf_counter() - start
+        usage = self._usage(response)
+        metrics.annotate(**usage)
+        self._record_prompt_cache(response, usage['prompt_tokens'] or len(prompt) // 4)
+        tokens = sum(filter(None, usage.values())) or (len(prompt) + len(response_text)) // 4
+
+        result = yield from self._finish_steps(response_text, prompt, used_model, used_key)
+        if used_model != model_key:
+            result['failover'] = used_model
+        self._cache_store(cache_key, result, tokens, elapsed)
+        return {**result, 'compaction': compaction, **self._prompt_cache()}
 
+    @metrics.timed('analyze')
+    def analyze_single(self, resume_text: str, job_description: str, model_key: str, api_key: str,
+                       use_cache: bool = True) -> Optional[Dict[str, Any]]:
+        """Analyze in one call to any provider (Gemini, GPT or OpenAI-compatible). Returns None on failure."""
+        try:
+            metrics.annotate(model=model_key, retries=0)
+            return self._run(self._single_steps(resume_text, job_description, model_key, api_key, use_cache))
         except Exception as e:
-            st.error(f"Error analyzing with Gemini: {str(e)}")
+            reporting.error(f"Error analyzing with {config.get_provider(model_key)}: {str(e)}")
             return None
 
-    def analyze_with_gpt(self, resume_text: str, job_description: str, model_key: str, api_key: str) -> Optional[Dict[str, Any]]:
-        """Analyze resume using GPT models."""
-        try:
-            if not self.openai_client or self.openai_client.api_key != api_key:
-                if not self._initialize_openai_client(api_key):
-                    return None
-            
-            if not self.openai_client:
-                st.error("Failed to initialize OpenAI client")
-                return None
-
-            # Get model configuration
-            model_config = config.get_model_config(model_key)
-            if not model_config:
-                st.error(f"Configuration not found for model: {model_key}")
-                return None
-
-            prompt = self._get_analysis_prompt(resume_text, job_description)
-            response = self.openai_client.chat.completions.create(
-                model=model_config['model_id'],
-                messages=[
-                    {"role": "system", "content": model_config['system_role']},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=model_config['temperature'],
-                max_tokens=model_config['max_tokens']
-            )
+    def _dedup_key(self, resume_key: str, job_description: str, model_key: str) -> str:
+        """Cache key of a resume's rating for a job, by the resume's dedup key rather than its exact text."""
+        model_config = {**config.get_model_config(model_key), 'resume': resume_key,
+                        'output_format': config.analysis.get('output_format', 'structured')}
+        return ResponseCache.make_key(model_config, job_description)
 
-            response_text = response.choices[0].message.content
-            
-            # Extract score for color coding
-            try:
-                score_line = [line for line in response_text.split('\n') if 'Score:' in line][0]
-                score = float(score_line.split('/')[0].split(':')[1].strip())
-                return {"score": score, "markdown_response": response_text}
-            except Exception as e:
-                st.error(f"Error extracting score: {str(e)}")
-                return None
+    @metrics.timed('dedup')
+    def _find_duplicate(self, resume_text: str, job_description: str, model_key: str, use_cache: bool) -> Dict[str, Any]:
+        """Index the resume and look for an earlier rating of it, or of a near duplicate, for this job.
+
+        Returns {'key': this resume's dedup key, 'result': a rating to reuse
+        as is, 'diff': (earlier rating, changed lines) for a diff-only
+        re-analysis}; each may be None.
+        """
+        plan = {'key': None, 'result': None, 'diff': None}
+        index, cache = DedupIndex.get_index(), self.get_response_cache()
+        if index is None or cache is None:
+            metrics.annotate(dedup='disabled')
+            return plan
+        plan['key'], match = index.add(resume_text)
+        if not (use_cache and match):
+            metrics.annotate(dedup='bypass' if match else 'new')
+            return plan
+        previous = cache.get(self._dedup_key(match.key, job_description, model_key))
+        if not previous:
+            metrics.annotate(dedup='unscored')
+            return plan
+        rating = {key: previous[key] for key in RATING_FIELDS if key in previous}
+        if match.key == plan['key']:
+            # The same resume again: its own earlier rating is a plain cache hit, not a duplicate's
+            metrics.annotate(dedup='rerun')
+            plan['result'] = {**rating, 'cache': previous['cache']}
+            return plan
+        metrics.annotate(similarity=round(match.similarity, 3))
+        previous = {**rating, 'duplicate_of': match.key[:12], 'similarity': round(match.similarity, 3)}
+        dedup_config = config.dedup
+        if match.similarity >= dedup_config.get('reuse_threshold', 0.95):
+            metrics.annotate(dedup='reused')
+            plan['result'] = previous
+            return plan
+        if self.structured and dedup_config.get('diff_reanalysis', True):
+            old_text = index.text(match.key)
+            changes = index.diff(old_text, resume_text) if old_text else []
+            if changes and len(changes) <= dedup_config.get('max_diff_lines', 60):
+                metrics.annotate(dedup='diff')
+                plan['diff'] = (previous, changes)
+                return plan
+        metrics.annotate(dedup='changed')
+        return plan
+
+    def _remember(self, resume_key: Optional[str], job_description: str, model_key: str,
+                  result: Optional[Dict[str, Any]]):
+        """Keep a rating under the resume's dedup key so later near duplicates can reuse it."""
+        cache = self.get_response_cache()
+        if cache and resume_key and result and not result.get('failover'):
+            rating = {key: result[key] for key in RATING_FIELDS if key in result}
+            cache.set(self._dedup_key(resume_key, job_description, model_key), rating, 0, 0.0)
+
+    def _diff_result(self, text: str, previous: Dict[str, Any], model_key: str, used_model: str) -> Optional[Dict[str, Any]]:
+        """Combine a diff re-analysis reply with the earlier rating; None if it can't stand in for a full analysis."""
+        high = config.settings.scoring.thresholds.high
+        fields, _ = coerce_analysis(repair_json(text), high)
+        if 'score' not in fields or 'feedback' not in fields:
+            return None
+        questions = previous.get('questions') or {}
+        if fields['score'] < high:
+            questions = {}
+        elif any(len(questions.get(level, [])) < QUESTIONS_PER_LEVEL for level in QUESTION_LEVELS):
+            # Newly above the bar: the questions have never been written, so run the full analysis
+            return None
+        result = {
+            **self._rating({**fields, 'questions': questions}), 'reanalysis': 'diff',
+            'duplicate_of': previous['duplicate_of'], 'similarity': previous['similarity'],
+        }
+        if used_model != model_key:
+            result['failover'] = used_model
+        return result
 
+    def _diff_steps(self, job_description: str, model_key: str, api_key: str, previous: Dict[str, Any],
+                    changes: List[str]) -> Steps:
+        """Re-rate a near-duplicate resume from its changed lines only. Returns None if a full analysis is needed."""
+        metrics.annotate(model=model_key, retries=0, reanalysis='diff')
+        try:
+            _, job_description, _ = self._compact('', job_description)
+            prompt = diff_prompt(job_description, previous, changes)
+            text, response, used_model, _ = yield prompt, model_key, api_key, config.dedup.get('diff_max_tokens', 768), None
+            self._record_usage(response, prompt, text)
         except Exception as e:
-            st.error(f"Error analyzing with GPT: {str(e)}")
+            reporting.warning(f"Diff-only re-analysis failed, running a full analysis: {str(e)}")
             return None
+        return self._diff_result(text, previous, model_key, used_model)
+
+    @metrics.timed('analyze')
+    def _analyze_diff(self, job_description: str, model_key: str, api_key: str, previous: Dict[str, Any],
+                      changes: List[str]) -> Optional[Dict[str, Any]]:
+        return self._run(self._diff_steps(job_description, model_key, api_key, previous, changes))
 
-    def analyze_resume(self, resume_text: str, job_description: str, model_key: str, api_key: str) -> Optional[Dict[str, Any]]:
-        """Analyze resume using the selected AI model."""
+    @metrics.timed('analyze')
+    async def _analyze_diff_async(self, job_description: str, model_key: str, api_key: str, previous: Dict[str, Any],
+                                  changes: List[str]) -> Optional[Dict[str, Any]]:
+        return await self._run_async(self._diff_steps(job_description, model_key, api_key, previous, changes))
+
+    def analyze_resume(self, resume_text: str, job_description: str, model_key: str, api_key: str, use_cache: bool = True,
+                       refresh: Iterable[str] = ()) -> Optional[Dict[str, Any]]:
+        """Analyze resume using the selected AI model. Set use_cache=False to force a fresh call.
+
+        refresh names stages (score, feedback, questions) to re-run while
+        reusing the rest; without staged analysis it bypasses the cache.
+        A rating of the same or a near-duplicate resume for this job is
+        reused, or updated from the resume's changes alone (see DedupIndex).
+        """
         model_config = config.get_model_config(model_key)
         if not model_config:
-            st.error(f"Configuration not found for model: {model_key}")
+            reporting.error(f"Configuration not found for model: {model_key}")
             return None
 
-        if 'gpt' in model_key:
-            return self.analyze_with_gpt(resume_text, job_description, model_key, api_key)
+        duplicate = self._find_duplicate(resume_text, job_description, model_key, use_cache and not refresh)
+        result = duplicate['result']
+        if result is None and duplicate['diff']:
+            result = self._analyze_diff(job_description, model_key, api_key, *duplicate['diff'])
+        if result is None:
+            if self.staged:
+                result = self.analyze_staged(resume_text, job_description, model_key, api_key, use_cache, refresh)
+            else:
+                result = self.analyze_single(resume_text, job_description, model_key, api_key, use_cache and not refresh)
+        self._remember(duplicate['key'], job_description, model_key, result)
+        return result
+
+    def _stream_gpt(self, prompt: str, model_config: Dict[str, Any], provider: Provider, api_key: str,
+                    max_tokens: Optional[int] = None) -> Iterator[str]:
+        client = self._get_openai_client(provider, api_key)
+        if not client:
+            return
+        with provider.slot():
+            stream = client.chat.completions.create(
+                **self._gpt_request(model_config, provider, prompt, max_tokens), stream=True
+            )
+            for chunk in stream:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    yield delta
+
+    def _stream_gemini(self, prompt: str, model_config: Dict[str, Any], provider: Provider, api_key: str,
+                       max_tokens: Optional[int] = None) -> Iterator[str]:
+        model = self._build_gemini_model(model_config, provider, api_key, max_tokens)
+        with provider.slot():
+            for chunk in model.generate_content(prompt, stream=True):
+                if chunk.parts:
+                    yield chunk.text
+
+    def _open_stream(self, prompt: str, model_key: str, api_key: str, event: Dict[str, Any],
+                     params: Optional[Dict[str, Any]] = None, max_tokens: Optional[int] = None):
+        """Open a stream resiliently; returns (first chunk, rest of the stream, model that answered, its key).
+
+        The first chunk is pulled inside the retry loop so connection errors
+        and 429s are retried; a stream that breaks off later is not.
+        """
+        def open_stream(model, key):
+            provider = self.providers.for_model(model)
+            streamer = self._stream_gpt if provider.is_openai_style else self._stream_gemini
+            stream = streamer(prompt, {**config.get_model_config(model), **(params or {})}, provider, key, max_tokens)
+            return next(stream, None), stream
+
+        with metrics.bind(event):
+            (first, stream), used_model, used_key = self.resilience.call(
+                model_key, api_key, open_stream, self._token_estimate(prompt, model_key, max_tokens)
+            )
+        return first, stream, used_model, used_key
+
+    def _stream_stage(self, stage: str, context: str, model_key: str, api_key: str, score: Optional[float],
+                      use_cache: bool, event: Dict[str, Any]):
+        """Stream one stage's reply; returns (fields, model that answered, whether cached) when done."""
+        prompt, params, max_tokens, key = self._stage_request(stage, context, model_key, score)
+        cached = self._stage_cached(key, use_cache)
+        if cached is not None:
+            yield json.dumps(cached)
+            return cached, model_key, True
+        start = time.perf_counter()
+        first, stream, used_model, used_key = self._open_stream(prompt, model_key, api_key, event, params, max_tokens)
+        parts = [] if first is None else [first]
+        if first is not None:
+            yield first
+        for delta in stream:
+            parts.append(delta)
+            yield delta
+        text = ''.join(parts)
+        with metrics.bind(event):
+            tokens = self._record_usage(None, prompt, text)
+            fields, complete = self._run(self._stage_result_steps(stage, text, prompt, score, used_model, used_key))
+        if complete and used_model == model_key:
+            self._stage_store(key, fields, tokens, time.perf_counter() - start)
+        return fields, used_model, False
+
+    def _stream_staged(self, resume_text: str, job_description: str, model_key: str, api_key: str, use_cache: bool,
+                       stats: Dict[str, Any], event: Dict[str, Any], start: float) -> Iterator[str]:
+        """Stream a staged analysis as one JSON object per stage, in order (preview() merges them).
+
+        The score is a few tokens, so it is fetched whole and shows up first.
+        """
+        event['staged'] = True
+        with metrics.bind(event):
+            resume_text, job_description, compaction = self._compact(resume_text, job_description)
+        stats.update(compaction)
+        context = self._analysis_context(resume_text, job_description)
+        runs, result = {}, None
+        try:
+            with metrics.bind(event):
+                runs['score'] = self._run(self._stage_steps('score', context, model_key, api_key, None, use_cache))
+            score = runs['score'][0].get('score')
+            if score is None:
+                raise ValueError("response did not include a score")
+            event['ttft_ms'] = round((time.perf_counter() - start) * 1000, 2)
+            yield json.dumps(runs['score'][0])
+            for stage in self._later_stages(score):
+                runs[stage] = yield from self._stream_stage(stage, context, model_key, api_key, score, use_cache, event)
+            with metrics.bind(event):
+                result = {**self._staged_result(runs, model_key, use_cache), 'compaction': compaction}
+        except Exception as e:
+            reporting.error(f"Error streaming analysis: {str(e)}")
+            return
+        finally:
+            event['wall_ms'] = round((time.perf_counter() - start) * 1000, 2)
+            event['work_ms'] = round(max(0.0, event['wall_ms'] - event.get('wait_ms', 0)), 2)
+            event['ok'] = result is not None
+            metrics.record(event)
+        stats['result'] = result
+
+    def stream_resume_analysis(self, resume_text: str, job_description: str, model_key: str, api_key: str, use_cache: bool = True, stats: Optional[Dict[str, Any]] = None) -> Iterator[str]:
+        """Stream the raw model output chunk by chunk (markdown, or JSON in structured mode).
+
+        Cached and reused results arrive as a single chunk; use preview() to
+        render partial output. If a stats dict is passed it is filled with
+        the prompt compaction numbers and, once the stream ends, the
+        validated 'result'.
+        """
+        model_config = config.get_model_config(model_key)
+        if not model_config:
+            reporting.error(f"Configuration not found for model: {model_key}")
+            return
+
+        stats = {} if stats is None else stats
+        duplicate = self._find_duplicate(resume_text, job_description, model_key, use_cache)
+        result = duplicate['result']
+        if result is None and duplicate['diff']:
+            result = self._analyze_diff(job_description, model_key, api_key, *duplicate['diff'])
+        if result:
+            stats['result'] = result
+            if self.structured:
+                yield json.dumps({key: result.get(key) for key in ('score', 'feedback', 'questions')})
+            else:
+                yield result['markdown_response']
         else:
-            return self.analyze_with_gemini(resume_text, job_description, model_key, api_key)
\ No newline at end of file
+            yield from self._stream_analysis(resume_text, job_description, model_key, api_key, use_cache, stats)
+        self._remember(duplicate['key'], job_description, model_key, stats.get('result'))
+
+    def _stream_analysis(self, resume_text: str, job_description: str, model_key: str, api_key: str,
+                         use_cache: bool, stats: Dict[str, Any]) -> Iterator[str]:
+        model_config = config.get_model_config(model_key)
+
+        # Generators can't hold a metrics.timer open across yields, so record the event by hand
+        event = {'stage': 'analyze', 'model': model_key, 'streamed': True, 'retries': 0, 'ok': False}
+        start = time.perf_counter()
+        if self.staged:
+            yield from self._stream_staged(resume_text, job_description, model_key, api_key, use_cache, stats, event, start)
+            return
+        prompt, compaction = self._build_prompt(resume_text, job_description)
+        event['tokens_saved'] = compaction['tokens_saved']
+        stats.update(compaction)
+        cache_key, cached = self._cache_lookup(model_config, prompt, use_cache)
+        event['cache'] = 'hit' if cached else ('miss' if use_cache and cache_key else 'bypass' if cache_key else 'disabled')
+        if cached:
+            event.update(ok=True, wall_ms=round((time.perf_counter() - start) * 1000, 2))
+            metrics.record(event)
+            stats['result'] = cached
+            if self.structured:
+                yield json.dumps({key: cached.get(key) for key in ('score', 'feedback', 'questions')})
+            else:
+                yield cached['markdown_response']
+            return
+
+        parts = []
+        used_model, used_key = model_key, api_key
+        try:
+            first, stream, used_model, used_key = self._open_stream(prompt, model_key, api_key, event)
+            if first is not None:
+                event['ttft_ms'] = round((time.perf_counter() - start) * 1000, 2)
+                parts.append(first)
+                yield first
+            for delta in stream:
+                parts.append(delta)
+                yield delta
+        except Exception as e:
+            reporting.error(f"Error streaming analysis: {str(e)}")
+            return
+        finally:
+            elapsed = time.perf_counter() - start
+            event['wall_ms'] = round(elapsed * 1000, 2)
+            event['work_ms'] = round(max(0.0, event['wall_ms'] - event.get('wait_ms', 0)), 2)
+            response_text = ''.join(parts)
+            # Streaming responses carry no usage block, so estimate at ~4 characters per token
+            event['prompt_tokens'] = len(prompt) // 4
+            event['completion_tokens'] = len(response_text) // 4
+            event['ok'] = bool(response_text)
+            metrics.record(event)
+
+        # Only opening the stream is retried; a reply cut off later is completed by re-asking for the missing fields
+        try:
+            result = self._run(self._finish_steps(response_text, prompt, used_model, used_key))
+        except Exception:
+            return
+        if used_model != model_key:
+            result['failover'] = used_model
+        stats['result'] = result
+        tokens = event['prompt_tokens'] + event['completion_tokens']
+        self._cache_store(cache_key, result, tokens, elapsed)
+
+    async def analyze_resume_async(self, resume_text: str, job_description: str, model_key: str, api_key: str,
+                                   use_cache: bool = True, refresh: Iterable[str] = ()) -> Dict[str, Any]:
+        """Analyze resume with the async provider clients, reusing duplicates as analyze_resume does.
+
+        Unlike analyze_resume, failures raise instead of returning None so
+        callers can cancel or retry around them.
+        """
+        if not config.get_model_config(model_key):
+            raise ValueError(f"Configuration not found for model: {model_key}")
+        duplicate = self._find_duplicate(resume_text, job_description, model_key, use_cache and not refresh)
+        result = duplicate['result']
+        if result is None and duplicate['diff']:
+            result = await self._analyze_diff_async(job_description, model_key, api_key, *duplicate['diff'])
+        if result is None:
+            result = await self._analyze_resume_async(resume_text, job_description, model_key, api_key, use_cache, refresh)
+        self._remember(duplicate['key'], job_description, model_key, result)
+        return result
+
+    @metrics.timed('analyze')
+    async def _analyze_resume_async(self, resume_text: str, job_description: str, model_key: str, api_key: str,
+                                    use_cache: bool = True, refresh: Iterable[str] = ()) -> Dict[str, Any]:
+        metrics.annotate(model=model_key, retries=0)
+        if not self.staged:
+            return await self._run_async(
+                self._single_steps(resume_text, job_description, model_key, api_key, use_cache and not refresh)
+            )
+        metrics.annotate(staged=True)
+        resume_text, job_description, compaction = self._compact(resume_text, job_description)
+        result = await self._analyze_staged_async(
+            self._analysis_context(resume_text, job_description), model_key, api_key, use_cache, refresh
+        )
+        return {**result, 'compaction': compaction}
+
+
+# Rebuilt on next use when the cache settings change
+config.on_reload(['cache'], lambda: setattr(AIAnalyzer, '_response_cache', None))
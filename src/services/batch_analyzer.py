@@ -0,0 +1,138 @@
+import contextvars
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple, Union
+from models.schemas import BatchResult
+from services.document_parser import DocumentParser
+from services.ai_analyzer import AIAnalyzer
+from services.prescreen import PreScreener
+from utils.config import config
+
+# (filename, file bytes or path, mime type)
+ResumeFile = Tuple[str, Union[bytes, Path], str]
+
+
+def _parse_file(source: Union[bytes, Path], file_type: str) -> Optional[str]:
+    """Parse a single resume. Runs inside a worker process, which opens paths itself."""
+    return DocumentParser.parse_resume(source, file_type)
+
+
+class BatchAnalyzer:
+    _prescreener = None
+
+    def __init__(self, ai_analyzer: Optional[AIAnalyzer] = None):
+        """Set up worker pool sizes from config. Rate limits are enforced per provider by the analyzer."""
+        batch_config = config.batch
+        self.ai_analyzer = ai_analyzer or AIAnalyzer()
+        self.parse_workers = batch_config.get('parse_workers', os.cpu_count() or 1)
+        self.analysis_workers = batch_config.get('analysis_workers', 4)
+
+    @classmethod
+    def get_prescreener(cls) -> Optional[PreScreener]:
+        """Get the shared embedding pre-screener, or None if pre-screening is disabled."""
+        if cls._prescreener is None:
+            cls._prescreener = PreScreener.from_config()
+        return cls._prescreener
+
+    @staticmethod
+    def load_directory(directory: str) -> List[ResumeFile]:
+        """Collect every PDF/DOCX file in a directory, by path so only the parse workers read them."""
+        mime_types = config.file_types['mime_types']
+        files = []
+        for path in sorted(Path(directory).expanduser().iterdir()):
+            file_ext = path.suffix.lstrip('.').lower()
+            if path.is_file() and config.is_allowed_file_type(file_ext):
+                files.append((path.name, path, mime_types[file_ext]))
+        return files
+
+    @staticmethod
+    def rank(results: List[BatchResult]) -> List[BatchResult]:
+        """Sort results by score, then screened-out resumes by similarity, failures last."""
+        def key(r: BatchResult):
+            if r.score is not None:
+                return (0, -r.score, r.filename)
+            if r.screened_out:
+                return (1, -(r.similarity or 0), r.filename)
+            return (2, 0, r.filename)
+        return sorted(results, key=key)
+
+    def _analyze_one(self, filename: str, resume_text: str, job_description: str,
+                     model_key: str, api_key: str, use_cache: bool = True,
+                     similarity: Optional[float] = None) -> BatchResult:
+        """Run one LLM analysis."""
+        try:
+            result = self.ai_analyzer.analyze_resume(resume_text, job_description, model_key, api_key, use_cache)
+        except Exception as e:
+            return BatchResult(filename=filename, error=str(e), similarity=similarity)
+        if not result:
+            return BatchResult(filename=filename, error="Analysis failed", similarity=similarity)
+        return BatchResult(
+            filename=filename,
+            score=result['score'],
+            markdown_response=result['markdown_response'],
+            similarity=similarity,
+            duplicate_of=result.get('duplicate_of')
+        )
+
+    def analyze(self, files: List[ResumeFile], job_description: str,
+                model_key: str, api_key: str, use_cache: bool = True,
+                prescreen: bool = True) -> Iterator[BatchResult]:
+        """Parse and analyze resumes concurrently, yielding results as they finish.
+
+        With pre-screening on, every resume is parsed first and only those
+        the embedding pre-screen selects are sent to the LLM; the others are
+        yielded as screened out with their similarity.
+        """
+        prescreener = self.get_prescreener() if prescreen else None
+
+        with ProcessPoolExecutor(max_workers=self.parse_workers) as parse_pool, \
+                ThreadPoolExecutor(max_workers=self.analysis_workers) as analysis_pool:
+            parse_futures = {
+                parse_pool.submit(_parse_file, content, file_type): filename
+                for filename, content, file_type in files
+            }
+            pending = set()
+            parsed = []
+
+            def submit(filename, resume_text, similarity=None):
+                # Copy the context so metrics recorded in workers keep the caller's trace ID
+                pending.add(analysis_pool.submit(
+                    contextvars.copy_context().run, self._analyze_one,
+                    filename, resume_text, job_description, model_key, api_key, use_cache, similarity
+                ))
+
+            for future in as_completed(parse_futures):
+                filename = parse_futures[future]
+                try:
+                    resume_text = future.result()
+                except Exception as e:
+                    yield BatchResult(filename=filename, error=f"Parsing failed: {str(e)}")
+                    continue
+                if not resume_text:
+                    yield BatchResult(filename=filename, error="No text could be extracted")
+                    continue
+
+                if prescreener:
+                    parsed.append((filename, resume_text))
+                    continue
+                submit(filename, resume_text)
+
+                # Hand back any analyses that finished while we were still parsing
+                for done in [f for f in pending if f.done()]:
+                    pending.remove(done)
+                    yield done.result()
+
+            if prescreener:
+                selected, rejected = prescreener.screen(parsed, job_description)
+                for filename, resume_text, similarity in selected:
+                    submit(filename, resume_text, similarity)
+                for filename, _, similarity in rejected:
+                    yield BatchResult(filename=filename, similarity=similarity, screened_out=True)
+
+            for future in as_completed(pending):
+                yield future.result()
+
+
+# Rebuilt on next use when the pre-screen settings change
+config.on_reload(['prescreen'], lambda: setattr(BatchAnalyzer, '_prescreener', None))
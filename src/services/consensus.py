@@ -0,0 +1,34 @@
+import math
+import statistics
+from typing import Any, Dict, List, Optional
+
+
+def agreement(scores: Dict[str, float], quorum: int, tolerance: float) -> Optional[List[str]]:
+    """The `quorum` models whose scores lie closest together, if within tolerance of each other; else None."""
+    if quorum < 1 or len(scores) < quorum:
+        return None
+    ordered = sorted(scores, key=scores.get)
+    windows = [ordered[i:i + quorum] for i in range(len(ordered) - quorum + 1)]
+    closest = min(windows, key=lambda window: scores[window[-1]] - scores[window[0]])
+    return closest if scores[closest[-1]] - scores[closest[0]] <= tolerance else None
+
+
+def aggregate(scores: Dict[str, float], agreed: Optional[List[str]]) -> Dict[str, Any]:
+    """Combine per-model scores.
+
+    The consensus score is the mean of the agreeing models, or the median
+    of all of them when no quorum agreed. Mean, variance and standard
+    deviation are over every score that came in.
+    """
+    values = list(scores.values())
+    mean = statistics.fmean(values)
+    variance = statistics.pvariance(values, mean)
+    score = statistics.fmean(scores[model] for model in agreed) if agreed else statistics.median(values)
+    return {
+        'score': round(score, 1),
+        'mean': round(mean, 2),
+        'variance': round(variance, 2),
+        'stdev': round(math.sqrt(variance), 2),
+        'scores': dict(scores),
+        'agreed': list(agreed or []),
+    }
@@ -0,0 +1,188 @@
+import difflib
+import hashlib
+import re
+import sqlite3
+import zlib
+from pathlib import Path
+from typing import ContextManager, List, NamedTuple, Optional, Tuple
+import numpy as np
+from services.prompt_compactor import normalize_resume_text
+from utils.cache import CACHE_ROOT, DiskCache, connect
+from utils.config import config
+
+# Prime just above 2**32, so (a * x + b) for 32-bit a, b and x never overflows uint64
+_PRIME = np.uint64(4294967311)
+_WORD = re.compile(r'\w+')
+
+
+class DedupMatch(NamedTuple):
+    key: str
+    similarity: float
+    exact: bool
+
+
+class DedupIndex:
+    """Exact and near-duplicate lookup over parsed resume text.
+
+    Exact duplicates share a key: the hash of the text with case,
+    punctuation and whitespace normalized away. Near duplicates are found by
+    MinHash over word shingles, with LSH banding so only resumes sharing a
+    band are compared. Signatures and their band hashes are rows in SQLite,
+    so every process and worker appends to and reads from the same index;
+    the texts themselves go to a size-bounded DiskCache so later edits can
+    be diffed against them.
+    """
+
+    _index = None
+
+    def __init__(self, path: str, num_perm: int = 128, bands: int = 16, shingle_size: int = 5,
+                 threshold: float = 0.8, texts: Optional[DiskCache] = None, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+        self.path = Path(path)
+        if not self.path.is_absolute():
+            self.path = CACHE_ROOT / self.path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.num_perm = num_perm
+        self.bands = bands
+        self.shingle_size = shingle_size
+        self.threshold = threshold
+        self.texts = texts
+        self.signature_id = f"minhash-{num_perm}-{shingle_size}-{bands}-{seed}"
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, 2 ** 32, num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, 2 ** 32, num_perm, dtype=np.uint64)
+        self._init_db()
+
+    @classmethod
+    def get_index(cls) -> Optional['DedupIndex']:
+        """Get the shared resume dedup index, or None if disabled."""
+        dedup_config = config.dedup
+        if not dedup_config.get('enabled', True):
+            return None
+        if cls._index is None:
+            cls._index = cls(
+                dedup_config.get('path', '.cache/dedup/resumes.sqlite'),
+                dedup_config.get('num_perm', 128),
+                dedup_config.get('bands', 16),
+                dedup_config.get('shingle_size', 5),
+                dedup_config.get('threshold', 0.8),
+                DiskCache(dedup_config.get('texts_path', '.cache/dedup/texts.sqlite'),
+                          max_size_mb=dedup_config.get('texts_max_size_mb', 50))
+            )
+        return cls._index
+
+    def _connect(self) -> ContextManager[sqlite3.Connection]:
+        return connect(self.path)
+
+    def _init_db(self):
+        """Create the tables, emptying an index built with different MinHash settings."""
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS resumes (id INTEGER PRIMARY KEY, key TEXT NOT NULL UNIQUE, "
+                "signature BLOB NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS bands (band INTEGER NOT NULL, hash BLOB NOT NULL, "
+                "resume INTEGER NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS bands_hash ON bands (band, hash)")
+            row = conn.execute("SELECT value FROM meta WHERE name = 'signature'").fetchone()
+            if row is None or row[0] != self.signature_id:
+                conn.execute("DELETE FROM bands")
+                conn.execute("DELETE FROM resumes")
+                conn.execute("INSERT OR REPLACE INTO meta VALUES ('signature', ?)", (self.signature_id,))
+
+    def _bands(self, signature: np.ndarray) -> List[Tuple[int, bytes]]:
+        rows = self.num_perm // self.bands
+        return [(band, signature[band * rows:(band + 1) * rows].tobytes()) for band in range(self.bands)]
+
+    def __len__(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM resumes").fetchone()[0]
+
+    @staticmethod
+    def words(text: str) -> List[str]:
+        """Lower-cased words, so formatting, punctuation and case changes don't count as edits."""
+        return _WORD.findall(text.casefold())
+
+    @classmethod
+    def text_key(cls, text: str) -> str:
+        return hashlib.sha256(' '.join(cls.words(text)).encode('utf-8')).hexdigest()
+
+    def signature(self, text: str) -> np.ndarray:
+        """MinHash signature of the text's word shingles."""
+        words = self.words(text)
+        size = min(self.shingle_size, len(words)) or 1
+        shingles = {' '.join(words[i:i + size]) for i in range(max(1, len(words) - size + 1))}
+        hashes = np.fromiter((zlib.crc32(s.encode('utf-8')) for s in shingles), dtype=np.uint64, count=len(shingles))
+        permuted = (np.outer(self._a, hashes) + self._b[:, None]) % _PRIME
+        return (permuted & np.uint64(0xFFFFFFFF)).min(axis=1).astype(np.uint32)
+
+    def _find(self, conn: sqlite3.Connection, key: str, signature: np.ndarray) -> Optional[DedupMatch]:
+        if conn.execute("SELECT 1 FROM resumes WHERE key = ?", (key,)).fetchone():
+            return DedupMatch(key, 1.0, True)
+        bands = self._bands(signature)
+        rows = conn.execute(
+            "SELECT key, signature FROM resumes WHERE id IN (SELECT resume FROM bands WHERE "
+            + " OR ".join(["(band = ? AND hash = ?)"] * len(bands)) + ")",
+            [value for band in bands for value in band]
+        ).fetchall()
+        if not rows:
+            return None
+        signatures = np.frombuffer(b''.join(row[1] for row in rows), dtype=np.uint32).reshape(len(rows), -1)
+        similarities = (signatures == signature).mean(axis=1)
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.threshold:
+            return None
+        return DedupMatch(rows[best][0], float(similarities[best]), False)
+
+    def find(self, text: str, key: Optional[str] = None, signature: Optional[np.ndarray] = None) -> Optional[DedupMatch]:
+        """The closest indexed resume at or above the similarity threshold, or None.
+
+        Similarity is the MinHash estimate of the Jaccard similarity of the
+        two resumes' shingle sets.
+        """
+        key = key or self.text_key(text)
+        signature = self.signature(text) if signature is None else signature
+        with self._connect() as conn:
+            return self._find(conn, key, signature)
+
+    def add(self, text: str) -> Tuple[str, Optional[DedupMatch]]:
+        """Index a resume if it isn't already. Returns its key and its closest earlier duplicate, if any."""
+        key = self.text_key(text)
+        signature = self.signature(text)
+        with self._connect() as conn:
+            match = self._find(conn, key, signature)
+            if match and match.exact:
+                return key, match
+            # Another process may have added the same resume since the lookup
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO resumes (key, signature) VALUES (?, ?)", (key, signature.tobytes())
+            )
+            if cursor.rowcount:
+                conn.executemany(
+                    "INSERT INTO bands (band, hash, resume) VALUES (?, ?, ?)",
+                    [(band, value, cursor.lastrowid) for band, value in self._bands(signature)]
+                )
+        if self.texts is not None:
+            self.texts.set(key, text)
+        return key, match
+
+    def text(self, key: str) -> Optional[str]:
+        """The text a resume was indexed with, if still kept."""
+        return self.texts.get(key) if self.texts is not None else None
+
+    @staticmethod
+    def diff(old: str, new: str) -> List[str]:
+        """Changed lines between two resume versions, as unified diff lines without context."""
+        lines = difflib.unified_diff(
+            normalize_resume_text(old).splitlines(), normalize_resume_text(new).splitlines(), n=0, lineterm=''
+        )
+        return [line for line in lines if line[:1] in '+-' and not line.startswith(('+++', '---'))]
+
+
+# Rebuilt on next use when the dedup settings change
+config.on_reload(['dedup'], lambda: setattr(DedupIndex, '_index', None))
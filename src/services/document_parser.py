@@ -1,58 +1,124 @@
-import PyPDF2
-import docx
-import io
-import streamlit as st
+from typing import BinaryIO, Iterator, Optional
+from services import pdf_engines
+from services.prompt_compactor import PAGE_BREAK
+from utils import reporting, uploads
+from utils.cache import DiskCache
 from utils.config import config
+from utils.metrics import metrics
+from utils.uploads import DocumentTooLargeError, Source
+
+# Bump whenever extraction logic changes so stale cached text is re-parsed
+PARSER_VERSION = 3
 
 class DocumentParser:
+    _cache = None
+
+    @classmethod
+    def get_cache(cls) -> Optional[DiskCache]:
+        """Get the parsed-resume cache, or None if caching is disabled."""
+        cache_config = config.cache.get('resumes', {})
+        if not cache_config.get('enabled', True):
+            return None
+        if cls._cache is None:
+            cls._cache = DiskCache(
+                cache_config.get('path', '.cache/resumes.sqlite'),
+                max_size_mb=cache_config.get('max_size_mb', 200)
+            )
+        return cls._cache
+
     @staticmethod
-    def extract_text_from_pdf(file_bytes: bytes) -> str:
-        """Extract text from PDF file bytes."""
-        try:
-            pdf_reader = PyPDF2.PdfReader(io.BytesIO(file_bytes))
-            text = ""
-            for page in pdf_reader.pages:
-                text += page.extract_text()
-            if not text.strip():
-                st.error("PDF appears to be empty or contains no extractable text")
+    def parser_version(file_type: str) -> str:
+        """Version tag stored with cached text; includes the PDF engine so switching engines re-parses."""
+        if file_type == config.file_types['mime_types']['pdf']:
+            engine = pdf_engines.get_engine()
+            return f"{PARSER_VERSION}/{engine.name}-{engine.version()}"
+        return str(PARSER_VERSION)
+
+    @staticmethod
+    def iter_pdf_pages(source: Source) -> Iterator[str]:
+        """Yield PDF page texts in order as they are extracted."""
+        with uploads.open_source(source) as document:
+            yield from pdf_engines.iter_pdf_pages(document)
+
+    @staticmethod
+    def extract_text_from_pdf(source: Source) -> Optional[str]:
+        """Extract text from a PDF. Raises DocumentTooLargeError if it is over the size or page limit."""
+        with uploads.open_source(source) as document:
+            try:
+                text = PAGE_BREAK.join(pdf_engines.iter_pdf_pages(document))
+                if not text.strip():
+                    reporting.error("PDF appears to be empty or contains no extractable text")
+                    return None
+                reporting.success("Successfully extracted text from PDF")
+                return text
+            except DocumentTooLargeError:
+                raise
+            except Exception as e:
+                reporting.error(f"Error processing PDF: {str(e)}")
+                reporting.error("Debug info: File size: {:.2f} KB".format(uploads.size(document)/1024))
                 return None
-            st.success("Successfully extracted text from PDF")
-            return text
-        except Exception as e:
-            st.error(f"Error processing PDF: {str(e)}")
-            st.error("Debug info: File size: {:.2f} KB".format(len(file_bytes)/1024))
-            return None
 
     @staticmethod
-    def extract_text_from_docx(file_bytes: bytes) -> str:
-        """Extract text from DOCX file bytes."""
-        try:
-            doc = docx.Document(io.BytesIO(file_bytes))
-            text = ""
-            for paragraph in doc.paragraphs:
-                text += paragraph.text + "\n"
-            if not text.strip():
-                st.error("DOCX appears to be empty or contains no extractable text")
+    def extract_text_from_docx(source: Source) -> Optional[str]:
+        """Extract text from a DOCX. Raises DocumentTooLargeError if it is over the size limit."""
+        import docx
+
+        with uploads.open_source(source) as document:
+            try:
+                doc = docx.Document(document)
+                text = "".join(paragraph.text + "\n" for paragraph in doc.paragraphs)
+                if not text.strip():
+                    reporting.error("DOCX appears to be empty or contains no extractable text")
+                    return None
+                reporting.success("Successfully extracted text from DOCX")
+                return text
+            except Exception as e:
+                reporting.error(f"Error processing DOCX: {str(e)}")
+                reporting.error("Debug info: File size: {:.2f} KB".format(uploads.size(document)/1024))
                 return None
-            st.success("Successfully extracted text from DOCX")
-            return text
-        except Exception as e:
-            st.error(f"Error processing DOCX: {str(e)}")
-            st.error("Debug info: File size: {:.2f} KB".format(len(file_bytes)/1024))
-            return None
 
     @classmethod
-    def parse_resume(cls, file_content: bytes, file_type: str) -> str:
-        """Parse resume file based on its type."""
+    @metrics.timed('parse')
+    def parse_resume(cls, source: Source, file_type: str) -> Optional[str]:
+        """Parse resume file based on its type, reusing cached text for identical files.
+
+        source is bytes, a path or a binary file object; files are read in
+        place rather than copied. Raises DocumentTooLargeError for files over
+        file_types.limits, before anything is extracted.
+        """
+        with uploads.open_source(source) as document:
+            return cls._parse_document(document, file_type)
+
+    @classmethod
+    def _parse_document(cls, document: BinaryIO, file_type: str) -> Optional[str]:
         file_types = config.file_types
-        
+        cache = cls.get_cache()
+        metrics.annotate(bytes_in=uploads.size(document), file_type=file_type, cache='miss' if cache else 'disabled')
+        cache_key = uploads.digest(document) if cache else None
+        parser_version = cls.parser_version(file_type)
+
+        if cache:
+            cached = cache.get(cache_key)
+            if cached and cached.get('parser_version') == parser_version:
+                metrics.annotate(cache='hit')
+                reporting.success("Loaded previously extracted resume text from cache")
+                return cached['text']
+
         if file_type == file_types['mime_types']['pdf']:
-            st.info("Detected PDF format, attempting to extract text...")
-            return cls.extract_text_from_pdf(file_content)
+            reporting.info("Detected PDF format, attempting to extract text...")
+            text = cls.extract_text_from_pdf(document)
         elif file_type == file_types['mime_types']['docx']:
-            st.info("Detected DOCX format, attempting to extract text...")
-            return cls.extract_text_from_docx(file_content)
+            reporting.info("Detected DOCX format, attempting to extract text...")
+            text = cls.extract_text_from_docx(document)
         else:
             allowed_types = ', '.join(file_types['allowed'])
-            st.error(f"Unsupported file type: {file_type}. Allowed types: {allowed_types}")
+            reporting.error(f"Unsupported file type: {file_type}. Allowed types: {allowed_types}")
             return None
+
+        if text and cache:
+            cache.set(cache_key, {'text': text, 'parser_version': parser_version})
+        return text
+
+
+# Rebuilt on next use when the cache settings change
+config.on_reload(['cache'], lambda: setattr(DocumentParser, '_cache', None))
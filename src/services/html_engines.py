@@ -0,0 +1,531 @@
+import abc
+import codecs
+import html as html_lib
+import json
+import re
+from html.parser import HTMLParser
+from importlib.metadata import PackageNotFoundError, version
+from typing import Any, AsyncIterable, Dict, Iterable, List, Optional, Tuple
+from utils.config import config
+from utils.metrics import metrics
+from services.prompt_compactor import dedupe
+
+# Readability-style class/id hints for picking the job description block
+POSITIVE_HINTS = re.compile(r'job|description|posting|vacancy|career|content|main|article|detail|requirement|body', re.I)
+NEGATIVE_HINTS = re.compile(
+    r'nav|footer|menu|cookie|consent|banner|sidebar|share|social|related|comment|promo|modal|breadcrumb|newsletter|signup|login',
+    re.I
+)
+CONTENT_TAGS = ['p', 'li', 'h1', 'h2', 'h3', 'h4', 'dd', 'pre', 'td']
+BOILERPLATE_TAGS = ['script', 'style', 'noscript', 'nav', 'footer', 'aside', 'iframe', 'svg', 'form']
+
+
+def ancestor_weight(level: int) -> float:
+    """Share of a content element's score credited to its ancestor `level` steps above its parent.
+
+    As in Readability: the parent gets it in full, the grandparent half, and
+    each ancestor further up a third of that divided by its level, so a
+    wrapper around several sections can outscore any one of them.
+    """
+    return 1.0 if level == 0 else 0.5 if level == 1 else 1 / (level * 3)
+
+
+def main_content_min_chars() -> int:
+    """Main blocks shorter than this are a poor guess; extraction falls back to the whole page."""
+    return config.compaction.get('main_content_min_chars', 200)
+
+
+JSON_LD_PATTERN = re.compile(
+    r'<script[^>]*type\s*=\s*["\']?application/ld\+json["\']?[^>]*>(.*?)</script\s*>', re.I | re.S
+)
+HEADER_CHARSET = re.compile(r'charset\s*=\s*["\']?([\w.:-]+)', re.I)
+META_CHARSET = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?([\w.:-]+)', re.I)
+
+
+def clean_text(text: str, heading: Optional[str] = None) -> str:
+    """Collapse extracted page text into one line, dropping repeated boilerplate phrases."""
+    lines = (line.strip() for line in text.splitlines())
+    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+    chunks = dedupe(chunk for chunk in chunks if chunk)
+    if heading:
+        chunks.insert(0, heading)
+    return ' '.join(chunks)
+
+
+def decode_html(data: bytes, content_type: Optional[str] = None) -> str:
+    """Decode a page using the charset from its Content-Type or <meta> tag, defaulting to UTF-8."""
+    match = HEADER_CHARSET.search(content_type or '')
+    encoding = match.group(1) if match else None
+    if encoding is None:
+        match = META_CHARSET.search(data[:4096])
+        encoding = match.group(1).decode('ascii') if match else 'utf-8'
+    try:
+        codecs.lookup(encoding)
+    except LookupError:
+        encoding = 'utf-8'
+    return data.decode(encoding, errors='replace')
+
+
+def read_capped(chunks: Iterable[bytes], max_bytes: Optional[int]) -> Tuple[bytes, bool]:
+    """Join downloaded chunks, stopping once max_bytes is reached. Returns (body, whether it was cut off)."""
+    parts, size = [], 0
+    for chunk in chunks:
+        parts.append(chunk)
+        size += len(chunk)
+        if max_bytes and size >= max_bytes:
+            return b''.join(parts)[:max_bytes], True
+    return b''.join(parts), False
+
+
+async def read_capped_async(chunks: AsyncIterable[bytes], max_bytes: Optional[int]) -> Tuple[bytes, bool]:
+    """Async counterpart of read_capped."""
+    parts, size = [], 0
+    async for chunk in chunks:
+        parts.append(chunk)
+        size += len(chunk)
+        if max_bytes and size >= max_bytes:
+            return b''.join(parts)[:max_bytes], True
+    return b''.join(parts), False
+
+
+class HtmlEngine(abc.ABC):
+    """Page text extraction backend. Subclasses import their library lazily."""
+
+    name = ''
+    package = ''
+
+    @classmethod
+    def available(cls) -> bool:
+        if not cls.package:
+            return True
+        try:
+            version(cls.package)
+            return True
+        except PackageNotFoundError:
+            return False
+
+    @abc.abstractmethod
+    def extract(self, html: str, main_content: bool = True) -> str:
+        """Extract cleaned visible text, narrowed to the main content block if asked, keeping the page heading."""
+
+
+class TreeEngine(HtmlEngine):
+    """An engine built on a parsed document tree.
+
+    Subclasses implement parse() plus the node accessors used by
+    main_block(); extract() strips boilerplate tags, narrows the page to its
+    job description block and flattens it to text.
+    """
+
+    @abc.abstractmethod
+    def parse(self, html: str):
+        """Parse a page into a root node with BOILERPLATE_TAGS removed."""
+
+    @abc.abstractmethod
+    def content_nodes(self, root) -> Iterable[Any]:
+        """Elements whose text is scored by main_block() (CONTENT_TAGS)."""
+
+    @abc.abstractmethod
+    def text(self, node) -> str:
+        """Node text with whitespace collapsed."""
+
+    @abc.abstractmethod
+    def raw_text(self, node) -> str:
+        """Node text as laid out in the source, line breaks included."""
+
+    @abc.abstractmethod
+    def parent(self, node):
+        """The parent element, or None at the document root."""
+
+    @abc.abstractmethod
+    def hints(self, node) -> str:
+        """The element's class and id, matched against POSITIVE_HINTS and NEGATIVE_HINTS."""
+
+    @abc.abstractmethod
+    def find(self, node, tag: str):
+        """The first descendant with this tag, or None."""
+
+    @abc.abstractmethod
+    def links(self, node) -> Iterable[Any]:
+        """The <a> elements under the node."""
+
+    def key(self, node):
+        return id(node)
+
+    def main_block(self, root):
+        """Find the element most likely to hold the job description.
+
+        Content elements score on length and commas; scores flow up to every
+        ancestor, weighted by ancestor_weight(), then each candidate is
+        weighted by class/id hints and penalized for link density. Returns None
+        if nothing scores, so callers fall back to the whole page.
+        """
+        scores: Dict[Any, float] = {}
+        nodes = {}
+        for element in self.content_nodes(root):
+            text = self.text(element)
+            if len(text) < 25:
+                continue
+            score = 1 + text.count(',') + min(len(text) / 100, 3)
+            ancestor, level = self.parent(element), 0
+            while ancestor is not None:
+                key = self.key(ancestor)
+                nodes[key] = ancestor
+                scores[key] = scores.get(key, 0) + score * ancestor_weight(level)
+                ancestor, level = self.parent(ancestor), level + 1
+
+        best, best_score = None, 0.0
+        for key, score in scores.items():
+            node = nodes[key]
+            hints = self.hints(node)
+            if POSITIVE_HINTS.search(hints):
+                score += 25
+            if NEGATIVE_HINTS.search(hints):
+                score -= 25
+            text_length = len(self.text(node)) or 1
+            link_length = sum(len(self.text(a)) for a in self.links(node))
+            score *= 1 - link_length / text_length
+            if score > best_score:
+                best, best_score = node, score
+        return best
+
+    def extract(self, html: str, main_content: bool = True) -> str:
+        if not html.strip():
+            return ''
+        root = self.parse(html)
+        block, heading = root, None
+        if main_content:
+            best = self.main_block(root)
+            if best is not None and len(self.text(best)) >= main_content_min_chars():
+                block = best
+                h1 = self.find(root, 'h1')
+                if h1 is not None and self.find(best, 'h1') is None:
+                    heading = self.text(h1)
+        return clean_text(self.raw_text(block), heading)
+
+
+class SoupEngine(TreeEngine):
+    """BeautifulSoup with the stdlib parser; slowest, kept for comparison."""
+
+    name = 'bs4'
+    package = 'beautifulsoup4'
+
+    def parse(self, html: str):
+        from bs4 import BeautifulSoup
+
+        soup = BeautifulSoup(html, 'html.parser')
+        for node in soup(BOILERPLATE_TAGS):
+            node.decompose()
+        return soup
+
+    def content_nodes(self, root):
+        return root.find_all(CONTENT_TAGS)
+
+    def text(self, node) -> str:
+        return node.get_text(' ', strip=True)
+
+    def raw_text(self, node) -> str:
+        return node.get_text()
+
+    def parent(self, node):
+        parent = node.parent
+        return None if parent is None or parent.name in (None, '[document]') else parent
+
+    def hints(self, node) -> str:
+        return ' '.join(node.get('class', [])) + ' ' + (node.get('id') or '')
+
+    def find(self, node, tag: str):
+        return node.find(tag)
+
+    def links(self, node):
+        return node.find_all('a')
+
+
+class LxmlEngine(TreeEngine):
+    """libxml2's HTML parser (native code)."""
+
+    name = 'lxml'
+    package = 'lxml'
+
+    def parse(self, html: str):
+        import lxml.html
+        from lxml import etree
+
+        try:
+            root = lxml.html.document_fromstring(html)
+        except ValueError:
+            # Unicode input may not carry an XML encoding declaration
+            root = lxml.html.document_fromstring(html.encode('utf-8'), parser=lxml.html.HTMLParser(encoding='utf-8'))
+        etree.strip_elements(root, *BOILERPLATE_TAGS, with_tail=False)
+        return root
+
+    def content_nodes(self, root):
+        return root.iter(*CONTENT_TAGS)
+
+    def text(self, node) -> str:
+        return ' '.join(node.text_content().split())
+
+    def raw_text(self, node) -> str:
+        return node.text_content()
+
+    def parent(self, node):
+        return node.getparent()
+
+    def hints(self, node) -> str:
+        return (node.get('class') or '') + ' ' + (node.get('id') or '')
+
+    def find(self, node, tag: str):
+        return next(node.iter(tag), None)
+
+    def links(self, node):
+        return node.iter('a')
+
+
+class SelectolaxEngine(TreeEngine):
+    """Lexbor HTML5 parser via selectolax (native code); usually the fastest."""
+
+    name = 'selectolax'
+    package = 'selectolax'
+
+    def parse(self, html: str):
+        from selectolax.lexbor import LexborHTMLParser
+
+        tree = LexborHTMLParser(html)
+        tree.strip_tags(BOILERPLATE_TAGS)
+        return tree.root
+
+    def content_nodes(self, root):
+        return root.css(', '.join(CONTENT_TAGS))
+
+    def text(self, node) -> str:
+        return ' '.join(node.text(separator=' ').split())
+
+    def raw_text(self, node) -> str:
+        return node.text()
+
+    def parent(self, node):
+        parent = node.parent
+        # The document node sits above <html> and has no tag name of its own
+        return None if parent is None or parent.tag.startswith(('-', '#')) else parent
+
+    def hints(self, node) -> str:
+        attributes = node.attributes
+        return (attributes.get('class') or '') + ' ' + (attributes.get('id') or '')
+
+    def find(self, node, tag: str):
+        return node.css_first(tag)
+
+    def links(self, node):
+        return node.css('a')
+
+    def key(self, node):
+        # Node wrappers are created per access; mem_id identifies the underlying element
+        return node.mem_id
+
+
+VOID_TAGS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'param', 'source', 'track', 'wbr'}
+BLOCK_TAGS = {'p', 'div', 'li', 'ul', 'ol', 'br', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'dd', 'dt', 'pre', 'td', 'tr',
+              'section', 'article', 'main', 'header', 'table'}
+
+
+class _StreamingExtractor(HTMLParser):
+    """Single-pass text extractor that never builds a tree.
+
+    Script, style and other BOILERPLATE_TAGS content is dropped as it is
+    parsed. Open elements sit on a stack with running character, comma and
+    link counters, so the main_block() scoring is done as each element
+    closes; text is kept as a flat list of chunks and the winning block is
+    remembered as a slice of it.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.chunks: List[str] = []
+        self.stack: List[Dict[str, Any]] = []
+        self.size = self.commas = self.link_chars = 0
+        self.skipping = self.in_link = 0
+        self.best: Optional[Tuple[float, int, int, int]] = None
+        self.heading: Optional[Tuple[str, int, int]] = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag in VOID_TAGS:
+            if tag == 'br':
+                self.chunks.append('\n')
+            return
+        # Unclosed <p> and <li> end at the next sibling, as in an HTML5 tree
+        if tag in ('p', 'li') and self.stack and self.stack[-1]['tag'] == tag:
+            self._close(self.stack.pop())
+        attributes = dict(attrs)
+        skip = tag in BOILERPLATE_TAGS
+        self.skipping += skip
+        self.in_link += tag == 'a'
+        self.stack.append({
+            'tag': tag, 'skip': skip, 'score': 0.0, 'chunk': len(self.chunks), 'size': self.size,
+            'commas': self.commas, 'links': self.link_chars,
+            'hints': (attributes.get('class') or '') + ' ' + (attributes.get('id') or ''),
+        })
+        if tag in BLOCK_TAGS:
+            self.chunks.append('\n')
+
+    def handle_startendtag(self, tag, attrs):
+        if tag == 'br':
+            self.chunks.append('\n')
+
+    def handle_endtag(self, tag):
+        if not any(entry['tag'] == tag for entry in self.stack):
+            return
+        while True:
+            entry = self.stack.pop()
+            self._close(entry)
+            if entry['tag'] == tag:
+                return
+
+    def handle_data(self, data):
+        if self.skipping:
+            return
+        self.chunks.append(data)
+        stripped = data.strip()
+        if stripped:
+            # Counted as get_text(' ', strip=True) would join it
+            self.size += len(stripped) + 1
+            self.commas += stripped.count(',')
+            if self.in_link:
+                self.link_chars += len(stripped) + 1
+
+    def _close(self, entry: Dict[str, Any]):
+        tag = entry['tag']
+        self.skipping -= entry['skip']
+        self.in_link -= tag == 'a'
+        if tag in BLOCK_TAGS:
+            self.chunks.append('\n')
+        text_length = self.size - entry['size']
+        if tag == 'h1' and self.heading is None and text_length:
+            self.heading = (' '.join(''.join(self.chunks[entry['chunk']:]).split()), entry['chunk'], len(self.chunks))
+        if tag in CONTENT_TAGS and text_length >= 26:
+            score = 1 + (self.commas - entry['commas']) + min((text_length - 1) / 100, 3)
+            for level, ancestor in enumerate(reversed(self.stack)):
+                ancestor['score'] += score * ancestor_weight(level)
+        if entry['score']:
+            score = entry['score']
+            if POSITIVE_HINTS.search(entry['hints']):
+                score += 25
+            if NEGATIVE_HINTS.search(entry['hints']):
+                score -= 25
+            score *= 1 - (self.link_chars - entry['links']) / (text_length or 1)
+            if score > 0 and (self.best is None or score > self.best[0]):
+                self.best = (score, entry['chunk'], len(self.chunks), text_length - 1)
+
+    def close(self):
+        super().close()
+        while self.stack:
+            self._close(self.stack.pop())
+
+
+class StreamEngine(HtmlEngine):
+    """Built-in html.parser handler; no tree, no extra dependency."""
+
+    name = 'stream'
+
+    def extract(self, html: str, main_content: bool = True) -> str:
+        parser = _StreamingExtractor()
+        parser.feed(html)
+        parser.close()
+        chunks, heading = parser.chunks, None
+        if main_content and parser.best is not None and parser.best[3] >= main_content_min_chars():
+            _, start, stop, _ = parser.best
+            chunks = chunks[start:stop]
+            if parser.heading and not (start <= parser.heading[1] and parser.heading[2] <= stop):
+                heading = parser.heading[0]
+        return clean_text(''.join(chunks), heading)
+
+
+ENGINES: Dict[str, type] = {
+    engine.name: engine for engine in (SelectolaxEngine, LxmlEngine, StreamEngine, SoupEngine)
+}
+
+
+def get_engine(name: Optional[str] = None) -> HtmlEngine:
+    """Get a named engine, or the first available one from the configured preference order."""
+    if name:
+        return ENGINES[name]()
+    for engine_name in config.scraping.get('html_engines', list(ENGINES)):
+        engine = ENGINES.get(engine_name)
+        if engine and engine.available():
+            return engine()
+    return StreamEngine()
+
+
+def find_job_posting(html: str) -> Optional[Dict[str, Any]]:
+    """Return the first schema.org JobPosting in the page's JSON-LD blocks, if any."""
+    for match in JSON_LD_PATTERN.finditer(html):
+        try:
+            data = json.loads(match.group(1).strip())
+        except ValueError:
+            continue
+        candidates = data if isinstance(data, list) else [data]
+        while candidates:
+            item = candidates.pop(0)
+            if not isinstance(item, dict):
+                continue
+            types = item.get('@type')
+            if 'JobPosting' in (types if isinstance(types, list) else [types]):
+                return item
+            candidates.extend(item.get('@graph') or [])
+    return None
+
+
+def _names(value: Any) -> List[str]:
+    """Flatten a JSON-LD value (string, number, object with a name or description, or list of them) to strings."""
+    if isinstance(value, list):
+        return [name for item in value for name in _names(item)]
+    if isinstance(value, dict):
+        address = value.get('address')
+        if isinstance(address, dict):
+            parts = (address.get(key) for key in ('addressLocality', 'addressRegion', 'addressCountry'))
+            return [', '.join(name for part in parts for name in _names(part))]
+        return _names(value.get('name') or value.get('description'))
+    if isinstance(value, bool) or value is None or value == '':
+        return []
+    return [str(value)]
+
+
+def job_posting_text(posting: Dict[str, Any], engine: HtmlEngine) -> str:
+    """Flatten a JobPosting into the same one-line text the page extractor produces."""
+    chunks = []
+    title = ', '.join(_names(posting.get('title')))
+    company = ', '.join(_names(posting.get('hiringOrganization')))
+    location = '; '.join(filter(None, _names(posting.get('jobLocation'))))
+    if title:
+        chunks.append(f"{title} at {company}" if company else title)
+    if location:
+        chunks.append(f"Location: {location}.")
+    if posting.get('employmentType'):
+        chunks.append(f"Employment type: {', '.join(_names(posting['employmentType']))}.")
+    for field, label in (('description', None), ('responsibilities', 'Responsibilities'),
+                         ('qualifications', 'Qualifications'), ('skills', 'Skills'),
+                         ('experienceRequirements', 'Experience')):
+        # Values can be objects, lists or numbers as well as (HTML) strings
+        value = ' '.join(_names(posting.get(field)))
+        if not value:
+            continue
+        # Descriptions are HTML, sometimes escaped a second time
+        if '<' not in value and '&lt;' in value:
+            value = html_lib.unescape(value)
+        text = engine.extract(value, main_content=False) if '<' in value else ' '.join(value.split())
+        chunks.append(f"{label}: {text}" if label else text)
+    return ' '.join(chunks)
+
+
+def extract_text(html: str, engine: Optional[HtmlEngine] = None) -> str:
+    """Extract a job description from a page, preferring its JSON-LD JobPosting block."""
+    engine = engine or get_engine()
+    scraping_config = config.scraping
+    metrics.annotate(html_engine=engine.name)
+    if scraping_config.get('prefer_json_ld', True):
+        posting = find_job_posting(html)
+        if posting:
+            text = job_posting_text(posting, engine)
+            if len(text) >= scraping_config.get('json_ld_min_chars', 200):
+                metrics.annotate(source='json-ld')
+                return text
+    return engine.extract(html, config.compaction.get('main_content', True))
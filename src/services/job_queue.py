@@ -0,0 +1,236 @@
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, ContextManager, Dict, List, Optional
+from utils.cache import CACHE_ROOT, connect
+from utils.config import config
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = 'queued', 'running', 'done', 'failed', 'cancelled'
+FINISHED = (DONE, FAILED, CANCELLED)
+
+# Columns returned to callers; the resume bytes never leave the queue
+_PUBLIC_COLUMNS = (
+    'id', 'kind', 'batch', 'owner', 'label', 'payload', 'status', 'attempts', 'worker',
+    'result', 'error', 'created', 'started', 'finished'
+)
+
+
+class JobQueue:
+    """Durable SQLite queue of analysis jobs shared by the UI, the CLI and worker processes.
+
+    Jobs are claimed with a compare-and-set update, so any number of worker
+    processes can poll the same file. A running job whose worker stops
+    sending heartbeats for lease_timeout seconds is handed to another worker,
+    up to max_attempts times; workers look for such jobs when they start and
+    every recover_interval seconds.
+
+    API keys are never written to the file. The key a job was submitted
+    with is held in this process's memory until the job finishes, so only
+    a worker in the submitting process (the embedded worker) sees it.
+    Other workers use their own api_key_env keys.
+    """
+
+    _queue = None
+
+    def __init__(self, path: str, lease_timeout: float = 120, max_attempts: int = 3,
+                 recover_interval: float = 30):
+        self.path = Path(path)
+        if not self.path.is_absolute():
+            self.path = CACHE_ROOT / self.path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.lease_timeout = lease_timeout
+        self.max_attempts = max_attempts
+        self.recover_interval = recover_interval
+        self._recovered_at = 0.0
+        self._api_keys: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, kind TEXT NOT NULL, batch TEXT, owner TEXT, label TEXT, "
+                "payload TEXT NOT NULL, input BLOB, status TEXT NOT NULL, "
+                "attempts INTEGER NOT NULL DEFAULT 0, worker TEXT, result TEXT, error TEXT, "
+                "created REAL NOT NULL, started REAL, heartbeat REAL, finished REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created)")
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_owner ON jobs (owner, created)")
+
+    @classmethod
+    def get_queue(cls) -> 'JobQueue':
+        """Get the shared job queue."""
+        if cls._queue is None:
+            queue_config = config.job_queue
+            cls._queue = cls(
+                queue_config.get('path', '.cache/job_queue.sqlite'),
+                queue_config.get('lease_timeout', 120),
+                queue_config.get('max_attempts', 3),
+                queue_config.get('recover_interval', 30)
+            )
+        return cls._queue
+
+    def _connect(self) -> ContextManager[sqlite3.Connection]:
+        return connect(self.path)
+
+    @staticmethod
+    def _row(row) -> Dict[str, Any]:
+        job = dict(zip(_PUBLIC_COLUMNS, row))
+        job['payload'] = json.loads(job['payload'])
+        job['result'] = json.loads(job['result']) if job['result'] else None
+        return job
+
+    def submit(self, kind: str, payload: Dict[str, Any], data: Optional[bytes] = None, api_key: str = '',
+               owner: Optional[str] = None, label: Optional[str] = None, batch: Optional[str] = None) -> str:
+        """Queue a job and return its ID. The API key stays in this process's memory, never in the file."""
+        job_id = uuid.uuid4().hex[:16]
+        if api_key:
+            with self._lock:
+                self._api_keys[job_id] = api_key
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, kind, batch, owner, label, payload, input, status, created) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, kind, batch, owner, label, json.dumps(payload), data, QUEUED, time.time())
+            )
+        return job_id
+
+    def _forget_key(self, job_id: str):
+        with self._lock:
+            self._api_keys.pop(job_id, None)
+
+    def recover(self):
+        """Requeue running jobs whose worker has gone quiet, failing those out of attempts."""
+        now = time.time()
+        self._recovered_at = now
+        expired = now - self.lease_timeout
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, finished = ?, error = 'worker stopped responding' "
+                "WHERE status = ? AND heartbeat < ? AND attempts >= ?",
+                (FAILED, now, RUNNING, expired, self.max_attempts)
+            )
+            conn.execute(
+                "UPDATE jobs SET status = ?, worker = NULL WHERE status = ? AND heartbeat < ?",
+                (QUEUED, RUNNING, expired)
+            )
+            # Drop keys of jobs that other processes finished
+            with self._lock:
+                held = list(self._api_keys)
+            if held:
+                finished = conn.execute(
+                    f"SELECT id FROM jobs WHERE status IN ({', '.join('?' * len(FINISHED))}) "
+                    f"AND id IN ({', '.join('?' * len(held))})",
+                    (*FINISHED, *held)
+                ).fetchall()
+                for (job_id,) in finished:
+                    self._forget_key(job_id)
+
+    def claim(self, worker: str) -> Optional[Dict[str, Any]]:
+        """Take the oldest queued job for a worker, or None if the queue is empty.
+
+        The returned job also carries its 'input' bytes and 'api_key' (None
+        unless it was submitted with a key from this process).
+        """
+        if time.time() - self._recovered_at >= self.recover_interval:
+            self.recover()
+        with self._connect() as conn:
+            while True:
+                row = conn.execute(
+                    "SELECT id FROM jobs WHERE status = ? ORDER BY created LIMIT 1", (QUEUED,)
+                ).fetchone()
+                if row is None:
+                    return None
+                now = time.time()
+                claimed = conn.execute(
+                    "UPDATE jobs SET status = ?, worker = ?, started = ?, heartbeat = ?, attempts = attempts + 1 "
+                    "WHERE id = ? AND status = ?",
+                    (RUNNING, worker, now, now, row[0], QUEUED)
+                ).rowcount
+                conn.commit()
+                # Another worker got there first; try the next job
+                if not claimed:
+                    continue
+                job = self._row(conn.execute(
+                    f"SELECT {', '.join(_PUBLIC_COLUMNS)} FROM jobs WHERE id = ?", (row[0],)
+                ).fetchone())
+                job['input'] = conn.execute("SELECT input FROM jobs WHERE id = ?", (row[0],)).fetchone()[0]
+                with self._lock:
+                    job['api_key'] = self._api_keys.get(row[0])
+                return job
+
+    def heartbeat(self, job_id: str, worker: str) -> bool:
+        """Extend a running job's lease. Returns False if the job is no longer this worker's."""
+        with self._connect() as conn:
+            return conn.execute(
+                "UPDATE jobs SET heartbeat = ? WHERE id = ? AND worker = ? AND status = ?",
+                (time.time(), job_id, worker, RUNNING)
+            ).rowcount > 0
+
+    def _finish(self, job_id: str, worker: str, status: str, result: Optional[Dict[str, Any]] = None,
+                error: Optional[str] = None):
+        self._forget_key(job_id)
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, finished = ?, input = NULL "
+                "WHERE id = ? AND worker = ? AND status = ?",
+                (status, json.dumps(result, default=str) if result is not None else None, error, time.time(),
+                 job_id, worker, RUNNING)
+            )
+
+    def complete(self, job_id: str, worker: str, result: Dict[str, Any]):
+        """Store a job's result."""
+        self._finish(job_id, worker, DONE, result=result)
+
+    def fail(self, job_id: str, worker: str, error: str):
+        """Mark a job failed."""
+        self._finish(job_id, worker, FAILED, error=error)
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a job that hasn't started yet. Returns whether it was cancelled."""
+        with self._connect() as conn:
+            cancelled = conn.execute(
+                "UPDATE jobs SET status = ?, finished = ?, input = NULL WHERE id = ? AND status = ?",
+                (CANCELLED, time.time(), job_id, QUEUED)
+            ).rowcount > 0
+        if cancelled:
+            self._forget_key(job_id)
+        return cancelled
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get a job by ID."""
+        with self._connect() as conn:
+            row = conn.execute(f"SELECT {', '.join(_PUBLIC_COLUMNS)} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row(row) if row else None
+
+    def jobs(self, owner: Optional[str] = None, batch: Optional[str] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        """List jobs, newest first, optionally only one owner's or one batch's."""
+        query = f"SELECT {', '.join(_PUBLIC_COLUMNS)} FROM jobs"
+        conditions, params = [], []
+        if owner is not None:
+            conditions.append("owner = ?")
+            params.append(owner)
+        if batch is not None:
+            conditions.append("batch = ?")
+            params.append(batch)
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        with self._connect() as conn:
+            rows = conn.execute(query + " ORDER BY created DESC LIMIT ?", (*params, limit)).fetchall()
+        return [self._row(row) for row in rows]
+
+    def stats(self) -> Dict[str, int]:
+        """Count jobs by status."""
+        with self._connect() as conn:
+            counts = dict(conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        return {status: counts.get(status, 0) for status in (QUEUED, RUNNING, DONE, FAILED, CANCELLED)}
+
+    def purge(self, older_than: float) -> int:
+        """Delete finished jobs older than the given number of seconds. Returns how many were deleted."""
+        with self._connect() as conn:
+            return conn.execute(
+                f"DELETE FROM jobs WHERE status IN ({', '.join('?' * len(FINISHED))}) AND finished < ?",
+                (*FINISHED, time.time() - older_than)
+            ).rowcount
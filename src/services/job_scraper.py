@@ -1,46 +1,167 @@
-import requests
-from bs4 import BeautifulSoup
-import streamlit as st
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from utils import reporting
+from utils.cache import DiskCache
 from utils.config import config
+from utils.metrics import metrics
+from services import html_engines
+
+# Bump whenever extract_text changes so cached pages are re-extracted
+EXTRACTOR_VERSION = 4
 
 class JobScraper:
+    _session = None
+    _cache = None
+
+    @classmethod
+    def get_session(cls) -> 'requests.Session':
+        """Get the shared keep-alive session with a pooled connection adapter."""
+        if cls._session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            scraping_config = config.scraping
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=scraping_config.get('pool_connections', 10),
+                pool_maxsize=scraping_config.get('pool_maxsize', 10)
+            )
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            session.headers['User-Agent'] = scraping_config['user_agent']
+            cls._session = session
+        return cls._session
+
+    @classmethod
+    def get_cache(cls) -> Optional[DiskCache]:
+        """Get the job description cache, or None if caching is disabled."""
+        cache_config = config.cache.get('jobs', {})
+        if not cache_config.get('enabled', True):
+            return None
+        if cls._cache is None:
+            cls._cache = DiskCache(
+                cache_config.get('path', '.cache/jobs.sqlite'),
+                max_size_mb=cache_config.get('max_size_mb', 50)
+            )
+        return cls._cache
+
+    @staticmethod
+    def normalize_url(url: str) -> str:
+        """Normalize a URL so trivially different spellings share a cache entry."""
+        parts = urlsplit(url.strip())
+        query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+        path = parts.path.rstrip('/') or '/'
+        return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, query, ''))
+
     @staticmethod
-    def scrape_job_description(url: str) -> str:
-        """Scrape job description from given URL."""
+    def extract_text(html: str) -> str:
+        """Extract cleaned job description text from an HTML page with the configured engine."""
+        return html_engines.extract_text(html)
+
+    @staticmethod
+    def max_bytes() -> Optional[int]:
+        """Download cap for job pages; anything past it is not read."""
+        return config.scraping.get('max_bytes', 5 * 1024 * 1024)
+
+    @classmethod
+    def lookup_cache(cls, url: str) -> Tuple[Optional[str], Optional[Dict[str, Any]], Dict[str, str]]:
+        """Check the cache for a URL.
+
+        Returns (cache key, fresh entry or None, conditional request headers for a stale entry).
+        """
+        cache = cls.get_cache()
+        if not cache:
+            return None, None, {}
+        cache_key = cls.normalize_url(url)
+        ttl = config.cache.get('jobs', {}).get('ttl_seconds', 86400)
+
+        cached = cache.get(cache_key, max_age=ttl)
+        if cached and cached.get('extractor_version') == EXTRACTOR_VERSION:
+            return cache_key, cached, {}
+
+        # Revalidate a stale entry instead of downloading the page again
+        headers = {}
+        entry = cache.peek(cache_key)
+        if entry and entry['value'].get('extractor_version') == EXTRACTOR_VERSION:
+            stale = entry['value']
+            if stale.get('etag'):
+                headers['If-None-Match'] = stale['etag']
+            if stale.get('last_modified'):
+                headers['If-Modified-Since'] = stale['last_modified']
+        return cache_key, None, headers
+
+    @classmethod
+    def revalidated(cls, cache_key: Optional[str]) -> Optional[str]:
+        """Refresh a stale entry after a 304 and return its text."""
+        cache = cls.get_cache()
+        entry = cache.peek(cache_key) if cache and cache_key else None
+        if not entry:
+            return None
+        cache.set(cache_key, entry['value'])
+        return entry['value']['text']
+
+    @classmethod
+    def store(cls, cache_key: Optional[str], text: str, response_headers):
+        """Cache cleaned text along with the response validators."""
+        cache = cls.get_cache()
+        if cache and cache_key:
+            cache.set(cache_key, {
+                'text': text,
+                'etag': response_headers.get('ETag'),
+                'last_modified': response_headers.get('Last-Modified'),
+                'extractor_version': EXTRACTOR_VERSION,
+            })
+
+    @classmethod
+    @metrics.timed('scrape')
+    def scrape_job_description(cls, url: str) -> str:
+        """Scrape job description from given URL, serving fresh cached text without a request."""
+        import requests
+
         try:
             scraping_config = config.scraping
-            headers = {
-                'User-Agent': scraping_config['user_agent']
-            }
-            response = requests.get(
+            cache_key, cached, headers = cls.lookup_cache(url)
+            metrics.annotate(url=url, cache='miss' if cache_key else 'disabled')
+            if cached:
+                metrics.annotate(cache='hit')
+                reporting.success("Loaded job description from cache")
+                return cached['text']
+
+            response = cls.get_session().get(
                 url, 
                 headers=headers, 
-                timeout=scraping_config.get('timeout', 30)
+                timeout=scraping_config.get('timeout', 30),
+                stream=True
             )
+            with response:
+                content, truncated = html_engines.read_capped(response.iter_content(64 * 1024), cls.max_bytes())
+            metrics.annotate(bytes_in=len(content), http_status=response.status_code, truncated=truncated)
+            if response.status_code == 304:
+                text = cls.revalidated(cache_key)
+                if text:
+                    metrics.annotate(cache='revalidated')
+                    reporting.success("Job description unchanged since last visit, using cached copy")
+                    return text
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Remove script and style elements
-            for script in soup(["script", "style"]):
-                script.decompose()
-            
-            # Extract and clean text
-            text = soup.get_text()
-            lines = (line.strip() for line in text.splitlines())
-            chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-            text = ' '.join(chunk for chunk in chunks if chunk)
+            text = cls.extract_text(html_engines.decode_html(content, response.headers.get('Content-Type')))
             
             if not text.strip():
-                st.error("No text content found in the job description URL")
+                reporting.error("No text content found in the job description URL")
                 return None
-                
-            st.success("Successfully scraped job description")
+
+            cls.store(cache_key, text, response.headers)
+            reporting.success("Successfully scraped job description")
             return text
             
         except requests.exceptions.RequestException as e:
-            st.error(f"Error accessing URL: {str(e)}")
+            reporting.error(f"Error accessing URL: {str(e)}")
             return None
         except Exception as e:
-            st.error(f"Error scraping job description: {str(e)}")
+            reporting.error(f"Error scraping job description: {str(e)}")
             return None
+
+
+# Rebuilt on next use when their settings change
+config.on_reload(['cache'], lambda: setattr(JobScraper, '_cache', None))
+config.on_reload(['scraping'], lambda: setattr(JobScraper, '_session', None))
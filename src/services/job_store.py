@@ -0,0 +1,126 @@
+import hashlib
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, ContextManager, Dict, List, Optional
+import numpy as np
+from services.job_scraper import JobScraper
+from services.prescreen import Embedder, get_embedder
+from utils.cache import CACHE_ROOT, connect
+from utils.config import config
+from utils.metrics import metrics
+from utils.vector_index import VectorIndex
+
+
+class JobStore:
+    """Saved job postings with their cleaned text and an embedding matrix.
+
+    Postings are kept in SQLite keyed by normalized URL; their vectors live
+    in a VectorIndex keyed by a hash of the text, so a resume can be ranked
+    against every stored posting in one vectorized pass.
+    """
+
+    _store = None
+
+    def __init__(self, path: str, embedder: Embedder, index: VectorIndex):
+        self.path = Path(path)
+        if not self.path.is_absolute():
+            self.path = CACHE_ROOT / self.path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.embedder = embedder
+        self.index = index
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS postings ("
+                "url TEXT PRIMARY KEY, title TEXT NOT NULL, text TEXT NOT NULL, "
+                "text_key TEXT NOT NULL, added REAL NOT NULL, updated REAL NOT NULL)"
+            )
+
+    @classmethod
+    def get_store(cls) -> 'JobStore':
+        """Get the shared job posting store."""
+        if cls._store is None:
+            store_config = config.job_store
+            embedder = get_embedder()
+            index = VectorIndex(
+                f"{config.prescreen.get('index_path', '.cache/embeddings')}/postings-{embedder.name}.npy",
+                embedder.dimension,
+                embedder.signature
+            )
+            cls._store = cls(store_config.get('path', '.cache/job_postings.sqlite'), embedder, index)
+        return cls._store
+
+    def _connect(self) -> ContextManager[sqlite3.Connection]:
+        return connect(self.path)
+
+    @staticmethod
+    def text_key(text: str) -> str:
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    def _index(self, texts: Dict[str, str]):
+        """Embed and index any texts (text key -> text) the index doesn't have yet."""
+        missing = {key: text for key, text in texts.items() if key not in self.index}
+        if missing:
+            self.index.add(zip(missing, self.embedder.embed(list(missing.values()))))
+
+    def add_text(self, url: str, text: str, title: Optional[str] = None) -> Dict[str, Any]:
+        """Save (or refresh) a posting from already-cleaned text."""
+        url = JobScraper.normalize_url(url) if url.startswith(('http://', 'https://')) else url
+        text_key = self.text_key(text)
+        self._index({text_key: text})
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO postings (url, title, text, text_key, added, updated) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(url) DO UPDATE SET title = excluded.title, text = excluded.text, "
+                "text_key = excluded.text_key, updated = excluded.updated",
+                (url, title or url, text, text_key, now, now)
+            )
+        return {'url': url, 'title': title or url, 'chars': len(text)}
+
+    def add(self, url: str, title: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Scrape a posting with JobScraper and save it. Returns None if scraping failed."""
+        text = JobScraper.scrape_job_description(url)
+        if not text:
+            return None
+        return self.add_text(url, text, title)
+
+    def remove(self, url: str) -> bool:
+        """Delete a posting. Returns whether it existed."""
+        with self._connect() as conn:
+            cursor = conn.execute("DELETE FROM postings WHERE url IN (?, ?)", (url, JobScraper.normalize_url(url)))
+            return cursor.rowcount > 0
+
+    def postings(self) -> List[Dict[str, Any]]:
+        """List saved postings, newest first, without their text."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT url, title, length(text), updated FROM postings ORDER BY updated DESC"
+            ).fetchall()
+        return [{'url': url, 'title': title, 'chars': chars, 'updated': updated} for url, title, chars, updated in rows]
+
+    def __len__(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM postings").fetchone()[0]
+
+    def match(self, resume_text: str, top_k: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Rank every saved posting by similarity to a resume, best first.
+
+        Each match carries the posting's url, title, text and similarity.
+        """
+        with self._connect() as conn:
+            rows = conn.execute("SELECT url, title, text, text_key FROM postings").fetchall()
+        if not rows:
+            return []
+        with metrics.timer('match', candidates=len(rows), embedder=self.embedder.name):
+            # Postings indexed under a different embedder are re-embedded here
+            self._index({text_key: text for _, _, text, text_key in rows})
+            weights = self.index.idf() if self.embedder.uses_idf else None
+            query = self.embedder.embed([resume_text])[0]
+            scores = self.index.similarities(query, [row[3] for row in rows], weights)
+            order = np.argsort(-scores, kind='stable')[:top_k]
+        return [
+            {'url': rows[i][0], 'title': rows[i][1], 'text': rows[i][2], 'similarity': round(float(scores[i]), 4)}
+            for i in order
+        ]
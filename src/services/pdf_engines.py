@@ -0,0 +1,209 @@
+import abc
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from importlib.metadata import PackageNotFoundError, version
+from typing import BinaryIO, Dict, Iterator, List, Optional
+from utils import uploads
+from utils.config import config
+
+
+class PdfEngine(abc.ABC):
+    """Text extraction backend. Subclasses import their library lazily.
+
+    Documents are binary file objects, read in place from the start.
+    """
+
+    name = ''
+    package = ''
+
+    @classmethod
+    def available(cls) -> bool:
+        try:
+            version(cls.package)
+            return True
+        except PackageNotFoundError:
+            return False
+
+    @classmethod
+    def version(cls) -> str:
+        return version(cls.package)
+
+    @abc.abstractmethod
+    def page_count(self, document: BinaryIO) -> int:
+        """Number of pages in the document."""
+
+    @abc.abstractmethod
+    def iter_pages(self, document: BinaryIO, start: int = 0, stop: Optional[int] = None) -> Iterator[str]:
+        """Yield the text of pages [start, stop)."""
+
+
+class PypdfiumEngine(PdfEngine):
+    """PDFium bindings (native code); scales best to long documents."""
+
+    name = 'pypdfium2'
+    package = 'pypdfium2'
+
+    def page_count(self, document: BinaryIO) -> int:
+        import pypdfium2
+
+        document.seek(0)
+        pdf = pypdfium2.PdfDocument(document)
+        try:
+            return len(pdf)
+        finally:
+            pdf.close()
+
+    def iter_pages(self, document: BinaryIO, start: int = 0, stop: Optional[int] = None) -> Iterator[str]:
+        import pypdfium2
+
+        document.seek(0)
+        pdf = pypdfium2.PdfDocument(document)
+        try:
+            for index in range(start, len(pdf) if stop is None else min(stop, len(pdf))):
+                page = pdf[index]
+                textpage = page.get_textpage()
+                yield textpage.get_text_range()
+                textpage.close()
+                page.close()
+        finally:
+            pdf.close()
+
+
+class PdfminerEngine(PdfEngine):
+    name = 'pdfminer'
+    package = 'pdfminer.six'
+
+    def page_count(self, document: BinaryIO) -> int:
+        from pdfminer.pdfpage import PDFPage
+
+        document.seek(0)
+        return sum(1 for _ in PDFPage.get_pages(document))
+
+    def iter_pages(self, document: BinaryIO, start: int = 0, stop: Optional[int] = None) -> Iterator[str]:
+        from io import StringIO
+        from pdfminer.converter import TextConverter
+        from pdfminer.layout import LAParams
+        from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+        from pdfminer.pdfpage import PDFPage
+
+        # One pass with one interpreter: extract_text(page_numbers=[i]) re-parses
+        # the document for every page, which is quadratic in its length
+        document.seek(0)
+        resources = PDFResourceManager(caching=True)
+        output = StringIO()
+        with TextConverter(resources, output, laparams=LAParams()) as converter:
+            interpreter = PDFPageInterpreter(resources, converter)
+            for index, page in enumerate(PDFPage.get_pages(document)):
+                if stop is not None and index >= stop:
+                    break
+                if index < start:
+                    continue
+                interpreter.process_page(page)
+                # The converter ends each page with a form feed; pages are joined by the caller
+                yield output.getvalue().rstrip('\f')
+                output.seek(0)
+                output.truncate()
+
+
+class PyPDF2Engine(PdfEngine):
+    """Pure-Python fallback that is always installed."""
+
+    name = 'pypdf2'
+    package = 'PyPDF2'
+
+    def page_count(self, document: BinaryIO) -> int:
+        import PyPDF2
+
+        document.seek(0)
+        return len(PyPDF2.PdfReader(document).pages)
+
+    def iter_pages(self, document: BinaryIO, start: int = 0, stop: Optional[int] = None) -> Iterator[str]:
+        import PyPDF2
+
+        document.seek(0)
+        pages = PyPDF2.PdfReader(document).pages
+        for index in range(start, len(pages) if stop is None else min(stop, len(pages))):
+            yield pages[index].extract_text() or ''
+
+
+ENGINES: Dict[str, type] = {
+    engine.name: engine for engine in (PypdfiumEngine, PdfminerEngine, PyPDF2Engine)
+}
+
+
+def get_engine(name: Optional[str] = None) -> PdfEngine:
+    """Get a named engine, or the first available one from the configured preference order."""
+    if name:
+        return ENGINES[name]()
+    preferred = config.file_types.get('pdf', {}).get('engines', list(ENGINES))
+    for engine_name in preferred:
+        engine = ENGINES.get(engine_name)
+        if engine and engine.available():
+            return engine()
+    return PyPDF2Engine()
+
+
+def _extract_range(engine_name: str, path: str, start: int, stop: int) -> List[str]:
+    """Extract a page range. Runs inside a worker process, which opens the file itself."""
+    with open(path, 'rb') as document:
+        return list(ENGINES[engine_name]().iter_pages(document, start, stop))
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    """Get the long-lived page extraction pool so large PDFs don't pay process start-up each time."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=workers)
+        return _pool
+
+
+def parallel_workers() -> int:
+    """Number of processes used for page-parallel extraction."""
+    return config.file_types.get('pdf', {}).get('parallel_workers') or os.cpu_count() or 1
+
+
+def iter_pdf_pages(document: BinaryIO, engine: Optional[PdfEngine] = None) -> Iterator[str]:
+    """Yield page texts in order.
+
+    Documents over file_types.limits.max_pages raise DocumentTooLargeError
+    before any text is extracted. Documents with at least
+    `parallel_min_pages` pages are split into contiguous ranges extracted
+    across a process pool; earlier ranges are yielded as soon as they
+    finish so downstream stages can start early. Workers read the file from
+    disk rather than being sent a copy of it.
+    """
+    engine = engine or get_engine()
+    pdf_config = config.file_types.get('pdf', {})
+    workers = parallel_workers()
+    min_pages = pdf_config.get('parallel_min_pages', 8)
+    # Daemonic processes (e.g. batch parse workers) may not start children
+    serial = workers < 2 or multiprocessing.current_process().daemon
+
+    page_count = engine.page_count(document) if uploads.limits().max_pages or not serial else None
+    if page_count is not None:
+        uploads.check_pages(page_count)
+    if serial or page_count < min_pages:
+        yield from engine.iter_pages(document)
+        return
+
+    chunk = -(-page_count // workers)
+    pool = _get_pool(workers)
+    with uploads.on_disk(document, suffix='.pdf') as path:
+        futures = [
+            pool.submit(_extract_range, engine.name, path, start, min(start + chunk, page_count))
+            for start in range(0, page_count, chunk)
+        ]
+        try:
+            for future in futures:
+                yield from future.result()
+        finally:
+            # The copy is removed on exit, so don't leave ranges running against it
+            for future in futures:
+                future.cancel()
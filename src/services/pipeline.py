@@ -0,0 +1,142 @@
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple, Union
+from services.document_parser import DocumentParser
+from services.html_engines import decode_html, read_capped_async
+from services.job_scraper import JobScraper
+from services.ai_analyzer import AIAnalyzer
+from utils.config import config
+from utils.metrics import metrics
+from utils.uploads import Source
+
+
+class PipelineError(Exception):
+    """Raised when a pipeline stage fails or times out."""
+
+    def __init__(self, stage: str, message: str):
+        super().__init__(f"{stage}: {message}")
+        self.stage = stage
+
+
+class AnalysisPipeline:
+    """Async parse → scrape → analyze pipeline.
+
+    Resume parsing runs in a worker thread while the job posting is fetched
+    with httpx, then the LLM is called through the async provider clients.
+    Nothing here needs a Streamlit session, so it can be driven headless
+    (utils.aio.run closes the async clients when the loop finishes):
+
+        result = aio.run(AnalysisPipeline().run(data, mime_type, url, 'gpt4o_mini', key))
+    """
+
+    def __init__(self, ai_analyzer: Optional[AIAnalyzer] = None):
+        pipeline_config = config.pipeline
+        self.ai_analyzer = ai_analyzer or AIAnalyzer()
+        self.timeouts = pipeline_config.get('timeouts', {})
+
+    async def stage(self, stage: str, coro):
+        """Await a stage under its configured timeout, wrapping failures in PipelineError."""
+        try:
+            return await asyncio.wait_for(coro, timeout=self.timeouts.get(stage))
+        except asyncio.TimeoutError:
+            raise PipelineError(stage, f"timed out after {self.timeouts.get(stage)}s")
+        except Exception as e:
+            raise PipelineError(stage, str(e)) from e
+
+    async def parse_resume(self, source: Source, file_type: str) -> str:
+        """Parse the resume (bytes, a path or a file object) in a worker thread."""
+        text = await asyncio.to_thread(DocumentParser.parse_resume, source, file_type)
+        if not text:
+            raise ValueError("no text could be extracted from the resume")
+        return text
+
+    @metrics.timed('scrape')
+    async def fetch_job_description(self, url: str, client: Optional['httpx.AsyncClient'] = None) -> str:
+        """Fetch and clean a job posting, sharing JobScraper's on-disk cache."""
+        import httpx
+
+        cache_key, cached, headers = JobScraper.lookup_cache(url)
+        metrics.annotate(url=url, cache='miss' if cache_key else 'disabled')
+        if cached:
+            metrics.annotate(cache='hit')
+            return cached['text']
+
+        scraping_config = config.scraping
+        headers['User-Agent'] = scraping_config['user_agent']
+        own_client = client is None
+        if own_client:
+            client = httpx.AsyncClient(follow_redirects=True, timeout=scraping_config.get('timeout', 30))
+        try:
+            async with client.stream('GET', url, headers=headers) as response:
+                content, truncated = await read_capped_async(response.aiter_bytes(), JobScraper.max_bytes())
+        finally:
+            if own_client:
+                await client.aclose()
+
+        metrics.annotate(bytes_in=len(content), http_status=response.status_code, truncated=truncated)
+        if response.status_code == 304:
+            text = JobScraper.revalidated(cache_key)
+            if text:
+                metrics.annotate(cache='revalidated')
+                return text
+        response.raise_for_status()
+
+        # Parsing is CPU bound, keep it off the event loop
+        html = decode_html(content, response.headers.get('Content-Type'))
+        text = await asyncio.to_thread(JobScraper.extract_text, html)
+        if not text.strip():
+            raise ValueError("no text content found in the job description URL")
+        JobScraper.store(cache_key, text, response.headers)
+        return text
+
+    async def prepare(self, source: Source, file_type: str, url: str) -> Tuple[str, str]:
+        """Parse the resume and fetch the job description concurrently.
+
+        If either stage fails the other is cancelled.
+        """
+        parse_task = asyncio.create_task(self.stage('parse', self.parse_resume(source, file_type)))
+        scrape_task = asyncio.create_task(self.stage('scrape', self.fetch_job_description(url)))
+        try:
+            return tuple(await asyncio.gather(parse_task, scrape_task))
+        except BaseException:
+            for task in (parse_task, scrape_task):
+                task.cancel()
+            raise
+
+    async def analyze(self, resume_text: str, job_description: str, model_key: str,
+                      api_key: str, use_cache: bool = True, consensus: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Analyze under the stage timeout; with consensus (a list of models, empty for the configured panel), score by consensus."""
+        if consensus is not None:
+            return await self.stage('analyze', self.ai_analyzer.analyze_consensus_async(
+                resume_text, job_description, model_key, api_key, consensus, use_cache=use_cache
+            ))
+        return await self.stage('analyze', self.ai_analyzer.analyze_resume_async(
+            resume_text, job_description, model_key, api_key, use_cache
+        ))
+
+    async def analyze_many(self, resume_text: str, job_descriptions: Dict[str, str], model_key: str,
+                           api_key: str, use_cache: bool = True,
+                           concurrency: int = 4) -> Dict[str, Union[Dict[str, Any], PipelineError]]:
+        """Analyze one resume against several jobs concurrently.
+
+        Returns a result, or the PipelineError it failed with, per job ID.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def analyze_one(job_description):
+            async with semaphore:
+                return await self.analyze(resume_text, job_description, model_key, api_key, use_cache)
+
+        results = await asyncio.gather(
+            *(analyze_one(job_description) for job_description in job_descriptions.values()),
+            return_exceptions=True
+        )
+        for result in results:
+            if isinstance(result, BaseException) and not isinstance(result, PipelineError):
+                raise result
+        return dict(zip(job_descriptions, results))
+
+    async def run(self, source: Source, file_type: str, url: str, model_key: str,
+                  api_key: str, use_cache: bool = True, consensus: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Run the full pipeline and return the analysis result."""
+        resume_text, job_description = await self.prepare(source, file_type, url)
+        return await self.analyze(resume_text, job_description, model_key, api_key, use_cache, consensus)
@@ -0,0 +1,185 @@
+import abc
+import hashlib
+import importlib.util
+import re
+import zlib
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from utils.config import config
+from utils.metrics import metrics
+from utils.vector_index import VectorIndex
+
+# (filename, resume text, similarity to the job)
+Candidate = Tuple[str, str, float]
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#.]*[a-z0-9+#]|[a-z0-9]")
+STOP_WORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or our that the their this to was we were "
+    "will with you your".split()
+)
+
+
+class Embedder(abc.ABC):
+    """Turns texts into fixed-size vectors for similarity ranking."""
+
+    name = ''
+    # Whether IDF weights from the index should be applied when scoring
+    uses_idf = False
+
+    @property
+    @abc.abstractmethod
+    def dimension(self) -> int:
+        """Length of each vector."""
+
+    @property
+    @abc.abstractmethod
+    def signature(self) -> str:
+        """Identifies vectors produced by this embedder so incompatible indexes are rebuilt."""
+
+    @abc.abstractmethod
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """One row per text."""
+
+
+class HashingTfidfEmbedder(Embedder):
+    """Hashed unigram and bigram term frequencies; IDF comes from the index at query time.
+
+    Needs nothing beyond NumPy and no fitting step, so new resumes can be
+    appended to the index without re-embedding the old ones.
+    """
+
+    name = 'tfidf'
+    uses_idf = True
+
+    def __init__(self, dimension: int = 4096):
+        self._dimension = dimension
+
+    @property
+    def dimension(self) -> int:
+        return self._dimension
+
+    @property
+    def signature(self) -> str:
+        return f"tfidf-v1-{self._dimension}"
+
+    @staticmethod
+    def terms(text: str) -> List[str]:
+        words = [w for w in TOKEN_PATTERN.findall(text.lower()) if w not in STOP_WORDS]
+        return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self._dimension), dtype=np.float32)
+        for row, text in enumerate(texts):
+            # crc32 rather than hash() so buckets are stable across processes
+            counts = Counter(zlib.crc32(term.encode()) % self._dimension for term in self.terms(text))
+            if counts:
+                columns = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+                frequencies = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+                vectors[row, columns] = 1 + np.log(frequencies)
+        return vectors
+
+
+class SentenceTransformerEmbedder(Embedder):
+    """Local CPU sentence-embedding model (optional `sentence-transformers` dependency)."""
+
+    name = 'sentence_transformers'
+    _models: Dict[str, object] = {}
+
+    def __init__(self, model_name: str = 'all-MiniLM-L6-v2'):
+        self.model_name = model_name
+
+    @staticmethod
+    def available() -> bool:
+        return importlib.util.find_spec('sentence_transformers') is not None
+
+    @property
+    def model(self):
+        """Load the model once per process."""
+        if self.model_name not in self._models:
+            from sentence_transformers import SentenceTransformer
+
+            self._models[self.model_name] = SentenceTransformer(self.model_name, device='cpu')
+        return self._models[self.model_name]
+
+    @property
+    def dimension(self) -> int:
+        return self.model.get_sentence_embedding_dimension()
+
+    @property
+    def signature(self) -> str:
+        return f"st-{self.model_name}"
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        return self.model.encode(texts, batch_size=32, normalize_embeddings=True, convert_to_numpy=True).astype(np.float32)
+
+
+def get_embedder(name: Optional[str] = None) -> Embedder:
+    """Build the configured embedder; 'auto' prefers sentence-transformers when installed."""
+    prescreen_config = config.prescreen
+    name = name or prescreen_config.get('embedder', 'auto')
+    if name == 'sentence_transformers' or (name == 'auto' and SentenceTransformerEmbedder.available()):
+        return SentenceTransformerEmbedder(prescreen_config.get('model', 'all-MiniLM-L6-v2'))
+    return HashingTfidfEmbedder(prescreen_config.get('tfidf_dimension', 4096))
+
+
+class PreScreener:
+    """Ranks resumes against a job by embedding similarity so only plausible matches reach the LLM.
+
+    Resume vectors are persisted in a VectorIndex keyed by a hash of the
+    text, so each resume is embedded once however many jobs it is screened
+    against.
+    """
+
+    def __init__(self, embedder: Embedder, index: VectorIndex,
+                 top_k: Optional[int] = None, min_similarity: Optional[float] = None):
+        self.embedder = embedder
+        self.index = index
+        self.top_k = top_k
+        self.min_similarity = min_similarity
+
+    @classmethod
+    def from_config(cls) -> Optional['PreScreener']:
+        """Build a pre-screener from config.yaml, or None if pre-screening is disabled."""
+        prescreen_config = config.prescreen
+        if not prescreen_config.get('enabled', False):
+            return None
+        embedder = get_embedder()
+        index = VectorIndex(
+            f"{prescreen_config.get('index_path', '.cache/embeddings')}/resumes-{embedder.name}.npy",
+            embedder.dimension,
+            embedder.signature
+        )
+        return cls(embedder, index, prescreen_config.get('top_k'), prescreen_config.get('min_similarity'))
+
+    @staticmethod
+    def text_key(text: str) -> str:
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    def similarities(self, texts: List[str], job_description: str) -> np.ndarray:
+        """Cosine similarity of each text to the job, embedding and indexing any new texts first."""
+        keys = [self.text_key(text) for text in texts]
+        missing = {key: text for key, text in zip(keys, texts) if key not in self.index}
+        if missing:
+            self.index.add(zip(missing, self.embedder.embed(list(missing.values()))))
+        weights = self.index.idf() if self.embedder.uses_idf else None
+        query = self.embedder.embed([job_description])[0]
+        return self.index.similarities(query, keys, weights)
+
+    def screen(self, resumes: List[Tuple[str, str]], job_description: str) -> Tuple[List[Candidate], List[Candidate]]:
+        """Split (filename, text) pairs into (selected, rejected), each ordered by similarity, best first.
+
+        A resume is selected if it clears `min_similarity` and is within the
+        `top_k` best; either limit can be None to switch it off.
+        """
+        if not resumes:
+            return [], []
+        with metrics.timer('prescreen', candidates=len(resumes), embedder=self.embedder.name) as event:
+            scores = self.similarities([text for _, text in resumes], job_description)
+            ranked = [(resumes[i][0], resumes[i][1], round(float(scores[i]), 4)) for i in np.argsort(-scores, kind='stable')]
+            eligible = [c for c in ranked if self.min_similarity is None or c[2] >= self.min_similarity]
+            selected = eligible[:self.top_k] if self.top_k else eligible
+            chosen = {id(c) for c in selected}
+            rejected = [c for c in ranked if id(c) not in chosen]
+            event['selected'] = len(selected)
+        return selected, rejected
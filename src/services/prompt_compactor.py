@@ -0,0 +1,115 @@
+import re
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from utils.config import config
+
+# Separates PDF pages in parsed resume text, as pdftotext does
+PAGE_BREAK = '\f'
+
+_tokenizer = None
+
+
+def estimate_tokens(text: str) -> int:
+    """Count tokens with tiktoken when installed, otherwise estimate ~4 characters per token."""
+    global _tokenizer
+    if _tokenizer is None:
+        try:
+            import tiktoken
+            _tokenizer = tiktoken.get_encoding('cl100k_base')
+        except Exception:
+            _tokenizer = False
+    if _tokenizer:
+        return len(_tokenizer.encode(text, disallowed_special=()))
+    return (len(text) + 3) // 4
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Trim text to roughly max_tokens, cutting at a word boundary."""
+    if not max_tokens or estimate_tokens(text) <= max_tokens:
+        return text
+    if _tokenizer:
+        cut = _tokenizer.decode(_tokenizer.encode(text, disallowed_special=())[:max_tokens])
+    else:
+        cut = text[:max_tokens * 4]
+    return cut.rsplit(' ', 1)[0] + ' …'
+
+
+def dedupe(chunks: Iterable[str], min_length: int = 4) -> List[str]:
+    """Drop repeated chunks (page headers, 'Apply now' buttons, footers), keeping the first."""
+    seen = set()
+    kept = []
+    for chunk in chunks:
+        key = chunk.casefold()
+        if len(chunk) >= min_length and key in seen:
+            continue
+        seen.add(key)
+        kept.append(chunk)
+    return kept
+
+
+def _page_edge_key(line: str) -> str:
+    # Page numbers differ from page to page ("Page 2 of 3"), so digits don't count
+    return re.sub(r'\d+', '#', line.casefold())
+
+
+def page_boilerplate(pages: List[List[str]], edge_lines: int = 2) -> Set[str]:
+    """Keys of lines at the top or bottom of more than one page: running headers, footers and page numbers."""
+    counts = Counter()
+    for lines in pages:
+        counts.update({_page_edge_key(line) for line in lines[:edge_lines] + lines[-edge_lines:]})
+    return {key for key, count in counts.items() if count > 1}
+
+
+def normalize_resume_text(text: str) -> str:
+    """Collapse whitespace runs, drop blank-line padding and headers/footers repeated across pages.
+
+    Pages are separated by form feeds (see DocumentParser). Other repeated
+    lines are kept: a resume can legitimately list the same skill, title or
+    date range twice.
+    """
+    pages = [
+        [line for line in (re.sub(r'[ \t\u00a0\u2000-\u200b]+', ' ', line).strip() for line in page.splitlines()) if line]
+        for page in text.split(PAGE_BREAK)
+    ]
+    boilerplate = page_boilerplate(pages) if len(pages) > 1 else set()
+    seen = set()
+    kept = []
+    for lines in pages:
+        for line in lines:
+            key = _page_edge_key(line)
+            if key in boilerplate:
+                if key in seen:
+                    continue
+                seen.add(key)
+            kept.append(line)
+    return '\n'.join(kept)
+
+
+class PromptCompactor:
+    """Shrinks resume and job text before it is pasted into the analysis prompt."""
+
+    def __init__(self, budgets: Optional[Dict[str, int]] = None, enabled: bool = True):
+        self.budgets = budgets or {}
+        self.enabled = enabled
+
+    @classmethod
+    def from_config(cls) -> 'PromptCompactor':
+        compaction_config = config.compaction
+        return cls(compaction_config.get('budgets', {}), compaction_config.get('enabled', True))
+
+    def compact(self, resume_text: str, job_description: str) -> Tuple[str, str, Dict[str, Any]]:
+        """Return the compacted texts plus token counts before and after."""
+        before = estimate_tokens(resume_text) + estimate_tokens(job_description)
+        if not self.enabled:
+            return resume_text, job_description, {'tokens_before': before, 'tokens_after': before, 'tokens_saved': 0}
+
+        resume_text = truncate_to_tokens(normalize_resume_text(resume_text), self.budgets.get('resume'))
+        job_description = re.sub(r'\s+', ' ', job_description).strip()
+        job_description = truncate_to_tokens(job_description, self.budgets.get('job_description'))
+
+        after = estimate_tokens(resume_text) + estimate_tokens(job_description)
+        return resume_text, job_description, {
+            'tokens_before': before,
+            'tokens_after': after,
+            'tokens_saved': before - after,
+        }
@@ -0,0 +1,49 @@
+import hashlib
+
+# Prompts run from the most to the least shared text, because providers only
+# reuse the cached attention state (KV cache) of an identical prefix: the
+# fixed instructions and output format, then the job description (the same
+# for a whole batch), then the candidate, then the short per-call task.
+JOB_HEADER = "## Job Description"
+RESUME_HEADER = "## Resume"
+RESUME_CHANGES_HEADER = "## Resume Changes"
+
+ANALYSIS_INSTRUCTIONS = """You are screening candidates for the role under "Job Description". Judge how well the resume under "Resume" fits it: required and preferred skills, seniority, domain experience and evidence of impact."""
+
+ANALYSIS_TASKS = """Analyze the resume against the job description to:
+1. Rate the candidate's fit for the role on a scale of 0-10
+2. Provide detailed feedback
+3. If the rating is {high} or higher, generate 20 interview questions (5 easy, 5 intermediate, 5 difficult, 5 extremely difficult)"""
+
+
+def render(instructions: str, job_description: str, candidate: str, task: str = '',
+           candidate_header: str = RESUME_HEADER) -> str:
+    """Lay out a prompt as instructions, job description, candidate and task, in that order."""
+    sections = [instructions, f"{JOB_HEADER}\n{job_description}", f"{candidate_header}\n{candidate}"]
+    if task:
+        sections.append(task)
+    return '\n\n'.join(sections)
+
+
+def analysis_prompt(resume_text: str, job_description: str, format_instructions: str, high_threshold: float) -> str:
+    """The single-call analysis prompt, with its output format in the shared prefix.
+
+    {high} in the tasks and format instructions becomes the score that earns interview questions.
+    """
+    instructions = f"{ANALYSIS_INSTRUCTIONS}\n\n{ANALYSIS_TASKS}\n\n{format_instructions}"
+    return render(instructions.replace('{high}', f"{high_threshold:g}"), job_description, resume_text)
+
+
+def analysis_context(resume_text: str, job_description: str) -> str:
+    """The prefix shared by every stage prompt for one resume; stage_prompt() appends the task."""
+    return render(ANALYSIS_INSTRUCTIONS, job_description, resume_text)
+
+
+def shared_prefix(prompt: str) -> str:
+    """The part of a prompt before the candidate section, shared by every prompt for the same job."""
+    return prompt.partition(f"\n\n{RESUME_HEADER}")[0]
+
+
+def prefix_cache_key(prompt: str) -> str:
+    """A routing key for provider prompt caching: the same for every prompt with the same shared prefix."""
+    return hashlib.sha256(shared_prefix(prompt).encode('utf-8')).hexdigest()[:32]
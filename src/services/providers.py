@@ -0,0 +1,305 @@
+import asyncio
+import atexit
+import threading
+import time
+import weakref
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, Dict, Optional
+from utils import aio
+from utils.circuit_breaker import CircuitBreaker
+from utils.client_pool import ClientPool
+from utils.config import config
+from utils.metrics import metrics
+from utils.rate_limiter import RateLimiter
+
+OPENAI_STYLE_TYPES = ('openai', 'openai_compatible')
+
+
+class ProviderBusyError(Exception):
+    """Raised when a request waits longer than queue_timeout for a free slot."""
+
+
+class Provider:
+    """One configured LLM backend.
+
+    Holds a single long-lived pooled HTTP client, shared by the per-key SDK
+    clients, which are kept in an LRU ClientPool so concurrent users with
+    different keys never overwrite each other's client. Caps the number of
+    in-flight requests; callers beyond the cap queue on a semaphore for up
+    to queue_timeout seconds. Also owns the provider's request/token rate
+    limiter and circuit breaker.
+    """
+
+    def __init__(self, name: str, provider_config: Dict[str, Any]):
+        self.name = name
+        self.config = provider_config
+        self.type = provider_config.get('type', name)
+        self.max_in_flight = provider_config.get('max_in_flight', 4)
+        self.queue_timeout = provider_config.get('queue_timeout')
+        self._slots = threading.BoundedSemaphore(self.max_in_flight)
+        self.limiter = RateLimiter(
+            provider_config.get('requests_per_minute', 0),
+            provider_config.get('tokens_per_minute', 0)
+        )
+        breaker_config = config.resilience.get('circuit_breaker', {})
+        self.breaker = CircuitBreaker(
+            provider_config.get('failure_threshold', breaker_config.get('failure_threshold', 5)),
+            provider_config.get('reset_timeout', breaker_config.get('reset_timeout', 60))
+        )
+        self._lock = threading.Lock()
+        self._http_client = None
+        # Per-key OpenAI clients only wrap the shared HTTP client, so evicting one has nothing to close
+        self._clients = self._pool(self._build_client)
+        self._gemini_clients = self._pool(self._build_gemini_client, close=lambda client: client.transport.close())
+        self._async_clients = weakref.WeakKeyDictionary()
+        self.in_flight = 0
+        self.waiting = 0
+
+    @property
+    def is_openai_style(self) -> bool:
+        return self.type in OPENAI_STYLE_TYPES
+
+    @property
+    def requires_api_key(self) -> bool:
+        return self.config.get('requires_api_key', True)
+
+    def _client_kwargs(self, api_key: str) -> Dict[str, Any]:
+        # Retries are handled by services.resilience, not inside the SDK
+        kwargs = {'api_key': api_key or 'not-needed', 'max_retries': 0}
+        if self.config.get('base_url'):
+            kwargs['base_url'] = self.config['base_url']
+        return kwargs
+
+    def _limits(self):
+        import httpx
+
+        return httpx.Limits(
+            max_connections=self.config.get('max_connections', self.max_in_flight),
+            max_keepalive_connections=self.config.get('max_keepalive_connections', self.max_in_flight),
+            keepalive_expiry=self.config.get('keepalive_expiry', 30)
+        )
+
+    def _pool(self, factory, close=None) -> ClientPool:
+        return ClientPool(
+            factory,
+            max_size=self.config.get('client_pool_size', 32),
+            idle_timeout=self.config.get('client_idle_timeout', 600),
+            close=close
+        )
+
+    def _build_client(self, api_key: str):
+        import httpx
+        from openai import OpenAI
+
+        with self._lock:
+            if self._http_client is None:
+                self._http_client = httpx.Client(
+                    timeout=self.config.get('timeout', 60.0),
+                    limits=self._limits(),
+                    proxy=self.config.get('proxy')
+                )
+        return OpenAI(http_client=self._http_client, **self._client_kwargs(api_key))
+
+    def client(self, api_key: str):
+        """Get the OpenAI-style client for an API key, backed by the shared connection pool."""
+        return self._clients.get(api_key)
+
+    @staticmethod
+    def _build_gemini_client(api_key: str):
+        # Imported lazily: the SDK pulls in grpc and protobuf, which dominates cold start
+        from google.ai import generativelanguage as glm
+
+        return glm.GenerativeServiceClient(client_options={'api_key': api_key})
+
+    def gemini_client(self, api_key: str):
+        """Get the Gemini client for an API key.
+
+        Used instead of genai.configure(), which sets one key for the whole
+        process.
+        """
+        return self._gemini_clients.get(api_key)
+
+    def _loop_pools(self) -> Dict[str, Any]:
+        """Async clients for the running event loop, closed when utils.aio.run() finishes with the loop."""
+        import httpx
+
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            pools = self._async_clients.get(loop)
+            if pools is None:
+                http_client = httpx.AsyncClient(
+                    timeout=self.config.get('timeout', 60.0),
+                    limits=self._limits(),
+                    proxy=self.config.get('proxy')
+                )
+                pools = self._async_clients[loop] = {
+                    'http': http_client,
+                    'openai': self._pool(lambda key: self._build_async_client(http_client, key)),
+                    'gemini': self._pool(self._build_gemini_async_client),
+                }
+                aio.on_loop_close(self._aclose_loop_pools)
+            return pools
+
+    async def _aclose_loop_pools(self):
+        """Close the running loop's async clients and their connections."""
+        with self._lock:
+            pools = self._async_clients.pop(asyncio.get_running_loop(), None)
+        if pools is None:
+            return
+        # Async OpenAI clients only wrap the loop's HTTP client
+        pools['openai'].clear()
+        for client in pools['gemini'].clear():
+            await client.transport.close()
+        await pools['http'].aclose()
+
+    def _build_async_client(self, http_client, api_key: str):
+        from openai import AsyncOpenAI
+
+        return AsyncOpenAI(http_client=http_client, **self._client_kwargs(api_key))
+
+    @staticmethod
+    def _build_gemini_async_client(api_key: str):
+        from google.ai import generativelanguage as glm
+
+        return glm.GenerativeServiceAsyncClient(client_options={'api_key': api_key})
+
+    def async_client(self, api_key: str):
+        """Get the async OpenAI-style client for an API key in the running event loop."""
+        return self._loop_pools()['openai'].get(api_key)
+
+    def gemini_async_client(self, api_key: str):
+        """Get the async Gemini client for an API key in the running event loop."""
+        return self._loop_pools()['gemini'].get(api_key)
+
+    def _acquire(self):
+        with self._lock:
+            self.waiting += 1
+        start = time.perf_counter()
+        acquired = self._slots.acquire(timeout=self.queue_timeout)
+        metrics.add(wait_ms=(time.perf_counter() - start) * 1000)
+        with self._lock:
+            self.waiting -= 1
+            if acquired:
+                self.in_flight += 1
+        if not acquired:
+            raise ProviderBusyError(
+                f"{self.name}: no free slot after {self.queue_timeout}s ({self.max_in_flight} requests in flight)"
+            )
+
+    def _release(self):
+        with self._lock:
+            self.in_flight -= 1
+        self._slots.release()
+
+    @contextmanager
+    def slot(self):
+        """Hold one in-flight slot for the duration of a request."""
+        self._acquire()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            metrics.add(work_ms=(time.perf_counter() - start) * 1000)
+            self._release()
+
+    @asynccontextmanager
+    async def async_slot(self):
+        """Async variant of slot(); waits for the shared semaphore in a worker thread."""
+        acquire = asyncio.ensure_future(asyncio.to_thread(self._acquire))
+        try:
+            await asyncio.shield(acquire)
+        except asyncio.CancelledError:
+            # The thread still gets its slot after we're cancelled; give it back when it does
+            def release(future):
+                if not future.cancelled() and future.exception() is None:
+                    self._release()
+            acquire.add_done_callback(release)
+            raise
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            metrics.add(work_ms=(time.perf_counter() - start) * 1000)
+            self._release()
+
+    def close(self):
+        """Close every pooled client and the shared sync HTTP client."""
+        self._clients.close()
+        self._gemini_clients.close()
+        with self._lock:
+            if self._http_client is not None:
+                self._http_client.close()
+            self._http_client = None
+
+
+class ProviderRegistry:
+    """Builds one Provider per entry in the `providers` config section."""
+
+    def __init__(self, providers_config: Optional[Dict[str, Dict[str, Any]]] = None):
+        providers_config = providers_config if providers_config is not None else config.providers
+        self._providers = {name: Provider(name, cfg) for name, cfg in providers_config.items()}
+        self._breaker_config = config.resilience.get('circuit_breaker', {})
+        self._retired = []
+        self._lock = threading.Lock()
+
+    def reconfigure(self, providers_config: Optional[Dict[str, Dict[str, Any]]] = None):
+        """Rebuild the providers whose settings changed, keeping the others' limiters, breakers and clients.
+
+        A change to resilience.circuit_breaker rebuilds every provider.
+        Calls already running finish on the Provider they started with;
+        replaced providers are closed once nothing is using them.
+        """
+        providers_config = providers_config if providers_config is not None else config.providers
+        breaker_config = config.resilience.get('circuit_breaker', {})
+        with self._lock:
+            rebuild_all, self._breaker_config = breaker_config != self._breaker_config, breaker_config
+            for name in {*self._providers, *providers_config}:
+                # A provider removed from the config falls back to defaults, as in get()
+                provider_config = providers_config.get(name, {'type': name})
+                provider = self._providers.get(name)
+                if provider is not None and provider.config == provider_config and not rebuild_all:
+                    continue
+                if provider is not None:
+                    self._retired.append(provider)
+                self._providers[name] = Provider(name, provider_config)
+            idle = [p for p in self._retired if not (p.in_flight or p.waiting)]
+            self._retired = [p for p in self._retired if p.in_flight or p.waiting]
+        for provider in idle:
+            provider.close()
+
+    def get(self, name: str) -> Provider:
+        if name not in self._providers:
+            # Unknown names fall back to a provider of the same type with defaults
+            self._providers[name] = Provider(name, {'type': name})
+        return self._providers[name]
+
+    def for_model(self, model_key: str) -> Provider:
+        return self.get(config.get_provider(model_key))
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {
+            name: {
+                'in_flight': p.in_flight, 'waiting': p.waiting, 'max_in_flight': p.max_in_flight,
+                'circuit': p.breaker.state, 'clients': len(p._clients) + len(p._gemini_clients),
+            }
+            for name, p in self._providers.items()
+        }
+
+    def close(self):
+        for provider in [*self._providers.values(), *self._retired]:
+            provider.close()
+
+
+_registry: Optional[ProviderRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> ProviderRegistry:
+    """Get the process-wide provider registry."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ProviderRegistry()
+            atexit.register(_registry.close)
+            config.on_reload(['providers', 'resilience'], _registry.reconfigure)
+        return _registry
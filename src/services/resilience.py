@@ -0,0 +1,197 @@
+import asyncio
+import email.utils
+import os
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from services.providers import Provider, ProviderBusyError, get_registry
+from utils import reporting
+from utils.circuit_breaker import Trial
+from utils.config import config
+from utils.metrics import metrics
+
+# Exception class names (anywhere in the MRO) worth retrying: transport failures and timeouts
+# from httpx/openai, and the google.api_core errors the Gemini SDK raises
+RETRYABLE_ERRORS = {
+    'APITimeoutError', 'APIConnectionError', 'RateLimitError', 'InternalServerError',
+    'TimeoutException', 'TransportError', 'TimeoutError', 'ConnectionError',
+    'ResourceExhausted', 'ServiceUnavailable', 'DeadlineExceeded', 'TooManyRequests',
+}
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+class AllProvidersFailedError(Exception):
+    """Raised when the primary model and every failover model have failed."""
+
+
+def retry_after(exc: BaseException) -> Optional[float]:
+    """Seconds the server asked us to wait, from Retry-After / retry-after-ms headers."""
+    response = getattr(exc, 'response', None)
+    headers = getattr(response, 'headers', None) or {}
+    try:
+        if headers.get('retry-after-ms'):
+            return float(headers['retry-after-ms']) / 1000
+        value = headers.get('retry-after')
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def is_retryable(exc: BaseException) -> bool:
+    status = getattr(exc, 'status_code', None) or getattr(exc, 'code', None)
+    if isinstance(status, int) and status in RETRYABLE_STATUS:
+        return True
+    return any(cls.__name__ in RETRYABLE_ERRORS for cls in type(exc).__mro__)
+
+
+class Resilience:
+    """Runs LLM calls with rate limiting, retries, circuit breaking and model failover.
+
+    `call(model_key, api_key, attempt)` tries the model, then each model in
+    its failover list. For every model it waits on the provider's rate
+    limiter, skips it while its circuit is open, and retries transient
+    errors with exponential backoff and full jitter (at least as long as any
+    Retry-After). Time spent waiting and working is added to the current
+    metrics event as wait_ms / work_ms, along with retries.
+    """
+
+    def __init__(self):
+        self.providers = get_registry()
+
+    # Read on every call, so edits to the resilience section apply without a restart
+    @property
+    def max_attempts(self) -> int:
+        return max(1, config.resilience.get('max_attempts', 4))
+
+    @property
+    def backoff_base(self) -> float:
+        return config.resilience.get('backoff_base', 1.0)
+
+    @property
+    def backoff_max(self) -> float:
+        return config.resilience.get('backoff_max', 30.0)
+
+    @property
+    def failover(self) -> Dict[str, List[str]]:
+        return config.resilience.get('failover', {})
+
+    def backoff(self, attempt: int, exc: BaseException) -> float:
+        """Delay before retry number `attempt` (0-based)."""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        hint = retry_after(exc)
+        return max(delay, hint) if hint is not None else delay
+
+    def chain(self, model_key: str, api_key: str) -> List[Tuple[str, Provider, str]]:
+        """(model, provider, api key) to try in order.
+
+        Failover models on another provider use that provider's API key
+        from its api_key_env variable, and are skipped if it has none.
+        """
+        primary = self.providers.for_model(model_key)
+        chain = [(model_key, primary, api_key)]
+        for fallback in self.failover.get(model_key, []):
+            if not config.get_model_config(fallback):
+                continue
+            provider = self.providers.for_model(fallback)
+            key = api_key if provider is primary else os.environ.get(provider.config.get('api_key_env', ''), '')
+            if provider.requires_api_key and not key:
+                continue
+            chain.append((fallback, provider, key))
+        return chain
+
+    @staticmethod
+    def _failed_over(model_key: str, used: str):
+        if used != model_key:
+            metrics.annotate(failover=used)
+            reporting.warning(f"{model_key} unavailable, answered by {used}")
+
+    def call(self, model_key: str, api_key: str, attempt: Callable[[str, str], Any],
+             tokens: int = 0) -> Tuple[Any, str, str]:
+        """Run attempt(model_key, api_key) resiliently; returns (result, model used, api key used)."""
+        errors = []
+        for model, provider, key in self.chain(model_key, api_key):
+            admission = provider.breaker.allow()
+            if not admission:
+                errors.append(f"{model}: circuit open")
+                continue
+            try:
+                for attempt_number in range(self.max_attempts):
+                    metrics.add(wait_ms=provider.limiter.acquire(tokens) * 1000)
+                    try:
+                        result = attempt(model, key)
+                    except ProviderBusyError as e:
+                        errors.append(str(e))
+                        break
+                    except Exception as e:
+                        if not is_retryable(e):
+                            provider.breaker.record_success()
+                            raise
+                        provider.breaker.record_failure()
+                        errors.append(f"{model}: {str(e)}")
+                        if attempt_number + 1 == self.max_attempts:
+                            break
+                        admission = provider.breaker.allow()
+                        if not admission:
+                            break
+                        delay = self.backoff(attempt_number, e)
+                        if retry_after(e):
+                            provider.limiter.penalize(delay)
+                        metrics.add(retries=1, wait_ms=delay * 1000)
+                        time.sleep(delay)
+                        continue
+                    provider.breaker.record_success()
+                    self._failed_over(model_key, model)
+                    return result, model, key
+            finally:
+                # A trial call that was cancelled or never reached the provider (busy) settles nothing
+                if isinstance(admission, Trial):
+                    provider.breaker.release(admission)
+        raise AllProvidersFailedError('; '.join(errors) or f"{model_key}: no provider available")
+
+    async def call_async(self, model_key: str, api_key: str, attempt: Callable[[str, str], Awaitable[Any]],
+                         tokens: int = 0) -> Tuple[Any, str, str]:
+        """Async counterpart of call()."""
+        errors = []
+        for model, provider, key in self.chain(model_key, api_key):
+            admission = provider.breaker.allow()
+            if not admission:
+                errors.append(f"{model}: circuit open")
+                continue
+            try:
+                for attempt_number in range(self.max_attempts):
+                    metrics.add(wait_ms=await provider.limiter.acquire_async(tokens) * 1000)
+                    try:
+                        result = await attempt(model, key)
+                    except ProviderBusyError as e:
+                        errors.append(str(e))
+                        break
+                    except Exception as e:
+                        if not is_retryable(e):
+                            provider.breaker.record_success()
+                            raise
+                        provider.breaker.record_failure()
+                        errors.append(f"{model}: {str(e)}")
+                        if attempt_number + 1 == self.max_attempts:
+                            break
+                        admission = provider.breaker.allow()
+                        if not admission:
+                            break
+                        delay = self.backoff(attempt_number, e)
+                        if retry_after(e):
+                            provider.limiter.penalize(delay)
+                        metrics.add(retries=1, wait_ms=delay * 1000)
+                        await asyncio.sleep(delay)
+                        continue
+                    provider.breaker.record_success()
+                    self._failed_over(model_key, model)
+                    return result, model, key
+            finally:
+                # A trial call that was cancelled or never reached the provider (busy) settles nothing
+                if isinstance(admission, Trial):
+                    provider.breaker.release(admission)
+        raise AllProvidersFailedError('; '.join(errors) or f"{model_key}: no provider available")
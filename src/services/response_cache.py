@@ -0,0 +1,119 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+from utils.cache import DiskCache
+from utils.config import config
+
+
+class MemoryBackend:
+    """In-process LRU backend with the same interface as DiskCache."""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+        self._counters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str, max_age: Optional[float] = None) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or (max_age is not None and time.time() - entry[1] > max_age):
+                self._counters['misses'] = self._counters.get('misses', 0) + 1
+                return None
+            self._entries.move_to_end(key)
+            self._counters['hits'] = self._counters.get('hits', 0) + 1
+            return entry[0]
+
+    def set(self, key: str, value: Any):
+        with self._lock:
+            self._entries[key] = (value, time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._counters['evictions'] = self._counters.get('evictions', 0) + 1
+
+    def incr(self, name: str, amount: int = 1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def counters(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counters)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._counters.clear()
+
+    def stats(self) -> Dict[str, int]:
+        counters = self.counters()
+        return {
+            'hits': counters.get('hits', 0),
+            'misses': counters.get('misses', 0),
+            'evictions': counters.get('evictions', 0),
+            'entries': len(self._entries),
+            'size_bytes': 0,
+        }
+
+
+BACKENDS = {
+    'sqlite': lambda cache_config: DiskCache(
+        cache_config.get('path', '.cache/responses.sqlite'),
+        max_size_mb=cache_config.get('max_size_mb', 100)
+    ),
+    'memory': lambda cache_config: MemoryBackend(cache_config.get('max_entries', 256)),
+}
+
+
+class ResponseCache:
+    """Cache of LLM analysis results keyed on model parameters and a prompt digest."""
+
+    def __init__(self, backend, ttl_seconds: Optional[float] = None):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+
+    @classmethod
+    def from_config(cls) -> Optional['ResponseCache']:
+        """Build the cache described by the `cache.responses` config section."""
+        cache_config = config.cache.get('responses', {})
+        if not cache_config.get('enabled', True):
+            return None
+        backend = BACKENDS[cache_config.get('backend', 'sqlite')](cache_config)
+        return cls(backend, ttl_seconds=cache_config.get('ttl_seconds'))
+
+    @staticmethod
+    def make_key(model_config: Dict[str, Any], prompt: str) -> str:
+        """Build a cache key from every generation parameter plus the prompt hash."""
+        params = {k: v for k, v in model_config.items() if k != 'display_name'}
+        prompt_digest = hashlib.sha256(prompt.encode('utf-8')).hexdigest()
+        payload = json.dumps({'params': params, 'prompt': prompt_digest}, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return a cached result and record the tokens and time it saved."""
+        entry = self.backend.get(key, max_age=self.ttl_seconds)
+        if entry is None:
+            return None
+        self.backend.incr('saved_tokens', entry.get('tokens', 0))
+        self.backend.incr('saved_ms', int(entry.get('elapsed', 0) * 1000))
+        result = dict(entry['result'])
+        result['cache'] = {'hit': True, 'saved_tokens': entry.get('tokens', 0), 'saved_seconds': entry.get('elapsed', 0)}
+        return result
+
+    def set(self, key: str, result: Dict[str, Any], tokens: int, elapsed: float):
+        """Store a result with the token count and latency it cost to produce."""
+        self.backend.set(key, {'result': result, 'tokens': tokens, 'elapsed': elapsed})
+
+    def clear(self):
+        self.backend.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get backend stats plus cumulative tokens and seconds saved by hits."""
+        stats = self.backend.stats()
+        counters = self.backend.counters()
+        stats['saved_tokens'] = counters.get('saved_tokens', 0)
+        stats['saved_seconds'] = counters.get('saved_ms', 0) / 1000
+        return stats
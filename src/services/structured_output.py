@@ -0,0 +1,260 @@
+import json
+import re
+from typing import Any, Dict, List, Optional, Tuple
+from services.prompt_templates import RESUME_CHANGES_HEADER, render
+
+# Question levels in display order, with the markdown section titles
+QUESTION_LEVELS = {
+    'easy': 'Easy Questions',
+    'intermediate': 'Intermediate Questions',
+    'difficult': 'Difficult Questions',
+    'extremely_difficult': 'Extremely Difficult Questions',
+}
+QUESTIONS_PER_LEVEL = 5
+
+# A score is only trusted once the value is followed by a delimiter, so "7" isn't read from a streaming "7.5"
+JSON_SCORE_PATTERN = re.compile(r'"score"\s*:\s*"?(\d+(?:\.\d+)?)(?:\s*/\s*10)?"?\s*[,}\n]')
+
+JSON_FORMAT_INSTRUCTIONS = """Respond with a single JSON object and nothing else, using exactly these keys, in this order:
+{
+  "score": <number from 0 to 10>,
+  "feedback": [<string>, ...],
+  "questions": {
+    "easy": [<string> x5],
+    "intermediate": [<string> x5],
+    "difficult": [<string> x5],
+    "extremely_difficult": [<string> x5]
+  }
+}
+"feedback" holds one point per string (plain text, no markdown bullets). Use an empty "questions" object if the score is below {high}."""
+
+# Staged analysis asks for one part per call; {score} is filled in from the score stage
+STAGES = ('score', 'feedback', 'questions')
+STAGE_INSTRUCTIONS = {
+    'score': """Rate the candidate's fit for the role on a scale of 0-10.
+Respond with a single JSON object and nothing else: {"score": <number from 0 to 10>}""",
+    'feedback': """The candidate was rated {score}/10 for this role. Give detailed feedback on the resume for this role: strengths, gaps and what would improve the fit.
+Respond with a single JSON object and nothing else: {"feedback": [<string>, ...]}
+Use one point per string (plain text, no markdown bullets).""",
+    'questions': """The candidate was rated {score}/10 for this role. Write 20 interview questions tailored to the resume and the role: 5 easy, 5 intermediate, 5 difficult and 5 extremely difficult.
+Respond with a single JSON object and nothing else:
+{"questions": {"easy": [<string> x5], "intermediate": [<string> x5], "difficult": [<string> x5], "extremely_difficult": [<string> x5]}}""",
+}
+
+DIFF_INSTRUCTIONS = """An earlier version of a candidate's resume was rated against the role under "Job Description". The rating, its feedback and the edits made since are under "Resume Changes"; removed lines start with "-", added lines with "+".
+Re-rate the edited resume on a scale of 0-10 and update the feedback to match.
+Respond with a single JSON object and nothing else: {"score": <number from 0 to 10>, "feedback": [<string>, ...]}"""
+
+
+def repair_json(text: str) -> Optional[Dict[str, Any]]:
+    """Parse a JSON object out of a model reply, salvaging truncated or fenced output.
+
+    Anything before the first '{' (code fences, preambles) is ignored. If the
+    object is cut off, open strings and brackets are closed, falling back to
+    the last complete value when the tail can't be closed cleanly.
+    """
+    start = text.find('{')
+    if start < 0:
+        return None
+    text = text[start:]
+    try:
+        value, _ = json.JSONDecoder().raw_decode(text)
+        return value if isinstance(value, dict) else None
+    except ValueError:
+        pass
+
+    stack: List[str] = []
+    in_string = escape = False
+    # (position, closing brackets needed there) at each point the text can be cut cleanly
+    cuts: List[Tuple[int, str]] = []
+    for i, ch in enumerate(text):
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == '\\':
+                escape = True
+            elif ch == '"':
+                in_string = False
+            continue
+        if ch == '"':
+            in_string = True
+        elif ch in '{[':
+            stack.append('}' if ch == '{' else ']')
+            cuts.append((i + 1, ''.join(reversed(stack))))
+        elif ch in '}]':
+            if stack:
+                stack.pop()
+            cuts.append((i + 1, ''.join(reversed(stack))))
+        elif ch == ',':
+            cuts.append((i, ''.join(reversed(stack))))
+
+    # First try keeping everything, closing a dangling string or value
+    tail = text[:-1] if escape else text
+    if in_string:
+        tail += '"'
+    tail = tail.rstrip().rstrip(',')
+    if tail.endswith(':'):
+        tail += ' null'
+    candidates = [tail + ''.join(reversed(stack))]
+    candidates += [text[:position] + closers for position, closers in reversed(cuts[-50:])]
+    for candidate in candidates:
+        try:
+            value = json.loads(candidate)
+        except ValueError:
+            continue
+        if isinstance(value, dict):
+            return value
+    return None
+
+
+def repair_json_sequence(text: str) -> Optional[Dict[str, Any]]:
+    """Merge consecutive JSON objects, as streamed by a staged analysis, repairing a truncated last one."""
+    decoder = json.JSONDecoder()
+    merged: Optional[Dict[str, Any]] = None
+    position = 0
+    while True:
+        start = text.find('{', position)
+        if start < 0:
+            return merged
+        try:
+            value, position = decoder.raw_decode(text, start)
+        except ValueError:
+            value, position = repair_json(text[start:]), len(text)
+        if isinstance(value, dict):
+            merged = {**(merged or {}), **value}
+
+
+def _as_score(value: Any) -> Optional[float]:
+    if isinstance(value, str):
+        match = re.search(r'\d+(?:\.\d+)?', value)
+        value = match.group(0) if match else None
+    try:
+        score = float(value)
+    except (TypeError, ValueError):
+        return None
+    return score if 0 <= score <= 10 else None
+
+
+def _as_list(value: Any) -> List[str]:
+    """Accept a list of strings or a single block of text with one item per line."""
+    if isinstance(value, str):
+        value = value.splitlines()
+    if not isinstance(value, list):
+        return []
+    items = []
+    for item in value:
+        if isinstance(item, dict):
+            item = item.get('question') or item.get('text') or next(iter(item.values()), '')
+        item = re.sub(r'^\s*(?:[-*•]|\d+[.)])\s*', '', str(item)).strip()
+        if item:
+            items.append(item)
+    return items
+
+
+def coerce_analysis(data: Optional[Dict[str, Any]], high_threshold: float) -> Tuple[Dict[str, Any], List[str]]:
+    """Normalize a (possibly partial) reply into score/feedback/questions.
+
+    Returns the fields that could be recovered and the names of those still
+    missing. Questions are only required when the score reaches the high
+    threshold; a question level counts as missing if it has fewer than
+    QUESTIONS_PER_LEVEL entries.
+    """
+    data = data or {}
+    fields: Dict[str, Any] = {}
+    missing: List[str] = []
+
+    score = _as_score(data.get('score'))
+    if score is None:
+        missing.append('score')
+    else:
+        fields['score'] = score
+
+    feedback = _as_list(data.get('feedback'))
+    if feedback:
+        fields['feedback'] = feedback
+    else:
+        missing.append('feedback')
+
+    raw_questions = data.get('questions') if isinstance(data.get('questions'), dict) else {}
+    raw_questions = {re.sub(r'[\s-]+', '_', key.lower()): value for key, value in raw_questions.items()}
+    questions = {level: _as_list(raw_questions.get(level)) for level in QUESTION_LEVELS}
+    fields['questions'] = {level: items for level, items in questions.items() if items}
+    if score is None or score >= high_threshold:
+        missing += [
+            f"questions.{level}" for level, items in questions.items() if len(items) < QUESTIONS_PER_LEVEL
+        ]
+    return fields, missing
+
+
+def merge_analysis(fields: Dict[str, Any], extra: Dict[str, Any]) -> Dict[str, Any]:
+    """Fill gaps in fields from a follow-up reply without overwriting what was already there."""
+    merged = {**extra, **{key: value for key, value in fields.items() if key != 'questions'}}
+    merged['questions'] = {**(extra.get('questions') or {}), **(fields.get('questions') or {})}
+    return merged
+
+
+def reask_prompt(prompt: str, fields: Dict[str, Any], missing: List[str]) -> str:
+    """Build a follow-up prompt asking only for the missing fields of an incomplete reply."""
+    wanted = []
+    for name in missing:
+        if name == 'score':
+            wanted.append('"score": <number from 0 to 10>')
+        elif name == 'feedback':
+            wanted.append('"feedback": [<string>, ...]')
+    levels = [name.split('.', 1)[1] for name in missing if name.startswith('questions.')]
+    if levels:
+        wanted.append('"questions": {' + ', '.join(f'"{level}": [<string> x5]' for level in levels) + '}')
+    return (
+        f"{prompt}\n\n"
+        f"An earlier reply to this request was incomplete. It contained:\n{json.dumps(fields, ensure_ascii=False)}\n\n"
+        "Respond with a single JSON object containing only these keys and nothing else:\n{"
+        + ', '.join(wanted) + "}"
+    )
+
+
+def stage_prompt(context: str, stage: str, score: Optional[float] = None) -> str:
+    """Build a stage prompt. The stage's task goes after the context, so every stage shares the same prefix."""
+    instruction = STAGE_INSTRUCTIONS[stage]
+    if score is not None:
+        instruction = instruction.replace('{score}', f"{score:g}")
+    return f"{context}\n\n{instruction}"
+
+
+def stage_fields(stage: str, data: Optional[Dict[str, Any]], score: Optional[float],
+                 high_threshold: float) -> Tuple[Dict[str, Any], List[str]]:
+    """Pick one stage's field out of its reply; returns it and the names of the parts still missing."""
+    if stage != 'score':
+        data = {**(data or {}), 'score': score}
+    fields, missing = coerce_analysis(data, high_threshold)
+    return (
+        {stage: fields[stage]} if stage in fields else {},
+        [name for name in missing if name.split('.', 1)[0] == stage]
+    )
+
+
+def diff_prompt(job_description: str, previous: Dict[str, Any], changes: List[str]) -> str:
+    """Ask for an updated score and feedback from only the edits made since a resume was last rated."""
+    feedback = '\n'.join(f"- {point}" for point in previous.get('feedback', []))
+    changed = '\n'.join(changes)
+    candidate = f"""Rated {previous['score']:g}/10, with this feedback:
+{feedback}
+
+Edits:
+{changed}"""
+    return render(DIFF_INSTRUCTIONS, job_description, candidate, candidate_header=RESUME_CHANGES_HEADER)
+
+
+def render_markdown(fields: Dict[str, Any]) -> str:
+    """Render an analysis in the markdown layout the free-text prompt asks for."""
+    lines = ["# Resume Analysis", ""]
+    if fields.get('score') is not None:
+        lines += [f"## Score: {fields['score']:g}/10", ""]
+    if fields.get('feedback'):
+        lines += ["## Detailed Feedback", *(f"- {point}" for point in fields['feedback']), ""]
+    questions = fields.get('questions') or {}
+    if any(questions.values()):
+        lines += ["## Interview Questions", ""]
+        for level, title in QUESTION_LEVELS.items():
+            if questions.get(level):
+                lines += [f"### {title}", *(f"{i}. {q}" for i, q in enumerate(questions[level], start=1)), ""]
+    return '\n'.join(lines).rstrip() + '\n'
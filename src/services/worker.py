@@ -0,0 +1,150 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import socket
+import threading
+from typing import Any, Dict, Optional
+from services.job_queue import JobQueue
+from services.pipeline import AnalysisPipeline
+from utils import aio
+from utils.config import config
+from utils.metrics import metrics
+
+logger = logging.getLogger('scoutsense.worker')
+
+
+class Worker:
+    """Claims jobs from the JobQueue and runs them through the async pipeline.
+
+    Up to `concurrency` jobs run at once in one event loop; a heartbeat keeps
+    each job's lease alive while it runs. Job kinds:
+
+    - analyze: payload {file_type, job_url, model_key, use_cache, overrides, consensus}, input = resume bytes
+
+    overrides are the submitting session's model setting overrides;
+    consensus, if set, lists the models to score by consensus. Consensus
+    models on other providers use the worker's api_key_env keys.
+    """
+
+    def __init__(self, queue: Optional[JobQueue] = None, concurrency: Optional[int] = None,
+                 pipeline: Optional[AnalysisPipeline] = None, name: Optional[str] = None):
+        queue_config = config.job_queue
+        self.queue = queue or JobQueue.get_queue()
+        self.concurrency = concurrency or queue_config.get('worker_concurrency', 4)
+        self.poll_interval = queue_config.get('poll_interval', 1.0)
+        self.pipeline = pipeline or AnalysisPipeline()
+        self.name = name or f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+        self.handlers = {'analyze': self.analyze}
+
+    @staticmethod
+    def _api_key(model_key: str, api_key: Optional[str]) -> str:
+        """The key submitted with the job (embedded worker only), or else the worker's own from api_key_env."""
+        if api_key:
+            return api_key
+        provider_config = config.get_provider_config(config.get_provider(model_key))
+        return os.environ.get(provider_config.get('api_key_env', ''), '')
+
+    async def analyze(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        payload = job['payload']
+        with config.overrides(payload.get('overrides')):
+            return await self.pipeline.run(
+                job['input'], payload['file_type'], payload['job_url'], payload['model_key'],
+                self._api_key(payload['model_key'], job['api_key']), payload.get('use_cache', True),
+                payload.get('consensus')
+            )
+
+    async def _heartbeat(self, job_id: str):
+        while True:
+            await asyncio.sleep(self.queue.lease_timeout / 3)
+            await asyncio.to_thread(self.queue.heartbeat, job_id, self.name)
+
+    async def execute(self, job: Dict[str, Any]):
+        """Run one claimed job and store its result, with its stage timings, or its error."""
+        heartbeat = asyncio.create_task(self._heartbeat(job['id']))
+        try:
+            handler = self.handlers.get(job['kind'])
+            if handler is None:
+                raise ValueError(f"unknown job kind: {job['kind']}")
+            with metrics.trace(job['id']):
+                result = await handler(job)
+            result = {**result, 'timings': metrics.events(job['id'])}
+        except Exception as e:
+            logger.warning("Job %s failed: %s", job['id'], e)
+            await asyncio.to_thread(self.queue.fail, job['id'], self.name, str(e))
+        else:
+            await asyncio.to_thread(self.queue.complete, job['id'], self.name, result)
+        finally:
+            heartbeat.cancel()
+
+    async def run(self, stop: Optional[threading.Event] = None, until_idle: bool = False):
+        """Process jobs until stop is set (or, with until_idle, until the queue is empty)."""
+        # Pick up jobs left running by workers that died while this one was down
+        await asyncio.to_thread(self.queue.recover)
+        running = set()
+        while not (stop and stop.is_set()):
+            job = await asyncio.to_thread(self.queue.claim, self.name) if len(running) < self.concurrency else None
+            if job:
+                logger.info("Running job %s (%s, %s)", job['id'], job['kind'], job['label'])
+                task = asyncio.create_task(self.execute(job))
+                running.add(task)
+                task.add_done_callback(running.discard)
+                continue
+            if until_idle and not running:
+                break
+            await asyncio.sleep(self.poll_interval)
+        if running:
+            await asyncio.gather(*running, return_exceptions=True)
+
+
+def _worker_process(concurrency: int, until_idle: bool):
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    try:
+        aio.run(Worker(concurrency=concurrency).run(until_idle=until_idle))
+    except KeyboardInterrupt:
+        pass
+
+
+def run_workers(processes: Optional[int] = None, concurrency: Optional[int] = None, until_idle: bool = False):
+    """Run a pool of worker processes in the foreground until interrupted.
+
+    Parsing is CPU bound and LLM calls are I/O bound, so size processes to
+    CPUs and concurrency to the providers' quotas.
+    """
+    queue_config = config.job_queue
+    processes = processes or queue_config.get('worker_processes') or os.cpu_count() or 1
+    concurrency = concurrency or queue_config.get('worker_concurrency', 4)
+    removed = JobQueue.get_queue().purge(queue_config.get('retention_days', 7) * 86400)
+    if removed:
+        logger.info("Purged %d finished jobs", removed)
+    if processes == 1:
+        _worker_process(concurrency, until_idle)
+        return
+    pool = [
+        multiprocessing.Process(target=_worker_process, args=(concurrency, until_idle), daemon=True)
+        for _ in range(processes)
+    ]
+    for process in pool:
+        process.start()
+    try:
+        for process in pool:
+            process.join()
+    except KeyboardInterrupt:
+        for process in pool:
+            process.terminate()
+
+
+_background: Optional[threading.Thread] = None
+_background_lock = threading.Lock()
+
+
+def start_background_worker() -> threading.Thread:
+    """Start (once per process) a daemon thread that works the queue, for single-server deployments."""
+    global _background
+    with _background_lock:
+        if _background is None or not _background.is_alive():
+            _background = threading.Thread(
+                target=lambda: aio.run(Worker().run()), name='scoutsense-worker', daemon=True
+            )
+            _background.start()
+        return _background
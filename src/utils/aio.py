@@ -0,0 +1,38 @@
+import asyncio
+import logging
+import weakref
+from typing import Any, Awaitable, Callable, Coroutine, List, TypeVar
+
+log = logging.getLogger('scoutsense.aio')
+
+T = TypeVar('T')
+
+# Cleanups to await before each loop started by run() is closed
+_finalizers: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, List[Callable[[], Awaitable[None]]]]' = \
+    weakref.WeakKeyDictionary()
+
+
+def on_loop_close(callback: Callable[[], Awaitable[None]]):
+    """Await callback() in the running loop just before run() closes it.
+
+    Used for clients bound to one loop, such as httpx.AsyncClient, whose
+    sockets would otherwise stay open after the loop is gone. The callback
+    must not hold a reference to the loop.
+    """
+    _finalizers.setdefault(asyncio.get_running_loop(), []).append(callback)
+
+
+async def _main(coro: Coroutine[Any, Any, T]) -> T:
+    try:
+        return await coro
+    finally:
+        for callback in _finalizers.pop(asyncio.get_running_loop(), []):
+            try:
+                await callback()
+            except Exception as e:
+                log.warning("Loop cleanup failed: %s", e)
+
+
+def run(coro: Coroutine[Any, Any, T]) -> T:
+    """asyncio.run() that also closes the clients code registered for its loop with on_loop_close()."""
+    return asyncio.run(_main(coro))
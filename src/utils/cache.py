@@ -0,0 +1,128 @@
+import json
+import sqlite3
+import time
+from contextlib import closing, contextmanager
+from pathlib import Path
+from typing import Any, ContextManager, Dict, Iterator, Optional
+
+CACHE_ROOT = Path(__file__).parent.parent.parent
+
+
+@contextmanager
+def connect(path: Path) -> Iterator[sqlite3.Connection]:
+    """A connection for one transaction: committed on success, rolled back on error, then closed.
+
+    sqlite3's own context manager ends the transaction but leaves the connection open.
+    """
+    with closing(sqlite3.connect(path, timeout=30)) as conn, conn:
+        yield conn
+
+
+class DiskCache:
+    """SQLite-backed key/value store with size-bounded LRU eviction.
+
+    A fresh connection is opened per operation so the cache is safe to share
+    between threads and worker processes.
+    """
+
+    def __init__(self, path: str, max_size_mb: Optional[float] = None):
+        self.path = Path(path)
+        if not self.path.is_absolute():
+            self.path = CACHE_ROOT / self.path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_size_bytes = int(max_size_mb * 1024 * 1024) if max_size_mb else None
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+                "created REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+            conn.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+
+    def _connect(self) -> ContextManager[sqlite3.Connection]:
+        return connect(self.path)
+
+    def _count(self, conn: sqlite3.Connection, name: str, amount: int = 1):
+        conn.execute(
+            "INSERT INTO counters (name, value) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+            (name, amount)
+        )
+
+    def incr(self, name: str, amount: int = 1):
+        """Add to a named persistent counter."""
+        with self._connect() as conn:
+            self._count(conn, name, amount)
+
+    def counters(self) -> Dict[str, int]:
+        """Get all persistent counters."""
+        with self._connect() as conn:
+            return dict(conn.execute("SELECT name, value FROM counters").fetchall())
+
+    def get(self, key: str, max_age: Optional[float] = None) -> Optional[Any]:
+        """Return the cached value, or None if missing or older than max_age seconds."""
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute("SELECT value, created FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None or (max_age is not None and now - row[1] > max_age):
+                self._count(conn, 'misses')
+                return None
+            conn.execute("UPDATE entries SET accessed = ? WHERE key = ?", (now, key))
+            self._count(conn, 'hits')
+        return json.loads(row[0])
+
+    def peek(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the value and its creation time without touching LRU order or counters."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT value, created FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        return {'value': json.loads(row[0]), 'created': row[1]}
+
+    def set(self, key: str, value: Any):
+        """Store a JSON-serializable value and evict least recently used entries if over budget."""
+        payload = json.dumps(value)
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, payload, len(payload.encode('utf-8')), now, now)
+            )
+            if self.max_size_bytes:
+                self._evict(conn)
+
+    def _evict(self, conn: sqlite3.Connection):
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_size_bytes:
+            return
+        for key, size in conn.execute("SELECT key, size FROM entries ORDER BY accessed").fetchall():
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self._count(conn, 'evictions')
+            total -= size
+            if total <= self.max_size_bytes:
+                break
+
+    def delete(self, key: str):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def clear(self):
+        """Drop all entries and reset counters."""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM entries")
+            conn.execute("DELETE FROM counters")
+
+    def stats(self) -> Dict[str, int]:
+        """Get hit/miss/eviction counters plus entry count and total size."""
+        with self._connect() as conn:
+            counters = dict(conn.execute("SELECT name, value FROM counters").fetchall())
+            entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        return {
+            'hits': counters.get('hits', 0),
+            'misses': counters.get('misses', 0),
+            'evictions': counters.get('evictions', 0),
+            'entries': entries,
+            'size_bytes': size,
+        }
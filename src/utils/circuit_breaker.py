@@ -0,0 +1,80 @@
+import threading
+import time
+from typing import Optional, Union
+
+
+class Trial:
+    """The one call a half-open CircuitBreaker lets through; truthy like any other admission."""
+
+    __slots__ = ()
+
+
+class CircuitBreaker:
+    """Stops calling a failing backend for a while.
+
+    After failure_threshold consecutive failures the circuit opens and
+    allow() refuses calls for reset_timeout seconds. Then one trial call is
+    let through (half-open). Its success closes the circuit again, and its
+    failure re-opens it. A trial that ends without an outcome (cancelled,
+    or never sent) is handed back with release(); one that is never heard
+    from again is given up on after another reset_timeout.
+
+    allow() returns a Trial for the trial call, so only its caller can
+    hand it back; calls admitted while closed get plain True.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 60.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_at = 0.0
+        self._trial: Optional[Trial] = None
+        self._state = self.CLOSED
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def allow(self) -> Union[bool, Trial]:
+        """Whether a call may be attempted now: True, the half-open Trial, or False."""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            now = time.monotonic()
+            if self._state == self.OPEN and now - self._opened_at >= self.reset_timeout or \
+                    self._state == self.HALF_OPEN and now - self._trial_at >= self.reset_timeout:
+                # Let exactly one trial call through
+                self._state = self.HALF_OPEN
+                self._trial_at = now
+                self._trial = Trial()
+                return self._trial
+            return False
+
+    def release(self, trial: Trial):
+        """Hand back a trial call that ended without success or failure, so the next call can be the trial.
+
+        Does nothing if the trial has since been settled or replaced.
+        """
+        with self._lock:
+            if self._state == self.HALF_OPEN and trial is self._trial:
+                self._state = self.OPEN
+                self._trial = None
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._state = self.CLOSED
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
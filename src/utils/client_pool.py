@@ -0,0 +1,85 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+
+class ClientPool:
+    """Thread-safe LRU of API clients keyed by API key.
+
+    Clients are built on first use by factory(key). Beyond max_size the
+    least recently used client is evicted, as is any client unused for
+    idle_timeout seconds. Evicted clients are passed to close (outside the
+    lock), so their connections are released.
+    """
+
+    def __init__(self, factory: Callable[[Hashable], Any], max_size: int = 32,
+                 idle_timeout: Optional[float] = 600, close: Optional[Callable[[Any], None]] = None):
+        self.factory = factory
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self._close = close
+        self._clients: 'OrderedDict[Hashable, List[Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.created = 0
+        self.evicted = 0
+
+    def _expired(self, now: float) -> List[Any]:
+        """Pop clients over the size limit or idle too long. Caller holds the lock."""
+        evicted = []
+        while self._clients:
+            key, (client, last_used) = next(iter(self._clients.items()))
+            idle = self.idle_timeout is not None and now - last_used > self.idle_timeout
+            if len(self._clients) <= self.max_size and not idle:
+                break
+            del self._clients[key]
+            evicted.append(client)
+        self.evicted += len(evicted)
+        return evicted
+
+    def _release(self, clients: List[Any]):
+        if self._close:
+            for client in clients:
+                try:
+                    self._close(client)
+                except Exception:
+                    pass
+
+    def get(self, key: Hashable) -> Any:
+        """Get the client for a key, building it if needed."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._clients.get(key)
+            if entry is None:
+                entry = self._clients[key] = [self.factory(key), now]
+                self.created += 1
+            entry[1] = now
+            self._clients.move_to_end(key)
+            evicted = self._expired(now)
+        self._release(evicted)
+        return entry[0]
+
+    def evict_idle(self) -> int:
+        """Close clients idle longer than idle_timeout. Returns how many were evicted."""
+        with self._lock:
+            evicted = self._expired(time.monotonic())
+        self._release(evicted)
+        return len(evicted)
+
+    def clear(self) -> List[Any]:
+        """Drop every client without closing it, returning them for callers that close them asynchronously."""
+        with self._lock:
+            clients = [client for client, _ in self._clients.values()]
+            self._clients.clear()
+        return clients
+
+    def close(self):
+        """Close and drop every client."""
+        self._release(self.clear())
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._clients)
+
+    def stats(self) -> Dict[str, int]:
+        return {'clients': len(self), 'created': self.created, 'evicted': self.evicted}
@@ -1,54 +1,243 @@
+import contextvars
+import logging
+import threading
+import time
 import yaml
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict, Any
+from typing import Callable, Dict, Any, Iterable, List, Optional
+from models.schemas import AppSettings
+
+log = logging.getLogger('scoutsense.config')
+
+# Per-session model setting overrides: {model_key: {setting: value}}
+_overrides = contextvars.ContextVar('scoutsense_config_overrides', default=None)
 
 class Config:
+    """Process-wide view of config.yaml.
+
+    The file is validated into models.schemas.AppSettings and reloaded when
+    its mtime changes (checked at most every RELOAD_INTERVAL seconds); an
+    invalid edit is logged and the previous config kept. Sections are
+    still handed out as plain dicts. Code that builds long-lived objects
+    from a section (provider clients, caches) registers with on_reload() to
+    rebuild them when that section changes. Model settings can be
+    overridden per session with overrides()/set_overrides(), without
+    touching the file.
+    """
+
     _instance = None
     _config = None
+    RELOAD_INTERVAL = 1.0
 
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(Config, cls).__new__(cls)
+            cls._instance._path = Path(__file__).parent.parent.parent / 'config.yaml'
+            cls._instance._lock = threading.Lock()
+            cls._instance._mtime = None
+            cls._instance._checked = time.monotonic()
+            cls._instance._callbacks = []
             cls._instance._load_config()
         return cls._instance
 
     def _load_config(self):
-        """Load configuration from config.yaml file."""
-        config_path = Path(__file__).parent.parent.parent / 'config.yaml'
+        """Load and validate configuration from config.yaml file."""
         try:
-            with open(config_path, 'r') as file:
-                self._config = yaml.safe_load(file)
+            mtime = self._path.stat().st_mtime_ns
+            with open(self._path, 'r') as file:
+                raw = yaml.safe_load(file) or {}
+            settings = AppSettings.model_validate(raw)
         except Exception as e:
             raise Exception(f"Error loading config file: {str(e)}")
 
+        # Build the lookups before swapping anything in, so readers never see a half-loaded config
+        model_keys = {model.display_name: key for key, model in settings.models.items()}
+        allowed = frozenset(settings.file_types.allowed)
+        self._config, self._settings, self._mtime = raw, settings, mtime
+        self._model_keys, self._allowed = model_keys, allowed
+
+    def reload(self) -> bool:
+        """Reload config.yaml now. Returns False (keeping the current config) if it is invalid."""
+        with self._lock:
+            previous = self._config
+            try:
+                self._load_config()
+            except Exception as e:
+                # Don't retry the same broken file on every access
+                self._mtime = self._path.stat().st_mtime_ns if self._path.exists() else None
+                log.warning("Keeping the previous configuration: %s", e)
+                return False
+            changed = {name for name in {*previous, *self._config} if previous.get(name) != self._config.get(name)}
+            callbacks = [callback for sections, callback in self._callbacks if changed.intersection(sections)]
+        log.info("Reloaded %s", self._path)
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                log.warning("Reload callback %r failed: %s", callback, e)
+        return True
+
+    def on_reload(self, sections: Iterable[str], callback: Callable[[], None]):
+        """Call callback() after a reload that changed any of the given top-level sections."""
+        with self._lock:
+            self._callbacks.append((tuple(sections), callback))
+
+    def _maybe_reload(self):
+        now = time.monotonic()
+        if now - self._checked < self.RELOAD_INTERVAL:
+            return
+        self._checked = now
+        try:
+            mtime = self._path.stat().st_mtime_ns
+        except OSError:
+            return
+        if mtime != self._mtime:
+            self.reload()
+
+    def _section(self, name: str) -> Dict[str, Any]:
+        self._maybe_reload()
+        return self._config.get(name, {})
+
+    @property
+    def settings(self) -> AppSettings:
+        """Get the validated, typed configuration."""
+        self._maybe_reload()
+        return self._settings
+
+    @contextmanager
+    def overrides(self, model_overrides: Optional[Dict[str, Dict[str, Any]]]):
+        """Apply per-model setting overrides to get_model_config() inside the block (and tasks it starts)."""
+        token = _overrides.set(model_overrides or None)
+        try:
+            yield
+        finally:
+            _overrides.reset(token)
+
+    def set_overrides(self, model_overrides: Optional[Dict[str, Dict[str, Any]]]):
+        """Apply overrides for the rest of the current context, e.g. one Streamlit script run."""
+        _overrides.set(model_overrides or None)
+
+    def get_overrides(self) -> Dict[str, Dict[str, Any]]:
+        """Get the model setting overrides active in the current context."""
+        return _overrides.get() or {}
+
     @property
     def models(self) -> Dict[str, Any]:
         """Get AI models configuration."""
-        return self._config.get('models', {})
+        return self._section('models')
+
+    @property
+    def providers(self) -> Dict[str, Any]:
+        """Get LLM provider configuration."""
+        return self._section('providers')
 
     @property
     def ui(self) -> Dict[str, Any]:
         """Get UI configuration."""
-        return self._config.get('ui', {})
+        return self._section('ui')
 
     @property
     def scoring(self) -> Dict[str, Any]:
         """Get scoring configuration."""
-        return self._config.get('scoring', {})
+        return self._section('scoring')
 
     @property
     def file_types(self) -> Dict[str, Any]:
         """Get file types configuration."""
-        return self._config.get('file_types', {})
+        return self._section('file_types')
 
     @property
     def scraping(self) -> Dict[str, Any]:
         """Get web scraping configuration."""
-        return self._config.get('scraping', {})
+        return self._section('scraping')
+
+    @property
+    def cache(self) -> Dict[str, Any]:
+        """Get on-disk cache configuration."""
+        return self._section('cache')
+
+    @property
+    def compaction(self) -> Dict[str, Any]:
+        """Get prompt compaction configuration."""
+        return self._section('compaction')
+
+    @property
+    def pipeline(self) -> Dict[str, Any]:
+        """Get async pipeline configuration."""
+        return self._section('pipeline')
+
+    @property
+    def metrics(self) -> Dict[str, Any]:
+        """Get instrumentation/metrics configuration."""
+        return self._section('metrics')
+
+    @property
+    def batch(self) -> Dict[str, Any]:
+        """Get batch processing configuration."""
+        return self._section('batch')
+
+    @property
+    def resilience(self) -> Dict[str, Any]:
+        """Get retry, circuit breaker and failover configuration."""
+        return self._section('resilience')
+
+    @property
+    def analysis(self) -> Dict[str, Any]:
+        """Get analysis output configuration."""
+        return self._section('analysis')
+
+    @property
+    def job_store(self) -> Dict[str, Any]:
+        """Get saved job posting store configuration."""
+        return self._section('job_store')
+
+    @property
+    def job_queue(self) -> Dict[str, Any]:
+        """Get background job queue and worker configuration."""
+        return self._section('job_queue')
+
+    @property
+    def consensus(self) -> Dict[str, Any]:
+        """Get multi-model consensus scoring configuration."""
+        return self._section('consensus')
+
+    @property
+    def dedup(self) -> Dict[str, Any]:
+        """Get resume deduplication configuration."""
+        return self._section('dedup')
+
+    @property
+    def prescreen(self) -> Dict[str, Any]:
+        """Get embedding pre-screen configuration."""
+        return self._section('prescreen')
 
     def get_model_config(self, model_name: str) -> Dict[str, Any]:
-        """Get configuration for a specific model."""
-        return self.models.get(model_name, {})
+        """Get configuration for a specific model, with this context's overrides applied."""
+        model_config = self.models.get(model_name, {})
+        overrides = (_overrides.get() or {}).get(model_name)
+        return {**model_config, **overrides} if overrides and model_config else model_config
+
+    def model_key_for(self, display_name: str) -> Optional[str]:
+        """Get the model key for a display name."""
+        self._maybe_reload()
+        return self._model_keys.get(display_name)
+
+    def display_names(self) -> List[str]:
+        """Get model display names in config order."""
+        self._maybe_reload()
+        return list(self._model_keys)
+
+    def get_provider(self, model_name: str) -> str:
+        """Get the provider name for a model, inferring openai/gemini for legacy entries."""
+        provider = self.get_model_config(model_name).get('provider')
+        if provider:
+            return provider
+        return 'openai' if 'gpt' in model_name else 'gemini'
+
+    def get_provider_config(self, provider_name: str) -> Dict[str, Any]:
+        """Get configuration for a specific LLM provider."""
+        return self.providers.get(provider_name, {})
 
     def get_mime_type(self, file_ext: str) -> str:
         """Get mime type for a file extension."""
@@ -56,18 +245,18 @@ class Config:
 
     def is_allowed_file_type(self, file_ext: str) -> bool:
         """Check if file type is allowed."""
-        return file_ext in self.file_types.get('allowed', [])
+        self._maybe_reload()
+        return file_ext in self._allowed
 
     def get_score_color(self, score: float) -> str:
         """Get color based on score thresholds."""
-        thresholds = self.scoring.get('thresholds', {})
-        colors = self.scoring.get('colors', {})
+        scoring = self.settings.scoring
         
-        if score >= thresholds.get('high', 7):
-            return colors.get('high', 'green')
-        elif score >= thresholds.get('medium', 5):
-            return colors.get('medium', 'orange')
-        return colors.get('low', 'red')
+        if score >= scoring.thresholds.high:
+            return scoring.colors.high
+        elif score >= scoring.thresholds.medium:
+            return scoring.colors.medium
+        return scoring.colors.low
 
 # Create a singleton instance
 config = Config()
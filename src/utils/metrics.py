@@ -0,0 +1,234 @@
+import asyncio
+import contextvars
+import functools
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from utils.config import config
+
+log = logging.getLogger('scoutsense.metrics')
+_trace_id = contextvars.ContextVar('scoutsense_trace_id', default=None)
+_current_event = contextvars.ContextVar('scoutsense_current_event', default=None)
+
+# Numeric fields summed into Prometheus counters. cached_tokens / cache_reported_tokens is the share
+# of prompt tokens served from provider prefix caches, over the calls whose provider reports it.
+COUNTED_FIELDS = (
+    'bytes_in', 'prompt_tokens', 'cached_tokens', 'cache_reported_tokens', 'completion_tokens',
+    'retries', 'wait_ms', 'work_ms',
+)
+
+
+class Metrics:
+    """Thread-safe recorder of per-stage timings for the parse/scrape/analyze hot path.
+
+    Each finished stage becomes an event dict (stage, wall_ms, bytes_in,
+    prompt/completion tokens, cache status, retries, ok). Events are kept in
+    a bounded ring for the UI, aggregated for Prometheus, and written as
+    JSON lines when a log file is configured.
+    """
+
+    def __init__(self, max_events: int = 1000):
+        self._events = deque(maxlen=max_events)
+        self._totals: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+        self._json_handler_path = None
+        self._server = None
+
+    @contextmanager
+    def trace(self, trace_id: Optional[str] = None):
+        """Tag every event recorded inside the block (including in to_thread workers) with one ID."""
+        trace_id = trace_id or uuid.uuid4().hex[:12]
+        token = _trace_id.set(trace_id)
+        try:
+            yield trace_id
+        finally:
+            _trace_id.reset(token)
+
+    @contextmanager
+    def timer(self, stage: str, **fields):
+        """Time a stage. The yielded dict can be filled with extra fields before the block ends."""
+        event = {'stage': stage, **fields}
+        token = _current_event.set(event)
+        start = time.perf_counter()
+        try:
+            yield event
+        except BaseException:
+            event['ok'] = False
+            raise
+        finally:
+            event['wall_ms'] = round((time.perf_counter() - start) * 1000, 2)
+            event.setdefault('ok', True)
+            _current_event.reset(token)
+            self.record(event)
+
+    def annotate(self, **fields):
+        """Add fields (cache status, tokens, bytes...) to the innermost running timer, if any."""
+        event = _current_event.get()
+        if event is not None:
+            event.update(fields)
+
+    def current(self) -> Optional[Dict[str, Any]]:
+        """The innermost running timer's event, or None outside one."""
+        return _current_event.get()
+
+    def add(self, **amounts):
+        """Accumulate numeric fields (retries, wait_ms...) on the innermost running timer, if any."""
+        event = _current_event.get()
+        if event is not None:
+            for name, amount in amounts.items():
+                event[name] = round(event.get(name, 0) + amount, 2)
+
+    @contextmanager
+    def bind(self, event: Dict[str, Any]):
+        """Route annotate()/add() calls inside the block to an event that is recorded by hand."""
+        token = _current_event.set(event)
+        try:
+            yield event
+        finally:
+            _current_event.reset(token)
+
+    def timed(self, stage: str):
+        """Decorator that times a sync or async function as a stage.
+
+        Follows the services' convention that a None result means failure.
+        """
+        def decorator(func):
+            if asyncio.iscoroutinefunction(func):
+                @functools.wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    with self.timer(stage) as event:
+                        result = await func(*args, **kwargs)
+                        event.setdefault('ok', result is not None)
+                        return result
+                return async_wrapper
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.timer(stage) as event:
+                    result = func(*args, **kwargs)
+                    event.setdefault('ok', result is not None)
+                    return result
+            return wrapper
+        return decorator
+
+    def record(self, event: Dict[str, Any]):
+        event.setdefault('ts', time.time())
+        event.setdefault('trace_id', _trace_id.get())
+        with self._lock:
+            self._events.append(event)
+            labels = (event['stage'], event.get('cache') or 'none', 'ok' if event.get('ok', True) else 'error')
+            self._add(('count',) + labels, 1)
+            self._add(('seconds',) + labels, event.get('wall_ms', 0) / 1000)
+            for name in COUNTED_FIELDS:
+                if event.get(name):
+                    self._add((name, event['stage']), event[name])
+        self._log(event)
+
+    def _add(self, key: tuple, amount: float):
+        self._totals[key] = self._totals.get(key, 0) + amount
+
+    def _log(self, event: Dict[str, Any]):
+        path = config.metrics.get('json_log')
+        if path and self._json_handler_path != path:
+            path = Path(path)
+            if not path.is_absolute():
+                path = Path(__file__).parent.parent.parent / path
+            path.parent.mkdir(parents=True, exist_ok=True)
+            handler = logging.FileHandler(path, encoding='utf-8')
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            log.addHandler(handler)
+            log.setLevel(logging.INFO)
+            log.propagate = False
+            self._json_handler_path = config.metrics.get('json_log')
+        if log.handlers:
+            log.info(json.dumps(event, default=str))
+
+    def events(self, trace_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get recent events, optionally only those from one trace."""
+        with self._lock:
+            events = list(self._events)
+        if trace_id:
+            events = [e for e in events if e.get('trace_id') == trace_id]
+        return events
+
+    def prometheus(self) -> str:
+        """Render the aggregated totals in Prometheus text exposition format."""
+        with self._lock:
+            totals = dict(self._totals)
+        lines = [
+            '# HELP scoutsense_stage_total Completed pipeline stages.',
+            '# TYPE scoutsense_stage_total counter',
+        ]
+        for key, value in sorted(totals.items()):
+            if key[0] == 'count':
+                lines.append(f'scoutsense_stage_total{{stage="{key[1]}",cache="{key[2]}",status="{key[3]}"}} {int(value)}')
+        lines += [
+            '# HELP scoutsense_stage_seconds_total Wall time spent in pipeline stages.',
+            '# TYPE scoutsense_stage_seconds_total counter',
+        ]
+        for key, value in sorted(totals.items()):
+            if key[0] == 'seconds':
+                lines.append(f'scoutsense_stage_seconds_total{{stage="{key[1]}",cache="{key[2]}",status="{key[3]}"}} {value:.6f}')
+        for name in COUNTED_FIELDS:
+            metric = f'scoutsense_{name}_total'
+            lines += [f'# TYPE {metric} counter']
+            for key, value in sorted(totals.items()):
+                if key[0] == name:
+                    lines.append(f'{metric}{{stage="{key[1]}"}} {int(value)}')
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path: Optional[str] = None):
+        """Atomically write the Prometheus text file (for node_exporter's textfile collector)."""
+        path = Path(path or config.metrics.get('prometheus_file', '.cache/metrics.prom'))
+        if not path.is_absolute():
+            path = Path(__file__).parent.parent.parent / path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(path.suffix + '.tmp')
+        tmp.write_text(self.prometheus(), encoding='utf-8')
+        os.replace(tmp, path)
+
+    def serve_prometheus(self, port: int, host: str = '127.0.0.1'):
+        """Expose /metrics over HTTP from a daemon thread."""
+        import http.server
+
+        metrics = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                body = metrics.prometheus().encode()
+                self.send_response(200 if self.path.startswith('/metrics') else 404)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        server = http.server.ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+    def start_exporter(self):
+        """Start the /metrics endpoint once per process if prometheus_port is configured."""
+        port = config.metrics.get('prometheus_port')
+        with self._lock:
+            if port and self._server is None:
+                self._server = self.serve_prometheus(int(port))
+        return self._server
+
+    def export(self):
+        """Write the Prometheus text file if one is configured."""
+        if config.metrics.get('prometheus_file'):
+            self.write_prometheus()
+
+
+# Create a singleton instance
+metrics = Metrics()
@@ -0,0 +1,72 @@
+import asyncio
+import threading
+import time
+from typing import Optional
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at a per-minute rate.
+
+    Reservations may drive the bucket negative; the deficit is the time the
+    caller has to wait, so concurrent callers queue fairly without holding
+    the lock while they sleep.
+    """
+
+    def __init__(self, per_minute: float, capacity: Optional[float] = None):
+        self.rate = per_minute / 60.0
+        # Default burst: ten seconds' worth of budget
+        self.capacity = capacity or max(1.0, per_minute / 6)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def reserve(self, amount: float, now: float) -> float:
+        """Take amount from the bucket and return the seconds until it is covered. Caller holds the lock."""
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        # A single request larger than the bucket only has to wait for a full bucket
+        self._tokens -= min(amount, self.capacity)
+        return max(0.0, -self._tokens / self.rate)
+
+
+class RateLimiter:
+    """Thread-safe per-provider limiter for requests and tokens per minute.
+
+    A limit of 0 disables that dimension. penalize() pauses every caller,
+    e.g. for the Retry-After of a 429 response.
+    """
+
+    def __init__(self, requests_per_minute: float = 0, tokens_per_minute: float = 0):
+        self._requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self._tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens: int = 0) -> float:
+        """Reserve one request (and its estimated tokens) and return the seconds to wait before sending."""
+        with self._lock:
+            now = time.monotonic()
+            wait = max(0.0, self._blocked_until - now)
+            if self._requests:
+                wait = max(wait, self._requests.reserve(1, now))
+            if self._tokens and tokens:
+                wait = max(wait, self._tokens.reserve(tokens, now))
+        return wait
+
+    def acquire(self, tokens: int = 0) -> float:
+        """Block until the request may be sent and return the seconds waited."""
+        wait = self.reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self, tokens: int = 0) -> float:
+        """Async variant of acquire()."""
+        wait = self.reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def penalize(self, seconds: float):
+        """Hold back all callers for the given number of seconds."""
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
@@ -0,0 +1,86 @@
+import logging
+from contextvars import ContextVar, Token
+
+logger = logging.getLogger('scoutsense')
+
+
+class Reporter:
+    """Destination for user-facing status messages from the services.
+
+    The default implementation writes to the standard logging module so the
+    services can run headless; the Streamlit app installs StreamlitReporter.
+    """
+
+    def info(self, message: str):
+        logger.info(message)
+
+    def success(self, message: str):
+        logger.info(message)
+
+    def warning(self, message: str):
+        logger.warning(message)
+
+    def error(self, message: str):
+        logger.error(message)
+
+
+class StreamlitReporter(Reporter):
+    """Render status messages as Streamlit alerts.
+
+    Messages from threads without a Streamlit script context (worker
+    threads, asyncio.to_thread calls that copied the context variable) go
+    to logging instead.
+    """
+
+    def __init__(self):
+        import streamlit as st
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        self._st = st
+        self._get_ctx = get_script_run_ctx
+
+    def _alert(self, level: str, message: str):
+        if self._get_ctx(suppress_warning=True) is None:
+            getattr(super(), level)(message)
+        else:
+            getattr(self._st, level)(message)
+
+    def info(self, message: str):
+        self._alert('info', message)
+
+    def success(self, message: str):
+        self._alert('success', message)
+
+    def warning(self, message: str):
+        self._alert('warning', message)
+
+    def error(self, message: str):
+        self._alert('error', message)
+
+
+# Per thread (and per asyncio task): only the Streamlit script thread installs StreamlitReporter
+_reporter: ContextVar[Reporter] = ContextVar('reporter', default=Reporter())
+
+
+def get_reporter() -> Reporter:
+    return _reporter.get()
+
+
+def set_reporter(reporter: Reporter) -> Token:
+    """Route service messages from the current thread or task to the given reporter."""
+    return _reporter.set(reporter)
+
+
+def info(message: str):
+    _reporter.get().info(message)
+
+
+def success(message: str):
+    _reporter.get().success(message)
+
+
+def warning(message: str):
+    _reporter.get().warning(message)
+
+
+def error(message: str):
+    _reporter.get().error(message)
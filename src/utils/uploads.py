@@ -0,0 +1,139 @@
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from typing import BinaryIO, Iterator, Optional, Union
+from models.schemas import UploadLimits
+from utils.config import config
+
+CHUNK_SIZE = 64 * 1024
+
+# Resume content as bytes, a path (str or Path), or a binary file object (an
+# open file, a Streamlit UploadedFile...). Paths and file objects are read in place.
+Source = Union[bytes, str, os.PathLike, BinaryIO]
+
+
+class DocumentTooLargeError(ValueError):
+    """Raised when a document is over the configured file size or page limit."""
+
+
+def limits() -> UploadLimits:
+    return config.settings.file_types.limits
+
+
+def max_bytes() -> Optional[int]:
+    """The largest accepted file in bytes, or None for no limit."""
+    max_file_mb = limits().max_file_mb
+    return int(max_file_mb * 2 ** 20) if max_file_mb else None
+
+
+def check_size(size: int):
+    """Raise DocumentTooLargeError if a file of this many bytes is over the limit."""
+    limit = max_bytes()
+    if limit and size > limit:
+        raise DocumentTooLargeError(f"file is {size / 2 ** 20:.1f} MB, over the {limit / 2 ** 20:g} MB limit")
+
+
+def check_pages(pages: int):
+    """Raise DocumentTooLargeError if a document with this many pages is over the limit."""
+    limit = limits().max_pages
+    if limit and pages > limit:
+        raise DocumentTooLargeError(f"document has {pages} pages, over the {limit} page limit")
+
+
+def size(fileobj: BinaryIO) -> int:
+    """Size of a seekable file, leaving its position unchanged."""
+    position = fileobj.tell()
+    end = fileobj.seek(0, os.SEEK_END)
+    fileobj.seek(position)
+    return end
+
+
+def _seekable(fileobj: BinaryIO) -> bool:
+    try:
+        return fileobj.seekable()
+    except (AttributeError, ValueError):
+        return False
+
+
+def spool(stream: BinaryIO) -> BinaryIO:
+    """Copy a non-seekable stream into memory, moving to a temporary file past spool_memory_kb.
+
+    Reads in chunks and raises DocumentTooLargeError as soon as the size
+    limit is passed, without reading the rest.
+    """
+    memory_limit = limits().spool_memory_kb * 1024
+    spooled = io.BytesIO()
+    written = 0
+    try:
+        for chunk in iter(lambda: stream.read(CHUNK_SIZE), b''):
+            written += len(chunk)
+            check_size(written)
+            if isinstance(spooled, io.BytesIO) and written > memory_limit:
+                on_disk = tempfile.TemporaryFile()
+                on_disk.write(spooled.getbuffer())
+                spooled = on_disk
+            spooled.write(chunk)
+    except BaseException:
+        spooled.close()
+        raise
+    spooled.seek(0)
+    return spooled
+
+
+@contextmanager
+def open_source(source: Source) -> Iterator[BinaryIO]:
+    """Open a Source for reading from the start, rejecting it if it is over the size limit.
+
+    Bytes are wrapped without copying, paths are opened, seekable file
+    objects are used in place and anything else (a pipe or socket) is
+    spooled. Files opened here are closed on exit; the caller's are not.
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        check_size(len(source))
+        yield io.BytesIO(source)
+        return
+    if isinstance(source, (str, os.PathLike)):
+        check_size(os.path.getsize(source))
+        with open(source, 'rb') as fileobj:
+            yield fileobj
+        return
+    if not _seekable(source):
+        spooled = spool(source)
+        try:
+            yield spooled
+        finally:
+            spooled.close()
+        return
+    check_size(size(source))
+    source.seek(0)
+    yield source
+
+
+def digest(fileobj: BinaryIO) -> str:
+    """sha256 of a file's contents, read in chunks. Leaves the file at its start."""
+    fileobj.seek(0)
+    sha = hashlib.sha256()
+    for chunk in iter(lambda: fileobj.read(CHUNK_SIZE), b''):
+        sha.update(chunk)
+    fileobj.seek(0)
+    return sha.hexdigest()
+
+
+@contextmanager
+def on_disk(fileobj: BinaryIO, suffix: str = '') -> Iterator[str]:
+    """A filesystem path holding the file's contents: its own if it is an open regular file, else a temporary copy."""
+    if isinstance(fileobj, (io.BufferedReader, io.FileIO)) and isinstance(fileobj.name, str) \
+            and os.path.isfile(fileobj.name):
+        yield fileobj.name
+        return
+    fileobj.seek(0)
+    with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as copy:
+        shutil.copyfileobj(fileobj, copy, CHUNK_SIZE)
+    fileobj.seek(0)
+    try:
+        yield copy.name
+    finally:
+        os.unlink(copy.name)
@@ -0,0 +1,129 @@
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from utils.cache import CACHE_ROOT
+
+
+class VectorIndex:
+    """Append-only matrix of float32 vectors keyed by string, persisted as .npy.
+
+    The matrix is memory-mapped read-only on load, so opening a large index is
+    cheap and rows are only paged in when scored. Per-dimension document
+    frequencies are kept alongside for TF-IDF weighting. Writes rewrite the
+    file and atomically swap it in, so readers never see a partial index.
+    """
+
+    def __init__(self, path: str, dimension: int, signature: str):
+        self.path = Path(path)
+        if not self.path.is_absolute():
+            self.path = CACHE_ROOT / self.path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.dimension = dimension
+        self.signature = signature
+        self._lock = threading.Lock()
+        self._keys: List[str] = []
+        self._positions: Dict[str, int] = {}
+        self._vectors = np.zeros((0, dimension), dtype=np.float32)
+        self._doc_freq = np.zeros(dimension, dtype=np.float32)
+        self._load()
+
+    @property
+    def _meta_path(self) -> Path:
+        return self.path.with_suffix('.json')
+
+    @property
+    def _df_path(self) -> Path:
+        return self.path.with_suffix('.df.npy')
+
+    def _load(self):
+        """Open an existing index, ignoring it if it was built by a different embedder."""
+        try:
+            meta = json.loads(self._meta_path.read_text())
+            if meta.get('signature') != self.signature or meta.get('dimension') != self.dimension:
+                return
+            vectors = np.load(self.path, mmap_mode='r')
+            doc_freq = np.load(self._df_path)
+        except (OSError, ValueError):
+            return
+        if vectors.shape != (len(meta['keys']), self.dimension):
+            return
+        self._vectors = vectors
+        self._doc_freq = doc_freq
+        self._keys = list(meta['keys'])
+        self._positions = {key: i for i, key in enumerate(self._keys)}
+
+    def _save(self):
+        for path, array in ((self.path, self._vectors), (self._df_path, self._doc_freq)):
+            tmp = path.with_name(path.name + '.tmp')
+            with open(tmp, 'wb') as f:
+                np.save(f, array)
+            os.replace(tmp, path)
+        tmp = self._meta_path.with_name(self._meta_path.name + '.tmp')
+        tmp.write_text(json.dumps({'signature': self.signature, 'dimension': self.dimension, 'keys': self._keys}))
+        os.replace(tmp, self._meta_path)
+        self._vectors = np.load(self.path, mmap_mode='r')
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._positions
+
+    def add(self, items: Iterable[Tuple[str, np.ndarray]]):
+        """Append vectors for keys not already indexed, then persist once."""
+        with self._lock:
+            new = [(key, vector) for key, vector in items if key not in self._positions]
+            if not new:
+                return
+            block = np.asarray([vector for _, vector in new], dtype=np.float32)
+            for key, _ in new:
+                self._positions[key] = len(self._keys)
+                self._keys.append(key)
+            self._vectors = np.concatenate([self._vectors, block])
+            self._doc_freq = self._doc_freq + (block > 0).sum(axis=0)
+            self._save()
+
+    def idf(self) -> np.ndarray:
+        """Smoothed inverse document frequency per dimension."""
+        return np.log((1 + len(self)) / (1 + self._doc_freq)) + 1
+
+    @staticmethod
+    def _normalize(matrix: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+        return matrix / np.where(norms == 0, 1, norms)
+
+    def similarities(self, query: np.ndarray, keys: Optional[List[str]] = None,
+                     weights: Optional[np.ndarray] = None, block_size: int = 4096) -> np.ndarray:
+        """Cosine similarity of the query to the given keys (or every row), in that order.
+
+        Rows are scored in blocks so a memory-mapped index never has to be
+        fully resident.
+        """
+        with self._lock:
+            vectors = self._vectors
+            rows = np.arange(len(vectors)) if keys is None else np.array([self._positions[k] for k in keys], dtype=np.int64)
+        if weights is not None:
+            query = query * weights
+        query = self._normalize(query.astype(np.float32))
+        scores = np.empty(len(rows), dtype=np.float32)
+        for start in range(0, len(rows), block_size):
+            block = np.asarray(vectors[rows[start:start + block_size]])
+            if weights is not None:
+                block = block * weights
+            scores[start:start + block_size] = self._normalize(block) @ query
+        return scores
+
+    def search(self, query: np.ndarray, top_k: int, weights: Optional[np.ndarray] = None) -> List[Tuple[str, float]]:
+        """The top_k most similar keys with their scores, best first."""
+        with self._lock:
+            keys = list(self._keys)
+        scores = self.similarities(query, keys, weights)
+        if not len(scores):
+            return []
+        top_k = min(top_k, len(scores))
+        best = np.argpartition(-scores, top_k - 1)[:top_k]
+        best = best[np.argsort(-scores[best])]
+        return [(keys[i], float(scores[i])) for i in best]
@@ -0,0 +1,7 @@
+"""Make the src/ top-level packages importable, as the app and scoutsense do."""
+import os
+import sys
+
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir, 'src'))
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
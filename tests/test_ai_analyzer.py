@@ -0,0 +1,67 @@
+import asyncio
+import json
+
+import pytest
+
+from services.ai_analyzer import AIAnalyzer
+from services.response_cache import MemoryBackend, ResponseCache
+from utils.config import config
+
+
+@pytest.fixture
+def analyzer(monkeypatch):
+    """A one-call analyzer whose model replies come from analyzer.replies, in order, sync or async."""
+    monkeypatch.setattr(AIAnalyzer, '_response_cache', ResponseCache(MemoryBackend()))
+    monkeypatch.setitem(config.analysis, 'staged', False)
+    analyzer = AIAnalyzer()
+    analyzer.replies, analyzer.prompts = [], []
+
+    def call(prompt, model_key, api_key, max_tokens=None, params=None):
+        analyzer.prompts.append(prompt)
+        reply = analyzer.replies.pop(0)
+        if isinstance(reply, Exception):
+            raise reply
+        return reply, None, model_key, api_key
+
+    async def call_async(*args):
+        return call(*args)
+
+    monkeypatch.setattr(analyzer, '_call', call)
+    monkeypatch.setattr(analyzer, '_call_async', call_async)
+    return analyzer
+
+
+def analyze(analyzer, asynchronous):
+    if asynchronous:
+        return asyncio.run(analyzer._analyze_resume_async('resume', 'job', 'gpt4o', 'key'))
+    return analyzer.analyze_single('resume', 'job', 'gpt4o', 'key')
+
+
+@pytest.mark.parametrize('asynchronous', [False, True])
+def test_missing_fields_are_reasked(analyzer, asynchronous):
+    analyzer.replies[:] = [json.dumps({'score': 5}), json.dumps({'feedback': ['Knows SQL']})]
+    result = analyze(analyzer, asynchronous)
+    assert result['score'] == 5 and result['feedback'] == ['Knows SQL']
+    assert len(analyzer.prompts) == 2 and not analyzer.replies
+
+
+@pytest.mark.parametrize('asynchronous', [False, True])
+def test_failed_reask_keeps_the_first_reply(analyzer, asynchronous):
+    analyzer.replies[:] = [json.dumps({'score': 5}), RuntimeError("rate limited")]
+    assert analyze(analyzer, asynchronous)['score'] == 5
+
+
+def test_sync_and_async_share_the_cache(analyzer):
+    analyzer.replies[:] = [json.dumps({'score': 5, 'feedback': ['Knows SQL']})]
+    first = analyze(analyzer, False)
+    again = analyze(analyzer, True)
+    assert again['score'] == first['score'] and again['cache']['hit']
+    assert len(analyzer.prompts) == 1
+
+
+def test_failed_call_returns_none_from_the_blocking_api(analyzer):
+    analyzer.replies[:] = [RuntimeError("down")]
+    assert analyzer.analyze_single('resume', 'job', 'gpt4o', 'key') is None
+    analyzer.replies[:] = [RuntimeError("down")]
+    with pytest.raises(RuntimeError):
+        asyncio.run(analyzer._analyze_resume_async('resume', 'job', 'gpt4o', 'key'))
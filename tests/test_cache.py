@@ -0,0 +1,71 @@
+import sqlite3
+
+import pytest
+
+from services.job_store import JobStore
+from services.prescreen import HashingTfidfEmbedder
+from utils.cache import DiskCache, connect
+from utils.vector_index import VectorIndex
+
+
+@pytest.fixture
+def connections(monkeypatch):
+    """Every SQLite connection opened during the test."""
+    opened = []
+    open_connection = sqlite3.connect
+
+    def tracking(*args, **kwargs):
+        opened.append(open_connection(*args, **kwargs))
+        return opened[-1]
+
+    monkeypatch.setattr(sqlite3, 'connect', tracking)
+    return opened
+
+
+def assert_closed(connections):
+    assert connections
+    for conn in connections:
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
+
+
+def test_connect_commits_rolls_back_and_closes(tmp_path, connections):
+    path = tmp_path / 'db.sqlite'
+    with connect(path) as conn:
+        conn.execute("CREATE TABLE t (x INTEGER)")
+        conn.execute("INSERT INTO t VALUES (1)")
+    with pytest.raises(RuntimeError):
+        with connect(path) as conn:
+            conn.execute("INSERT INTO t VALUES (2)")
+            raise RuntimeError
+    with connect(path) as conn:
+        assert conn.execute("SELECT x FROM t").fetchall() == [(1,)]
+    assert_closed(connections)
+
+
+def test_disk_cache_closes_its_connections(tmp_path, connections):
+    cache = DiskCache(str(tmp_path / 'cache.sqlite'), max_size_mb=1)
+    cache.set('a', {'score': 7})
+    assert cache.get('a') == {'score': 7} and cache.get('b') is None
+    assert cache.stats()['hits'] == 1
+    assert_closed(connections)
+
+
+def test_disk_cache_evicts_least_recently_used(tmp_path):
+    cache = DiskCache(str(tmp_path / 'cache.sqlite'), max_size_mb=25 / 2 ** 20)
+    cache.set('a', 'x' * 10)
+    cache.set('b', 'x' * 10)
+    cache.get('a')
+    cache.set('c', 'x' * 10)
+    assert cache.peek('b') is None and cache.get('a') and cache.get('c')
+    assert cache.stats()['evictions'] == 1
+
+
+def test_job_store_closes_its_connections(tmp_path, connections):
+    embedder = HashingTfidfEmbedder(256)
+    index = VectorIndex(str(tmp_path / 'postings.npy'), embedder.dimension, embedder.signature)
+    store = JobStore(str(tmp_path / 'postings.sqlite'), embedder, index)
+    store.add_text('posting.txt', 'Data engineer: Python, Kafka, SQL')
+    assert len(store) == 1 and store.match('Python data engineer')[0]['url'] == 'posting.txt'
+    assert store.remove('posting.txt') and store.postings() == []
+    assert_closed(connections)
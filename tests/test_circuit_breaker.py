@@ -0,0 +1,177 @@
+import asyncio
+
+import pytest
+
+from services.providers import ProviderBusyError
+from services.resilience import AllProvidersFailedError, Resilience
+from utils.circuit_breaker import CircuitBreaker
+from utils.rate_limiter import RateLimiter
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr('utils.circuit_breaker.time.monotonic', clock)
+    return clock
+
+
+def open_breaker(breaker):
+    for _ in range(breaker.failure_threshold):
+        assert breaker.allow()
+        breaker.record_failure()
+
+
+def test_opens_after_threshold_and_refuses_until_reset(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60)
+    breaker.allow()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+    clock.now += 59
+    assert not breaker.allow()
+
+
+def test_half_open_admits_one_trial(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    open_breaker(breaker)
+    clock.now += 60
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()
+
+
+def test_trial_success_closes_and_failure_reopens(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    open_breaker(breaker)
+    clock.now += 60
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+    clock.now += 60
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow() and breaker.allow()
+
+
+def test_released_trial_lets_the_next_call_try(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    open_breaker(breaker)
+    clock.now += 60
+    trial = breaker.allow()
+    breaker.release(trial)
+    assert breaker.allow()
+
+
+def test_only_the_trial_can_be_released(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    assert breaker.allow() is True
+    open_breaker(breaker)
+    clock.now += 60
+    trial = breaker.allow()
+    assert trial and trial is not True
+    breaker.release(True)
+    assert not breaker.allow()
+    # A trial given up on and replaced can't hand back its successor
+    clock.now += 60
+    successor = breaker.allow()
+    breaker.release(trial)
+    assert not breaker.allow()
+    breaker.release(successor)
+    assert breaker.allow()
+
+
+def test_abandoned_trial_is_replaced_after_reset_timeout(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    open_breaker(breaker)
+    clock.now += 60
+    assert breaker.allow()
+    clock.now += 30
+    assert not breaker.allow()
+    clock.now += 30
+    assert breaker.allow()
+
+
+class FakeProvider:
+    def __init__(self, breaker):
+        self.breaker = breaker
+        self.limiter = RateLimiter()
+
+
+@pytest.fixture
+def half_open(clock, monkeypatch):
+    """A Resilience whose only model sits on a provider with a half-open circuit."""
+    provider = FakeProvider(CircuitBreaker(failure_threshold=1, reset_timeout=60))
+    open_breaker(provider.breaker)
+    clock.now += 60
+    resilience = Resilience()
+    monkeypatch.setattr(resilience, 'chain', lambda model, key: [(model, provider, key)])
+    return resilience, provider.breaker
+
+
+def test_cancelled_trial_does_not_wedge_the_circuit(half_open):
+    resilience, breaker = half_open
+
+    async def scenario():
+        started = asyncio.Event()
+
+        async def attempt(model, key):
+            started.set()
+            await asyncio.sleep(3600)
+
+        task = asyncio.ensure_future(resilience.call_async('model', '', attempt))
+        await started.wait()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(scenario())
+    assert breaker.allow()
+
+
+def test_busy_trial_does_not_wedge_the_circuit(half_open):
+    resilience, breaker = half_open
+
+    def attempt(model, key):
+        raise ProviderBusyError('model: busy')
+
+    with pytest.raises(AllProvidersFailedError):
+        resilience.call('model', '', attempt)
+    assert breaker.allow()
+
+
+def test_trial_success_through_resilience_closes_the_circuit(half_open):
+    resilience, breaker = half_open
+    result, model, _ = resilience.call('model', '', lambda model, key: 'ok')
+    assert (result, model) == ('ok', 'model')
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_call_admitted_while_closed_does_not_release_another_callers_trial(half_open, clock):
+    resilience, breaker = half_open
+    breaker.record_success()
+    trials = []
+
+    def attempt(model, key):
+        # While this call is in flight the circuit opens and another caller takes the trial
+        open_breaker(breaker)
+        clock.now += 60
+        trials.append(breaker.allow())
+        raise ProviderBusyError('model: busy')
+
+    with pytest.raises(AllProvidersFailedError):
+        resilience.call('model', '', attempt)
+    assert trials[0] and breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow()
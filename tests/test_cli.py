@@ -0,0 +1,15 @@
+import pytest
+
+from scoutsense.cli import _cached
+
+
+@pytest.mark.parametrize('result, cached', [
+    ({'stages': {'score': 'cached', 'feedback': 'cached', 'questions': 'skipped'}}, True),
+    ({'stages': {'score': 'cached', 'feedback': 'fresh', 'questions': 'skipped'}}, False),
+    ({'duplicate_of': 'db8d2d517115', 'similarity': 0.98}, True),
+    ({'duplicate_of': 'db8d2d517115', 'reanalysis': 'diff'}, False),
+    ({'cache': {'hit': True, 'saved_tokens': 900}}, True),
+    ({'score': 6.0}, False),
+])
+def test_cached_flag(result, cached):
+    assert _cached(result) is cached
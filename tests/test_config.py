@@ -0,0 +1,53 @@
+import shutil
+
+import pytest
+import yaml
+
+from services.providers import ProviderRegistry
+from utils.config import config
+
+
+@pytest.fixture
+def config_file(tmp_path, monkeypatch):
+    """A copy of config.yaml that the shared config reads until the test ends."""
+    path = tmp_path / 'config.yaml'
+    shutil.copy(config._path, path)
+    callbacks = list(config._callbacks)
+    monkeypatch.setattr(config, '_path', path)
+    yield path
+    monkeypatch.undo()
+    config._callbacks[:] = callbacks
+    config.reload()
+
+
+def edit(path, change):
+    raw = yaml.safe_load(path.read_text())
+    change(raw)
+    path.write_text(yaml.safe_dump(raw))
+    assert config.reload()
+
+
+def test_callbacks_run_only_for_changed_sections(config_file):
+    calls = []
+    config.on_reload(['cache'], lambda: calls.append('cache'))
+    config.on_reload(['scoring'], lambda: calls.append('scoring'))
+    edit(config_file, lambda raw: raw['scoring']['thresholds'].update(high=8))
+    assert calls == ['scoring']
+    assert config.settings.scoring.thresholds.high == 8
+
+
+def test_invalid_edit_keeps_the_previous_config(config_file):
+    calls = []
+    config.on_reload(['scoring'], lambda: calls.append('scoring'))
+    config_file.write_text("scoring: [not, a, mapping]\n")
+    assert not config.reload()
+    assert calls == [] and config.scoring['thresholds']
+
+
+def test_registry_rebuilds_only_changed_providers(config_file):
+    registry = ProviderRegistry()
+    config.on_reload(['providers', 'resilience'], registry.reconfigure)
+    openai, gemini = registry.get('openai'), registry.get('gemini')
+    edit(config_file, lambda raw: raw['providers']['openai'].update(max_in_flight=9))
+    assert registry.get('openai') is not openai and registry.get('openai').max_in_flight == 9
+    assert registry.get('gemini') is gemini
@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+
+from services.ai_analyzer import AIAnalyzer
+from services.consensus import aggregate, agreement
+
+
+def test_agreement_picks_the_closest_quorum():
+    scores = {'a': 3.0, 'b': 7.0, 'c': 7.5, 'd': 9.0}
+    assert agreement(scores, 2, 1.0) == ['b', 'c']
+    assert agreement(scores, 3, 1.0) is None
+    assert agreement(scores, 3, 2.0) == ['b', 'c', 'd']
+
+
+def test_agreement_needs_enough_scores():
+    assert agreement({'a': 7.0}, 2, 1.0) is None
+    assert agreement({}, 0, 1.0) is None
+
+
+def test_aggregate_averages_the_agreeing_models():
+    result = aggregate({'a': 3.0, 'b': 7.0, 'c': 7.5}, ['b', 'c'])
+    assert result['score'] == 7.2 and result['agreed'] == ['b', 'c']
+    assert result['mean'] == 5.83 and result['variance'] == 4.06
+
+
+def test_aggregate_without_agreement_takes_the_median():
+    assert aggregate({'a': 2.0, 'b': 5.0, 'c': 9.0}, None)['score'] == 5.0
+
+
+@pytest.fixture
+def analyzer(monkeypatch):
+    """An analyzer whose score stage answers with fixed (delay, score) per model."""
+    votes, cancelled = {}, []
+    analyzer = AIAnalyzer()
+
+    async def vote(context, model_key, api_key, use_cache):
+        delay, score = votes[model_key]
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            cancelled.append(model_key)
+            raise
+        if score is None:
+            raise ValueError("no score")
+        return score, model_key, False
+
+    monkeypatch.setattr(analyzer, '_vote', vote)
+    analyzer.votes, analyzer.cancelled = votes, cancelled
+    return analyzer
+
+
+def collect(analyzer, quorum=2, tolerance=1.0, timeout=None):
+    return asyncio.run(analyzer._collect_votes('context', list(analyzer.votes), {}, True, quorum, tolerance, timeout))
+
+
+def test_quorum_cancels_the_slow_model(analyzer):
+    analyzer.votes.update(fast=(0.01, 7.0), quick=(0.02, 7.5), slow=(5, 2.0))
+    scores, agreed, status = collect(analyzer)
+    assert agreed == ['fast', 'quick'] and scores == {'fast': 7.0, 'quick': 7.5}
+    assert status == {'fast': 'scored', 'quick': 'scored', 'slow': 'cancelled'}
+    assert analyzer.cancelled == ['slow']
+
+
+def test_disagreement_waits_for_every_model(analyzer):
+    analyzer.votes.update(a=(0.01, 2.0), b=(0.02, 9.0), c=(0.03, 8.5))
+    scores, agreed, status = collect(analyzer)
+    assert agreed == ['c', 'b'] and len(scores) == 3 and not analyzer.cancelled
+
+
+def test_failed_and_timed_out_models_have_no_vote(analyzer):
+    analyzer.votes.update(a=(0.01, 6.0), broken=(0.01, None), slow=(5, 6.0))
+    scores, agreed, status = collect(analyzer, timeout=0.1)
+    assert scores == {'a': 6.0} and agreed is None
+    assert status == {'a': 'scored', 'broken': 'failed', 'slow': 'timed out'}
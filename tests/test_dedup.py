@@ -0,0 +1,79 @@
+import pytest
+
+from services.ai_analyzer import AIAnalyzer
+from services.dedup import DedupIndex
+from services.response_cache import MemoryBackend, ResponseCache
+from utils.config import config
+
+RESUME = """Jane Doe
+Senior Data Engineer with eight years building streaming pipelines in Python and Scala.
+Led the migration of nightly batch jobs to Kafka and Flink, cutting data latency from hours to minutes.
+Designed a feature store used by twelve machine learning teams across the company.
+Mentored five engineers and ran the on-call rotation for the data platform group.
+Skills: Python, Scala, SQL, Kafka, Flink, Spark, Airflow, Terraform, Kubernetes, AWS."""
+
+
+@pytest.fixture
+def path(tmp_path):
+    return tmp_path / 'resumes.sqlite'
+
+
+def test_exact_duplicate_ignores_case_and_punctuation(path):
+    index = DedupIndex(path)
+    key, match = index.add(RESUME)
+    assert match is None
+    again = index.find(RESUME.upper().replace(',', ' ;'))
+    assert again == (key, 1.0, True)
+
+
+def test_near_duplicate_above_threshold(path):
+    index = DedupIndex(path, threshold=0.5)
+    key, _ = index.add(RESUME)
+    edited = RESUME.replace("five engineers", "six engineers")
+    _, match = index.add(edited)
+    assert match.key == key and not match.exact and match.similarity >= 0.5
+    assert len(index) == 2
+
+
+def test_unrelated_resume_is_not_a_duplicate(path):
+    index = DedupIndex(path)
+    index.add(RESUME)
+    assert index.find("Pastry chef with a decade of experience in French bakeries and wedding cakes.") is None
+
+
+def test_two_instances_share_one_index(path):
+    first, second = DedupIndex(path), DedupIndex(path)
+    key, _ = first.add(RESUME)
+    other_key, _ = second.add("Pastry chef with a decade of experience in French bakeries and wedding cakes.")
+    # Neither write overwrites the other, and each instance sees both
+    assert len(first) == len(second) == 2
+    assert second.find(RESUME).key == key
+    assert first.find("pastry chef with a decade of experience in french bakeries and wedding cakes").key == other_key
+    assert second.add(RESUME)[1].exact
+
+
+def test_index_built_with_other_settings_is_discarded(path):
+    DedupIndex(path, num_perm=64).add(RESUME)
+    index = DedupIndex(path, num_perm=128)
+    assert len(index) == 0 and index.find(RESUME) is None
+
+
+@pytest.fixture
+def analyzer(path, monkeypatch):
+    monkeypatch.setattr(DedupIndex, '_index', DedupIndex(path, threshold=0.5))
+    monkeypatch.setattr(AIAnalyzer, '_response_cache', ResponseCache(MemoryBackend()))
+    monkeypatch.setitem(config.dedup, 'reuse_threshold', 0.5)
+    return AIAnalyzer()
+
+
+def test_rerun_of_the_same_resume_is_a_cache_hit(analyzer):
+    first = analyzer._find_duplicate(RESUME, 'job', 'gpt4o', True)
+    assert first['result'] is None
+    analyzer._remember(first['key'], 'job', 'gpt4o', {'score': 8.0, 'feedback': ['Strong Python']})
+
+    rerun = analyzer._find_duplicate(RESUME, 'job', 'gpt4o', True)['result']
+    assert rerun['score'] == 8.0 and rerun['cache']['hit']
+    assert 'duplicate_of' not in rerun and 'similarity' not in rerun
+
+    edited = analyzer._find_duplicate(RESUME.replace("five engineers", "six engineers"), 'job', 'gpt4o', True)['result']
+    assert edited['score'] == 8.0 and edited['duplicate_of'] == first['key'][:12]
@@ -0,0 +1,91 @@
+import json
+
+import pytest
+
+from services.html_engines import ENGINES, extract_text, find_job_posting, job_posting_text
+
+AVAILABLE = [name for name, engine in ENGINES.items() if engine.available()]
+
+PARAGRAPH = "We build data pipelines for hospitals, clinics and labs, moving records safely between systems."
+
+
+def json_ld(data):
+    return f'<html><head><script type="application/ld+json">{json.dumps(data)}</script></head><body></body></html>'
+
+
+@pytest.mark.parametrize('name', AVAILABLE)
+def test_job_posting_fields_are_joined_in_order(name):
+    posting = {
+        '@type': 'JobPosting',
+        'title': 'Data Engineer',
+        'hiringOrganization': {'@type': 'Organization', 'name': 'Acme'},
+        'description': '&lt;p&gt;Build &lt;b&gt;pipelines&lt;/b&gt;.&lt;/p&gt;',
+        'skills': 'Python, SQL',
+    }
+    assert job_posting_text(posting, ENGINES[name]()) == "Data Engineer at Acme Build pipelines. Skills: Python, SQL"
+
+
+def test_job_posting_is_found_inside_a_graph():
+    page = json_ld({'@context': 'https://schema.org', '@graph': [
+        {'@type': 'Organization', 'name': 'Acme'},
+        {'@type': ['JobPosting'], 'title': 'Data Engineer'},
+    ]})
+    assert find_job_posting(page)['title'] == 'Data Engineer'
+
+
+@pytest.mark.parametrize('name', AVAILABLE)
+def test_non_string_json_ld_values_are_flattened(name):
+    posting = {
+        '@type': 'JobPosting',
+        'title': 'Data Engineer',
+        'hiringOrganization': {'@type': 'Organization', 'name': 'Acme'},
+        'jobLocation': {'address': {'addressLocality': 'Berlin', 'addressCountry': {'name': 'DE'}, 'postalCode': 10115}},
+        'description': '&lt;p&gt;Build &lt;b&gt;pipelines&lt;/b&gt;.&lt;/p&gt;',
+        'experienceRequirements': {'@type': 'OccupationalExperienceRequirements', 'monthsOfExperience': 36},
+        'skills': [{'@type': 'DefinedTerm', 'name': 'Python'}, 'SQL'],
+        'qualifications': 5,
+        'responsibilities': None,
+    }
+    text = job_posting_text(posting, ENGINES[name]())
+    assert text == ("Data Engineer at Acme Location: Berlin, DE. Build pipelines. "
+                    "Qualifications: 5 Skills: Python SQL")
+
+
+@pytest.mark.parametrize('name', AVAILABLE)
+def test_navigation_and_related_blocks_are_dropped(name):
+    page = f'''<html><body><div class="menu"><a href="/">Home</a> <a href="/jobs">Jobs</a></div>
+        <div class="job-description"><p>{PARAGRAPH}</p><p>{PARAGRAPH}</p><ul><li>{PARAGRAPH}</li></ul></div>
+        <footer><p>{PARAGRAPH.upper()}</p></footer></body></html>'''
+    text = ENGINES[name]().extract(page)
+    assert PARAGRAPH in text
+    assert 'Home' not in text and PARAGRAPH.upper() not in text
+
+
+def test_short_json_ld_falls_back_to_the_page():
+    page = json_ld({'@type': 'JobPosting', 'title': 'Data Engineer', 'description': 42})
+    page = page.replace('<body></body>', f'<body><main><p>{PARAGRAPH}</p></main></body>')
+    assert PARAGRAPH in extract_text(page)
+
+
+@pytest.mark.parametrize('name', AVAILABLE)
+def test_main_block_can_be_above_the_grandparent(name):
+    # The hinted wrapper is three levels above the paragraphs, so it only scores if ancestors all the way up do
+    page = f'''<html><body><div class="menu"><a href="/">Home</a> <a href="/jobs">Jobs</a></div>
+        <h1>Data Engineer</h1>
+        <div class="job-description">
+          <h2>About the role</h2><div><div><p>{PARAGRAPH}</p><p>{PARAGRAPH}</p></div></div>
+          <h2>Requirements</h2><div><div><ul><li>{PARAGRAPH}</li><li>{PARAGRAPH}</li></ul></div></div>
+        </div>
+        <div class="related"><p>{PARAGRAPH.upper()}</p></div></body></html>'''
+    text = ENGINES[name]().extract(page)
+    for title in ('Data Engineer', 'About the role', 'Requirements'):
+        assert title in text
+    assert 'Home' not in text and PARAGRAPH.upper() not in text
+
+
+@pytest.mark.parametrize('name', AVAILABLE)
+def test_a_short_main_block_falls_back_to_the_whole_page(name):
+    page = f'''<html><body><div id="content"><p>Apply now for this role, today, here, ok.</p></div>
+        <table><tr><td>{PARAGRAPH[:60]}</td></tr><tr><td>{PARAGRAPH[60:]}</td></tr></table></body></html>'''
+    text = ENGINES[name]().extract(page)
+    assert 'Apply now' in text and PARAGRAPH[:60] in text
@@ -0,0 +1,63 @@
+import sqlite3
+
+from services.job_queue import CANCELLED, DONE, QUEUED, RUNNING, JobQueue
+
+
+def test_claimed_job_carries_its_input_until_it_finishes(tmp_path):
+    queue = JobQueue(str(tmp_path / 'queue.sqlite'))
+    job_id = queue.submit('analyze', {'model_key': 'gpt4o'}, b'resume')
+    job = queue.claim('worker')
+    assert (job['id'], job['status'], job['input']) == (job_id, RUNNING, b'resume')
+    assert queue.claim('other-worker') is None
+    queue.complete(job_id, 'worker', {'score': 7})
+    job = queue.get(job_id)
+    assert (job['status'], job['result']) == (DONE, {'score': 7})
+
+
+def test_api_key_is_never_written_to_the_file(tmp_path):
+    queue = JobQueue(str(tmp_path / 'queue.sqlite'))
+    job_id = queue.submit('analyze', {'model_key': 'gpt4o'}, b'resume', 'sk-secret')
+
+    columns = [row[1] for row in sqlite3.connect(queue.path).execute("PRAGMA table_info(jobs)")]
+    dump = '\n'.join(sqlite3.connect(queue.path).iterdump())
+    assert 'api_key' not in columns
+    assert 'sk-secret' not in dump
+
+    job = queue.claim('worker')
+    assert job['id'] == job_id
+    assert job['input'] == b'resume'
+    assert job['api_key'] == 'sk-secret'
+    queue.complete(job_id, 'worker', {'score': 7})
+    assert queue._api_keys == {}
+
+
+def test_other_processes_claim_without_the_key(tmp_path):
+    path = str(tmp_path / 'queue.sqlite')
+    JobQueue(path).submit('analyze', {}, b'resume', 'sk-secret')
+    job = JobQueue(path).claim('other-worker')
+    assert job['status'] == RUNNING
+    assert job['api_key'] is None
+
+
+def test_expired_lease_is_requeued_on_recover(tmp_path):
+    queue = JobQueue(str(tmp_path / 'queue.sqlite'), lease_timeout=0, recover_interval=3600)
+    job_id = queue.submit('analyze', {}, b'resume')
+    queue.claim('dead-worker')
+    # claim() only recovers every recover_interval seconds, so the job stays running until recover()
+    assert queue.claim('worker') is None
+    queue.recover()
+    assert queue.get(job_id)['status'] == QUEUED
+    job = queue.claim('worker')
+    assert (job['id'], job['attempts']) == (job_id, 2)
+    queue.complete(job_id, 'worker', {'score': 7})
+    assert queue.get(job_id)['status'] == DONE
+
+
+def test_only_queued_jobs_can_be_cancelled(tmp_path):
+    queue = JobQueue(str(tmp_path / 'queue.sqlite'))
+    running = queue.submit('analyze', {}, b'first')
+    queued = queue.submit('analyze', {}, b'second')
+    queue.claim('worker')
+    assert not queue.cancel(running)
+    assert queue.cancel(queued)
+    assert queue.get(queued)['status'] == CANCELLED
@@ -0,0 +1,24 @@
+import pytest
+
+from benchmarks.pdf_engines import build_pdfs
+from services.pdf_engines import ENGINES, PdfEngine
+
+
+@pytest.fixture(scope='module')
+def pdf():
+    return build_pdfs([4])[4]
+
+
+def test_engines_must_implement_extraction():
+    with pytest.raises(TypeError):
+        PdfEngine()
+
+
+@pytest.mark.parametrize('name', [name for name, engine in ENGINES.items() if engine.available()])
+def test_page_ranges_match_a_full_pass(name, pdf):
+    engine = ENGINES[name]()
+    with open(pdf, 'rb') as document:
+        pages = list(engine.iter_pages(document))
+        assert len(pages) == engine.page_count(document) == 4
+        assert list(engine.iter_pages(document, 1, 3)) == pages[1:3]
+        assert all(page.strip() for page in pages)
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from services.prescreen import Embedder, HashingTfidfEmbedder, PreScreener
+from utils.vector_index import VectorIndex
+
+# Unit vectors at cosine similarity 1, 0.6 and 0 to the job
+VECTORS = {'job': [1, 0], 'engineer': [1, 0], 'analyst': [0.6, 0.8], 'chef': [0, 1]}
+RESUMES = [('chef.pdf', 'chef'), ('analyst.pdf', 'analyst'), ('engineer.pdf', 'engineer')]
+
+
+class FixedEmbedder(Embedder):
+    name = 'fixed'
+    dimension = 2
+    signature = 'fixed-v1'
+
+    def __init__(self):
+        self.embedded = []
+
+    def embed(self, texts):
+        self.embedded.extend(texts)
+        return np.array([VECTORS[text] for text in texts], dtype=np.float32)
+
+
+def test_embedder_is_abstract():
+    with pytest.raises(TypeError):
+        Embedder()
+
+
+def names(candidates):
+    return [name for name, _, _ in candidates]
+
+
+@pytest.mark.parametrize('top_k, min_similarity, selected', [
+    (None, None, ['engineer.pdf', 'analyst.pdf', 'chef.pdf']),
+    (2, None, ['engineer.pdf', 'analyst.pdf']),
+    (None, 0.5, ['engineer.pdf', 'analyst.pdf']),
+    (1, 0.5, ['engineer.pdf']),
+    (3, 0.7, ['engineer.pdf']),
+])
+def test_screen_splits_on_top_k_and_min_similarity(tmp_path, top_k, min_similarity, selected):
+    index = VectorIndex(str(tmp_path / 'resumes.npy'), 2, 'fixed-v1')
+    chosen, rejected = PreScreener(FixedEmbedder(), index, top_k, min_similarity).screen(RESUMES, 'job')
+    assert names(chosen) == selected
+    assert names(chosen + rejected) == ['engineer.pdf', 'analyst.pdf', 'chef.pdf']
+    assert [score for _, _, score in chosen + rejected] == [1.0, 0.6, 0.0]
+
+
+def test_resumes_are_embedded_once(tmp_path):
+    path = str(tmp_path / 'resumes.npy')
+    PreScreener(FixedEmbedder(), VectorIndex(path, 2, 'fixed-v1')).screen(RESUMES, 'job')
+    embedder = FixedEmbedder()
+    PreScreener(embedder, VectorIndex(path, 2, 'fixed-v1')).screen(RESUMES, 'job')
+    assert embedder.embedded == ['job']
+
+
+def test_tfidf_ranks_the_closer_resume_first(tmp_path):
+    embedder = HashingTfidfEmbedder(1024)
+    index = VectorIndex(str(tmp_path / 'resumes.npy'), embedder.dimension, embedder.signature)
+    resumes = [('chef.pdf', 'Pastry chef baking wedding cakes and French bread'),
+               ('engineer.pdf', 'Data engineer building Kafka pipelines in Python and SQL')]
+    chosen, rejected = PreScreener(embedder, index, top_k=1).screen(resumes, 'Data engineer: Python, Kafka, SQL')
+    assert names(chosen) == ['engineer.pdf'] and names(rejected) == ['chef.pdf']
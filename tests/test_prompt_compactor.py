@@ -0,0 +1,40 @@
+from services.prompt_compactor import PAGE_BREAK, normalize_resume_text, truncate_to_tokens
+
+
+def test_whitespace_and_blank_lines_are_collapsed():
+    assert normalize_resume_text("Jane  Doe\t\n\n\n  Data Engineer  \n") == "Jane Doe\nData Engineer"
+
+
+def test_repeated_content_lines_are_kept():
+    text = "Acme Corp\nSoftware Engineer\n2019 - 2021\nGlobex\nSoftware Engineer\n2019 - 2021\nSkills\nPython"
+    assert normalize_resume_text(text) == text
+
+
+def test_running_headers_and_page_numbers_are_dropped_after_the_first_page():
+    pages = [
+        "Jane Doe | jane@example.com\nExperience\nAcme Corp\nPage 1 of 3",
+        "Jane Doe | jane@example.com\nGlobex\nLed a team of five\nPage 2 of 3",
+        "Jane Doe | jane@example.com\nEducation\nBSc Computer Science\nPage 3 of 3",
+    ]
+    assert normalize_resume_text(PAGE_BREAK.join(pages)).splitlines() == [
+        "Jane Doe | jane@example.com", "Experience", "Acme Corp", "Page 1 of 3",
+        "Globex", "Led a team of five",
+        "Education", "BSc Computer Science",
+    ]
+
+
+def test_lines_repeated_inside_pages_are_not_boilerplate():
+    pages = [
+        "Jane Doe\nAcme Corp\nSoftware Engineer\nPython\nLed the platform team\nTeam lead",
+        "Globex\nIntern\nSoftware Engineer\nPython\nBuilt the billing service\nReferences on request",
+    ]
+    text = normalize_resume_text(PAGE_BREAK.join(pages))
+    assert text.count("Software Engineer") == 2 and text.count("Python") == 2
+
+
+def test_truncation_cuts_at_a_word_boundary():
+    text = "Led the migration of nightly batch jobs to streaming pipelines " * 50
+    cut = truncate_to_tokens(text, 20)
+    assert cut.endswith(' …') and len(cut) < len(text)
+    assert text.startswith(cut[:-2])
+    assert truncate_to_tokens("short", 20) == "short"
@@ -0,0 +1,18 @@
+import asyncio
+
+from services.providers import Provider
+from utils import aio
+
+
+def test_async_clients_are_closed_with_their_loop():
+    provider = Provider('local', {'type': 'openai_compatible', 'base_url': 'http://127.0.0.1:9/v1'})
+
+    async def use():
+        provider.async_client('key-a')
+        provider.async_client('key-b')
+        return provider._async_clients[asyncio.get_running_loop()]['http']
+
+    first, second = aio.run(use()), aio.run(use())
+    assert first is not second
+    assert first.is_closed and second.is_closed
+    assert len(provider._async_clients) == 0
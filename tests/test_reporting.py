@@ -0,0 +1,33 @@
+import logging
+import threading
+
+from utils import reporting
+
+
+class ListReporter(reporting.Reporter):
+    def __init__(self):
+        self.messages = []
+
+    def error(self, message: str):
+        self.messages.append(message)
+
+
+def test_reporter_is_set_for_the_current_thread_only(caplog):
+    ours = ListReporter()
+    token = reporting.set_reporter(ours)
+    try:
+        thread = threading.Thread(target=reporting.error, args=("from a worker",))
+        with caplog.at_level(logging.ERROR, logger='scoutsense'):
+            thread.start()
+            thread.join()
+            reporting.error("from the script")
+    finally:
+        reporting._reporter.reset(token)
+    assert ours.messages == ["from the script"]
+    assert [r.getMessage() for r in caplog.records] == ["from a worker"]
+
+
+def test_streamlit_reporter_logs_outside_a_script_run(caplog):
+    with caplog.at_level(logging.WARNING, logger='scoutsense'):
+        reporting.StreamlitReporter().warning("no script context here")
+    assert [r.getMessage() for r in caplog.records] == ["no script context here"]
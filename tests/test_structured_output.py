@@ -0,0 +1,36 @@
+import pytest
+
+from services.prompt_templates import ANALYSIS_TASKS, analysis_prompt
+from services.structured_output import JSON_FORMAT_INSTRUCTIONS, repair_json, repair_json_sequence
+
+
+@pytest.mark.parametrize('reply, expected', [
+    ('{"score": 8, "feedback": ["Strong Python"]}', {'score': 8, 'feedback': ['Strong Python']}),
+    ('Here you go:\n```json\n{"score": 6.5}\n```', {'score': 6.5}),
+    ('{"score": 8, "feedback": ["Strong Py', {'score': 8, 'feedback': ['Strong Py']}),
+    ('{"score": 8, "feedback": ["a", "b",', {'score': 8, 'feedback': ['a', 'b']}),
+    ('{"score": 8, "feedback":', {'score': 8, 'feedback': None}),
+    ('{"score": 8, "questions": {"easy": ["Why?"], "intermediate": ["How',
+     {'score': 8, 'questions': {'easy': ['Why?'], 'intermediate': ['How']}}),
+    ('{"feedback": ["ends in a backslash \\', {'feedback': ['ends in a backslash ']}),
+])
+def test_repair_json_salvages_truncated_and_fenced_replies(reply, expected):
+    assert repair_json(reply) == expected
+
+
+@pytest.mark.parametrize('reply', ['no json here', '[1, 2, 3]', ''])
+def test_repair_json_needs_an_object(reply):
+    assert repair_json(reply) is None
+
+
+def test_repair_json_sequence_merges_streamed_stages():
+    streamed = '{"score": 7.5}\n{"feedback": ["Good fit"]}\n{"questions": {"easy": ["Tell me ab'
+    assert repair_json_sequence(streamed) == {
+        'score': 7.5, 'feedback': ['Good fit'], 'questions': {'easy': ['Tell me ab']},
+    }
+
+
+def test_prompt_uses_the_configured_question_threshold():
+    prompt = analysis_prompt('resume', 'job', JSON_FORMAT_INSTRUCTIONS, 8.5)
+    assert 'If the rating is 8.5 or higher' in prompt and 'below 8.5' in prompt
+    assert '{high}' not in prompt and '{high}' in ANALYSIS_TASKS
@@ -0,0 +1,45 @@
+import io
+
+import pytest
+
+from utils import uploads
+from utils.config import config
+
+
+class Pipe(io.RawIOBase):
+    """A readable stream that can't seek, like a socket."""
+
+    def __init__(self, data):
+        self._data = io.BytesIO(data)
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        return self._data.readinto(buffer)
+
+
+@pytest.fixture
+def limits(monkeypatch):
+    limits = config.settings.file_types.limits
+    monkeypatch.setattr(limits, 'max_file_mb', 1)
+    monkeypatch.setattr(limits, 'spool_memory_kb', 1)
+    return limits
+
+
+@pytest.mark.parametrize('as_source', [str, lambda path: path, lambda path: path.read_bytes(),
+                                       lambda path: open(path, 'rb'), lambda path: Pipe(path.read_bytes())])
+def test_every_source_kind_is_read_from_the_start(tmp_path, limits, as_source):
+    path = tmp_path / 'resume.pdf'
+    path.write_bytes(b'%PDF' + b'x' * 4096)
+    with uploads.open_source(as_source(path)) as fileobj:
+        assert fileobj.read() == path.read_bytes()
+
+
+@pytest.mark.parametrize('as_source', [str, lambda path: path, lambda path: Pipe(path.read_bytes())])
+def test_oversized_source_is_rejected(tmp_path, limits, as_source):
+    path = tmp_path / 'resume.pdf'
+    path.write_bytes(b'x' * (2 ** 20 + 1))
+    with pytest.raises(uploads.DocumentTooLargeError):
+        with uploads.open_source(as_source(path)):
+            pass